@@ -0,0 +1,115 @@
+# -*- python -*-
+"""Code sets represented as bitsets, and a per-root index of score classes.
+
+A bitset is a python integer where bit *c* is set when the numeric code *c*
+is a member of the set.  Set operations are integer operations, which
+replaces per-code loops over code sets with a handful of bitwise operations
+on :py:data:`.CodeTable.NCODES`-bit integers.
+"""
+
+from . import *
+from . import score as score
+from . import singleton as singleton
+
+import binascii
+
+NCODES  = CodeTable.NCODES
+NSCORES = CodeTable.NSCORES
+
+EMPTY = 0
+"""The empty set."""
+
+ALL = (1 << NCODES) - 1
+"""The set of all codes."""
+
+_NBYTES = (NCODES + 7) // 8
+
+_BYTE_MEMBERS = tuple(tuple(i for i in range(0, 8) if b & (1 << i))
+                      for b in range(0, 256))
+"""Bit positions set in each byte value."""
+
+
+def from_codes(codes):
+    """:param codes: an iterable of numeric codes.
+    :return: the bitset of *codes*.
+    """
+    b = bytearray(_NBYTES)
+    for c in codes:
+        b[c >> 3] |= 1 << (c & 7)
+    b.reverse()
+    return int(binascii.hexlify(b), 16)
+
+
+def to_codes(mask):
+    """:param mask: a bitset.
+    :return: the members of *mask*, a list of numeric codes in ascending order.
+    """
+    codes = []
+    if not mask:
+        return codes
+    h = '{:x}'.format(mask)
+    if len(h) & 1:
+        h = '0' + h
+    b = bytearray(binascii.unhexlify(h))
+    b.reverse()
+    for (i, byte) in enumerate(b):
+        if byte:
+            base = i << 3
+            codes.extend(base + j for j in _BYTE_MEMBERS[byte])
+    return codes
+
+
+def popcount(mask):
+    """:param mask: a bitset.
+    :return: the number of members of *mask*.
+    """
+    return bin(mask).count('1')
+
+
+def _genmasks(lookup):
+    masks = []
+    for root in range(0, NCODES):
+        row = lookup[root]
+        m = [0] * NSCORES
+        for c in range(0, NCODES):
+            m[row[c]] |= 1 << c
+        masks.append(tuple(m))
+    return tuple(masks)
+
+
+class ScoreMaskTable(singleton.SingletonBehavior):
+    """Score class index: for every root code, and every score, the bitset of
+    codes with that score against the root.  A singleton class."""
+    __metaclass__ = singleton.Singleton
+
+    def __init__(self):
+        score.initialize()
+
+        self.MASKS = _genmasks(score.LOOKUP_TABLE)
+        """Score classes, use as ``MASKS[root][score]``.  For each root, the
+        score classes are disjoint, and their union is :py:data:`.ALL`."""
+
+
+    def partition(self, mask, root):
+        """Splits a set of codes by score against a root code.
+
+        :param mask: bitset of the codes to be split.
+        :param root: numeric code.
+        :return: a tuple of bitsets, indexable by score.
+        """
+        return tuple(mask & m for m in self.MASKS[root])
+
+
+MASK_TABLE = None
+"""The single instance of :py:class:`.ScoreMaskTable`."""
+
+
+def initialize():
+    """Initialize global tables."""
+
+    global MASK_TABLE
+
+    if MASK_TABLE is not None:
+        return
+
+    MASK_TABLE = ScoreMaskTable()
@@ -1,6 +1,8 @@
 """Mastermind Strategy Tree builder."""
 
 from . import *
+from . import bitset
+from . import cache
 from . import descr 
 from . import partition 
 from . import progress
@@ -9,14 +11,18 @@ from . import tree
 from . import usage
 from . import xforms
 
-from partition import PartitionResult
-from progress import ReportingCalculationStatus
+from partition import MaskPartitionResult, PartitionResult, PartitionSizes
+from progress import ReportingCalculationStatus, NULL_STATUS
 
 from collections import namedtuple
 import datetime
+import itertools
+import multiprocessing
 import os
 import random
+import resource
 import sys
+import timeit
 
 SOCKET_NAME_TEMPLATE = 'unix://default//tmp/mm.progress.{}'
 """Default datagram socket address template, instantiated with a process id."""
@@ -28,6 +34,18 @@ _MAX_REMAINING = 1000
 
 _SCORE_LIST = range(CODETABLE.NSCORES)
 
+MASK_PARTITION_THRESHOLD = 256
+"""Problems larger than this size are partitioned through their bitset
+representation; see :py:meth:`.BuilderStrategy.partition`.  Below this size,
+iterating over the codes is cheaper than counting bits in the masks."""
+
+FAILURE_CACHE_SIZE = 100000
+"""Default maximum number of problems in :py:attr:`.TreeBuilder.failures`."""
+
+TRANSPOSITION_TABLE_SIZE = 100000
+"""Default number of entries in the :py:class:`.TreeBuilder` transposition
+table."""
+
 def size_limit(remaining):
     """Calculates an upper bound on problem size for the given number of guesses.
 
@@ -71,6 +89,66 @@ def size_limit(remaining):
     return size_limit(remaining)
 
 
+def _gen_min_total_moves():
+    # Fill levels in order: at most (P-1)**(d-1) codes are found with the
+    # d-th guess; see size_limit().
+    moves = [0]
+    depth, capacity, left = 1, 1, 1
+    for _ in xrange(CODETABLE.NCODES):
+        if not left:
+            depth += 1
+            capacity *= _MAX_PARTS - 1
+            left = capacity
+        moves.append(moves[-1] + depth)
+        left -= 1
+    return tuple(moves)
+
+_MIN_TOTAL_MOVES = _gen_min_total_moves()
+
+
+def min_total_moves(size, remaining=None):
+    """Admissible lower bound on the total moves of a strategy tree.
+
+    :param size: problem size.
+    :param remaining: optional maximum game length.
+    :return: the least possible sum of game lengths over the problem; *None* when
+      the problem cannot be solved within *remaining* guesses, see :py:func:`.size_limit`.
+
+    A guess finds at most one code, and splits the others into at most :math:`P-1` 
+    subproblems, where :math:`P` is the number of possible score values.  So, at most 
+    :math:`(P-1)^{d-1}` codes are found with the :math:`d`-th guess, and the bound
+    fills the shallowest levels first.  For example, with 14 possible scores, a problem 
+    of 20 codes needs at least :math:`1 + 2 \\times 13 + 3 \\times 6 = 45` moves.
+    """
+    if remaining is not None and size > size_limit(remaining):
+        return None
+    return _MIN_TOTAL_MOVES[size]
+
+
+def partition_moves_bound(sizes, in_solution):
+    """Admissible lower bound on the total moves of a tree with a given first split.
+
+    :param sizes: partition sizes, indexable by score.
+    :param in_solution: true when the root guess is in the problem.
+    :return: the least possible total moves of a tree whose root splits the problem 
+      into parts of the specified sizes.
+
+    Every code in a part takes one move for the root guess, plus its moves in the 
+    part's subtree, bounded by :py:func:`.min_total_moves`.
+    """
+    lb = 1 if in_solution else 0
+    for (score, size) in enumerate(sizes):
+        if size and score != CODETABLE.PERFECT_SCORE:
+            lb += size + _MIN_TOTAL_MOVES[size]
+    return lb
+
+
+def _parts_by_size(pr):
+    """:return: the scores of a partition result, by descending part size."""
+    parts = pr.parts
+    return sorted(_SCORE_LIST, key=lambda score: -len(parts[score]))
+
+
 class SolutionEvaluator(descr.WithDescription):
     """Strategy tree evaluator.
 
@@ -109,6 +187,20 @@ class SolutionEvaluator(descr.WithDescription):
         """
         return state[0]
 
+
+    def move_limit(self, state):
+        """Upper bound on the total moves of useful trees.
+
+        :param state: evaluation state.
+        :return: a number such that evaluating a non-optimal tree with more
+          total moves cannot change the best solution; *None* when the
+          evaluator does not rank trees by total moves.
+
+        The builder abandons candidates as soon as their total moves are
+        known to exceed this limit.
+        """
+        return None
+
     @classmethod
     def description(clazz):
         return descr.base_description(clazz)
@@ -159,6 +251,9 @@ class BuilderStrategy(descr.WithDescription):
         The ``<id>`` component identifies the message source.  Since ``/`` is the syntactic delimiter,
         an ``<id>`` cannot contain that character.
 
+        The address :py:data:`.progress.DISABLED` disables progress reporting: every
+        strategy then shares :py:data:`.progress.NULL_STATUS`.
+
         If ``<path>`` component is an absolute path, then it must start with a ``/``; 
         see :py:data:`.SOCKET_NAME_TEMPLATE`, which uses an absolute path.
         """
@@ -178,16 +273,42 @@ class BuilderStrategy(descr.WithDescription):
         self.prefix = None
         """A sequence of numeric codes, representing the first elements :py:attr:`.BuilderStrategy.path` items."""
 
+        self.failures = None
+        """Optional :py:class:`.cache.FailureCache` shared by the strategies
+        of a build, keyed by :py:attr:`.BuilderStrategy.failure_key`; 
+        inherited from the parent."""
+
+        self._problem_mask = None
+        self._preserving = None
+        self._problem_key = None
+
+        # Status objects, by depth, shared by the strategies of a build: 
+        # problems at the same depth are solved one at a time.
+        self._statuses = None
+
         if step:
             self.parent = step.origin
+            self.failures = self.parent.failures
             self.path = self.parent.path + (step,)
             self.prefix = self.parent.prefix + (step.root,)
-            self.status = ReportingCalculationStatus(step.origin.status, len(self.problem))
+            self._statuses = statuses = self.parent._statuses
+            if statuses is None:
+                self.status = NULL_STATUS
+            elif len(self.path) < len(statuses):
+                self.status = statuses[len(self.path)]
+                self.status.reset(len(self.problem))
+            else:
+                self.status = ReportingCalculationStatus(statuses[-1], len(self.problem))
+                statuses.append(self.status)
         else:
             self.parent = None
             self.path = tuple()
             self.prefix = tuple()
-            self.status = ReportingCalculationStatus(None, len(self.problem), root_ctx=self)
+            if self.status_socket == progress.DISABLED:
+                self.status = NULL_STATUS
+            else:
+                self.status = ReportingCalculationStatus(None, len(self.problem), root_ctx=self)
+                self._statuses = [self.status]
 
 
     def step(self, root, score):
@@ -212,6 +333,98 @@ class BuilderStrategy(descr.WithDescription):
         return len(self.problem)
 
 
+    @property
+    def problem_mask(self):
+        """:return: the problem as a bitset; see :py:mod:`.bitset`."""
+        if self._problem_mask is None:
+            self._problem_mask = bitset.from_codes(self.problem)
+        return self._problem_mask
+
+    @problem_mask.setter
+    def problem_mask(self, mask):
+        self._problem_mask = mask
+
+
+    @property
+    def problem_key(self):
+        """:return: the problem as a sorted tuple of codes."""
+        if self._problem_key is None:
+            self._problem_key = tuple(sorted(self.problem))
+        return self._problem_key
+
+
+    @property
+    def failure_key(self):
+        """:return: the key of the strategy's problem in 
+          :py:attr:`.BuilderStrategy.failures`: the strategy's candidates and
+          their subproblems depend only on the key."""
+        return (self.problem_key, self.context_key)
+
+
+    @property
+    def context_key(self):
+        """State, other than the problem, that the choice of candidates depends on.
+
+        :return: a hashable value, part of the key of solved subproblems in 
+          :py:attr:`.TreeBuilder.transpositions`, so that a reused tree is the 
+          same as solving the problem again.  The base implementation returns
+          *None*: candidates depend on the problem only.
+        """
+        return None
+
+
+    def context_key_after(self, root):
+        """:param root: a candidate guess.
+        :return: the :py:attr:`.BuilderStrategy.context_key` of the 
+          subproblems under *root*, which is the same for all their scores.
+          The base implementation returns *None*.
+        """
+        return None
+
+
+    @property
+    def preserving(self):
+        """:return: the transformations preserving every code in the prefix;
+          see :py:meth:`.xforms.TransformLookupTable.preserving`."""
+        if self._preserving is None:
+            XFTBL = xforms.XF_LOOKUP_TABLE # must have been initialized.
+            if not self.parent:
+                self._preserving = XFTBL.ALL
+            else:
+                p0 = self.parent.preserving
+                if len(p0) == 1:
+                    self._preserving = p0
+                else:
+                    self._preserving = XFTBL.preserving((self.path[-1].root,), seed=p0)
+        return self._preserving
+
+
+    def partition(self, root):
+        """Partitions the problem by score against *root*.
+
+        :param root: numeric code.
+        :return: an instance of :py:class:`.partition.PartitionResult`; a
+          :py:class:`.partition.MaskPartitionResult` for problems larger than
+          :py:data:`.MASK_PARTITION_THRESHOLD`.
+        """
+        if self.problem_size > MASK_PARTITION_THRESHOLD:
+            return MaskPartitionResult(self.problem_mask, root)
+        return PartitionResult(self.problem, root)
+
+
+    def partition_sizes(self, root):
+        """Sizes-only partition of the problem by score against *root*; for
+        ranking candidates.
+
+        :param root: numeric code.
+        :return: an instance of :py:class:`.partition.PartitionSizes`, whose
+          full result is the same as :py:meth:`.BuilderStrategy.partition`.
+        """
+        if self.problem_size > MASK_PARTITION_THRESHOLD:
+            return PartitionSizes(self.problem, root, self.problem_mask)
+        return PartitionSizes(self.problem, root)
+
+
     @classmethod
     def preselected(clazz, problem, root):
         return (PartitionResult(problem, root),)
@@ -219,7 +432,9 @@ class BuilderStrategy(descr.WithDescription):
     def candidate_guesses(self):
         """Returns a selection of guesses suitable for solving the current problem.
 
-        :return: an iterable of :py:class:`.PartitionResult` instances.
+        :return: an iterable of :py:class:`.PartitionResult` or
+          :py:class:`.PartitionSizes` instances; the builder expands the
+          latter with their *result()* method when it explores them.
 
         If the attribute :py:attr:`.candidates`, then method returns its value.
         Otherwise, it delegates to the method :py:meth:`.BuilderStrategy.compute_candidates`.
@@ -251,7 +466,7 @@ class BuilderStrategy(descr.WithDescription):
         # members of the prefix are always excluded from subproblems, making
         # the choice below safe.
         c = random.choice(self.problem)
-        return (PartitionResult(self.problem, c), )
+        return (self.partition(c), )
 
 
     def solution_evaluator(self):
@@ -270,8 +485,15 @@ class BuilderStrategy(descr.WithDescription):
         true response does not imply the existence of a solution within the specified number of
         guesses.  However, a false result means that it's impossible split the current problem
         into subproblems of size 1 with the given budget of moves.
+
+        The result is also false when :py:attr:`.BuilderStrategy.failures` 
+        holds a failure of the problem with as many moves, or more.
         """
-        return remaining > 0 and self.problem_size <= size_limit(remaining)
+        if remaining <= 0 or self.problem_size > size_limit(remaining):
+            return False
+        if self.failures is not None and self.problem_size > 2:
+            return not self.failures.fails(self.failure_key, remaining)
+        return True
 
 
     @classmethod
@@ -279,21 +501,38 @@ class BuilderStrategy(descr.WithDescription):
         return descr.base_description(clazz)
 
     @classmethod
-    def build_tree(clazz, problem, maxdepth, root=None, progress=None):
-        return TreeBuilder(clazz, problem, progress).build(maxdepth, root=root)
+    def build_tree(clazz, problem, maxdepth, root=None, progress=None, workers=1,
+                   checkpoint=None, ordering=None, time_limit=None, greedy=None,
+                   on_improvement=None, deepen=False, parallel_depth=1):
+        builder = TreeBuilder(clazz, problem, progress)
+        builder.workers = workers
+        builder.parallel_depth = parallel_depth
+        builder.checkpoint = checkpoint
+        builder.ordering = ordering
+        builder.greedy_strategy = greedy
+        builder.on_improvement = on_improvement
+        if deepen:
+            return builder.build_deepening(maxdepth, root=root)
+        return builder.build(maxdepth, root=root, time_limit=time_limit)
 
 
 
 class TreeBuilder(descr.WithDescription):
     """Tree builder framework."""
 
-    def __init__(self, strategy, problem, progress):
+    def __init__(self, strategy, problem, progress, transposition_size=TRANSPOSITION_TABLE_SIZE,
+                 failure_size=FAILURE_CACHE_SIZE):
         """:param strategy: strategy class.
         :param problem: the master mind problem, a collection of codes in 
            numeric form.
         :type problem: list, or tuple.
         :param progress: destination of progress messages.  See 
-          :py:mod:`.progress` for details.
+          :py:mod:`.progress` for details; :py:data:`.progress.DISABLED`
+          disables progress reporting.
+        :param transposition_size: maximum number of entries in the 
+          transposition table; 0 disables it.
+        :param failure_size: maximum number of problems in the failure
+          cache; 0 disables it.
         """
 
         self.strategy = strategy
@@ -303,16 +542,214 @@ class TreeBuilder(descr.WithDescription):
         """Root problem."""
 
         self.entry_count = 0
-        """Number of times the recursive solver has been entered."""
+        """Number of times the solver has been entered."""
 
         self.reporting_cycle = 10000
         """Progress sampling cycle, once per 
-        :py:attr:`.TreeBuilder.reporting_cycle` entries into recursive 
+        :py:attr:`.TreeBuilder.reporting_cycle` entries into the
         solver."""
 
         self.progress = progress
         """Destination of progress messages."""
 
+        self.collapse_identical = True
+        """When true, candidates that split a problem into the same family of
+        sets as an earlier candidate are not solved again; see
+        :py:attr:`.partition.PartitionResult.parts_key`, and the same 
+        context, see :py:meth:`.BuilderStrategy.context_key_after`.  The
+        resulting trees are unchanged."""
+
+        self.collapsed = {}
+        """Number of collapsed candidates, by depth."""
+
+        self.branch_and_bound = True
+        """When true, the builder passes a total moves budget down to the
+        subproblems, derived from the best tree found so far and from the
+        parent's budget, and abandons candidates that cannot fit it.  Only
+        applies with evaluators that implement
+        :py:meth:`.SolutionEvaluator.move_limit`."""
+
+        self.cutoffs = {}
+        """Number of candidates abandoned for exceeding the moves budget, by depth."""
+
+        self.examined = 0
+        """Number of usable candidates considered by the solver."""
+
+        self.prunes = {}
+        """Number of candidates and subproblems rejected by the lower bounds of
+        :py:func:`.min_total_moves`, before any subtree was built, by depth."""
+
+        self.ordering = None
+        """Optional :py:class:`.ordering.CandidateOrdering`, applied to the
+        candidates of each problem before they are explored."""
+
+        self.searched = {}
+        """Number of problems whose candidates were explored, yielding a 
+        tree, by depth."""
+
+        self.best_ranks = {}
+        """Sum, over the problems counted in :py:attr:`.TreeBuilder.searched`,
+        of the position of the candidate of the best tree among the candidates 
+        explored, starting at 1, by depth."""
+
+        self.failures = cache.FailureCache(failure_size)
+        """Failure cache: problems found to have no solution within a 
+        number of remaining moves, which then fail with fewer moves too; 
+        see :py:meth:`.BuilderStrategy.possible`.  Failures to fit a moves 
+        budget are not recorded."""
+
+        self.transpositions = cache.LRUCache(transposition_size)
+        """Transposition table: solved subproblems, keyed by the problem, 
+        the number of remaining moves, and the strategy's
+        :py:attr:`.BuilderStrategy.context_key`.  The same subproblem is 
+        reached through different candidates and paths; its solution is 
+        reused instead of being solved again.  Least recently used entries
+        are evicted when the table is full.
+
+        A reused tree is the one the builder would build again, so the
+        table does not change the result."""
+
+        self.transposition_hits = 0
+        """Number of subproblems answered from the transposition table."""
+
+        self.transposition_misses = 0
+        """Number of subproblems looked up, and not answered from the 
+        transposition table."""
+
+        self.incumbent_hits = 0
+        """Number of subproblems searched with an initial solution: the
+        tree solving the problem in fewer moves, from the transposition table.
+        Its total moves bound the search; this is how iterative deepening, see
+        :py:meth:`.TreeBuilder.build_deepening`, reuses shallower trees."""
+
+        self.workers = 1
+        """Number of processes solving subproblems.  With more than one, the
+        subproblems at depth :py:attr:`.TreeBuilder.parallel_depth` are 
+        solved by a pool of worker processes, while this process explores
+        the levels above, merging the subtrees in the same order, and through
+        the same evaluators, as a serial build.  The subproblems of a 
+        candidate are queued as the search reaches it, with those of the
+        next few candidates, each with a moves budget no smaller than the
+        serial build's; the result is the same as the serial one.  The 
+        build's rusage includes the workers' CPU time."""
+
+        self.parallel_depth = 1
+        """Depth of the subproblems solved by worker processes.  At depth 1, 
+        these are the subproblems under each candidate for the first guess;
+        with a given first guess, at most 14 of them, of very unequal sizes.
+        At depth 2, the workers solve the many, smaller subproblems under 
+        each candidate for the second guess, at the cost of solving some 
+        that a serial build would abandon, and of searching the second 
+        guesses in this process."""
+
+        self.worker_usage = {}
+        """CPU time consumed by worker processes, by process id: dictionaries
+        of *utime*, *stime*, the number of subproblems solved, *units*, and
+        the sizes of the worker's tables, as the builder metrics
+        *transposition_entries*, *transposition_evictions*, *failure_entries*
+        and *failure_hits*.  The metrics of a parallel build add up the
+        tables of this process and of the workers."""
+
+        self.checkpoint = None
+        """Optional :py:class:`.checkpoint.Checkpoint`.  Subproblems up to its
+        depth are recorded in it as they are solved, and answered from it when
+        already solved; the builder saves it periodically, and when the build
+        completes.  A build given a checkpoint loaded from disk resumes the
+        interrupted build that saved it."""
+
+        self.greedy_strategy = None
+        """Strategy class building the initial tree of a build with a time 
+        limit; see :py:meth:`.TreeBuilder.build`.  When null, the build starts 
+        with the builder's strategy."""
+
+        self.on_improvement = None
+        """Optional function called with a :py:class:`.tree.TreeResult` for 
+        each tree found by a build with a time limit, better than the 
+        previous one."""
+
+        self.improvements = []
+        """Trees found by a build with a time limit: dictionaries of the 
+        elapsed clock time, *ctime*, and the tree's *total_moves* and 
+        *max_depth*."""
+
+        self.deadline_reached = False
+        """True when a build ran out of time."""
+
+        self._pool = None
+        self._units = None
+        self._frames = []
+        self._deadline = None
+
+
+    def _counters(self):
+        """:return: the builder counters accumulated while solving subproblems."""
+        return {
+            'entry_count': self.entry_count,
+            'examined': self.examined,
+            'transposition_hits': self.transposition_hits,
+            'transposition_misses': self.transposition_misses,
+            'incumbent_hits': self.incumbent_hits,
+            'collapsed': self.collapsed,
+            'cutoffs': self.cutoffs,
+            'prunes': self.prunes,
+            'searched': self.searched,
+            'best_ranks': self.best_ranks,
+            }
+
+
+    def _reset_counters(self):
+        for (name, value) in self._counters().iteritems():
+            setattr(self, name, {} if isinstance(value, dict) else 0)
+
+
+    def _merge_counters(self, counters):
+        """Adds counters from another builder, see :py:meth:`.TreeBuilder._counters`."""
+        for (name, value) in counters.iteritems():
+            if isinstance(value, dict):
+                mine = getattr(self, name)
+                for (k, v) in value.iteritems():
+                    mine[k] = mine.get(k, 0) + v
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+
+    def metrics(self):
+        """:return: a dictionary of builder counters, for
+          :py:attr:`.tree.TreeResult.metrics`."""
+        return {
+            'entry_count': self.entry_count,
+            'collapsed_candidates': dict(self.collapsed),
+            'budget_cutoffs': dict(self.cutoffs),
+            'candidates_examined': self.examined,
+            'lower_bound_prunes': dict(self.prunes),
+            'pruning_rate': float(sum(self.prunes.itervalues())) / max(1, self.examined),
+            'transposition_hits': self.transposition_hits,
+            'transposition_misses': self.transposition_misses,
+            'transposition_evictions': self._table_metric(
+                'transposition_evictions', self.transpositions.evictions),
+            'transposition_entries': self._table_metric(
+                'transposition_entries', len(self.transpositions)),
+            'incumbent_hits': self.incumbent_hits,
+            'failure_hits': self._table_metric('failure_hits', self.failures.hits),
+            'failure_entries': self._table_metric('failure_entries', len(self.failures)),
+            'ordering': self.ordering.description() if self.ordering else None,
+            'searched': dict(self.searched),
+            'mean_best_rank': dict((d, float(self.best_ranks[d]) / n)
+                                   for (d, n) in self.searched.iteritems()),
+            'improvements': list(self.improvements),
+            'deadline_reached': self.deadline_reached,
+            'workers': self.workers,
+            'worker_usage': dict((str(pid), dict(u)) for (pid, u) in self.worker_usage.iteritems()),
+            'checkpoint_reused': self.checkpoint.reused if self.checkpoint else 0,
+            'checkpoint_saves': self.checkpoint.saves if self.checkpoint else 0,
+            }
+
+    def _table_metric(self, name, value):
+        """:return: *value*, a metric of this process' tables, plus the 
+          same metric of the workers' tables, see 
+          :py:attr:`.TreeBuilder.worker_usage`."""
+        return value + sum(u.get(name, 0) for u in self.worker_usage.itervalues())
+
     def description_qualifiers(self):
         return {
             'strategy': self.strategy.description(),
@@ -320,98 +757,863 @@ class TreeBuilder(descr.WithDescription):
             }
 
 
-    def build(self, maxdepth, root=None):
+    def build(self, maxdepth, root=None, time_limit=None):
         """Build a tree.
 
         :param maxdepth: maximum game length.
         :param root: optional initial guess.
+        :param time_limit: optional number of seconds allowed for the build.
         :return: an instance of :py:class:`.tree.TreeResult` representating a strategy.
+
+        With a time limit, the builder first builds a tree with the 
+        :py:attr:`.TreeBuilder.greedy_strategy`, then refines it with its
+        strategy, see :py:meth:`.TreeBuilder._refine`, until the time runs
+        out.  It returns the best tree found, or *None* when the time runs
+        out during the greedy build.  Each tree that the strategy's evaluator
+        strictly prefers to the previous one is passed to
+        :py:attr:`.TreeBuilder.on_improvement`.  Given enough time, the tree
+        is as good as the tree built without a limit.
         """
+        if time_limit is not None and self.workers > 1:
+            raise MMException, "A build with a time limit runs in a single process."
+
+        if self.checkpoint:
+            self.checkpoint.bind((self.strategy.description(), tuple(self.root_problem),
+                                  maxdepth, root))
+
         candidates = None
         if root:
             candidates = self.strategy.preselected(self.root_problem, root)
 
         strategy = self.strategy(self.root_problem, None, candidates, status_socket=self.progress)
-        (u, t) = usage.time(lambda: self._solve(strategy, maxdepth))
+        strategy.failures = self.failures
+        if time_limit is not None:
+            (u, t) = usage.time(lambda: self._solve_anytime(strategy, maxdepth, root, time_limit))
+        elif self.workers > 1:
+            # the workers' CPU time is part of the build's.
+            (u, t) = usage.time(lambda: self._solve_parallel(strategy, maxdepth, root),
+                                children=True)
+        else:
+            (u, t) = usage.time(lambda: self._solve(strategy, maxdepth))
+        if self.checkpoint:
+            self.checkpoint.save()
         if t:
+            # the tree may be interned, and shared by later builds.
+            t = t.copy()
             t.stats.set_timing(u)
 
-        t = tree.TreeResult(t, maxdepth, self.strategy, u, root)
+        t = tree.TreeResult(t, maxdepth, self.strategy, u, root, metrics=self.metrics())
+        return t
+
+
+    def build_deepening(self, maxdepth, root=None):
+        """Builds a tree of the smallest depth possible, up to *maxdepth*:
+        builds trees of increasing depth until one succeeds.  Each build 
+        reuses the subproblems solved, and found unsolvable, by the shallower
+        builds, through the transposition table.
+
+        :param maxdepth: maximum game length.
+        :param root: optional initial guess.
+        :return: an instance of :py:class:`.tree.TreeResult`; its 
+          *max_levels* is the smallest depth of a tree, when it was found.
+          Its *minimal_depth* metric is that depth, or *None* when no depth
+          up to *maxdepth* succeeds.
+        :raise MMException: if *maxdepth* is less than 1, or the builder has
+          a checkpoint.
+        """
+        if maxdepth < 1:
+            raise MMException, "Invalid maximum depth: {}".format(maxdepth)
+        if self.checkpoint:
+            raise MMException, "A checkpoint applies to a single maximum depth."
+
+        candidates = None
+        if root:
+            candidates = self.strategy.preselected(self.root_problem, root)
+        probe = self.strategy(self.root_problem, None, candidates, status_socket=self.progress)
+        depth = 1
+        while depth < maxdepth and not probe.possible(depth):
+            depth += 1
+
+        passes = []
+        def deepen():
+            for d in xrange(depth, maxdepth + 1):
+                entries = self.entry_count
+                r = self.build(d, root)
+                passes.append({'max_depth': d,
+                               'feasible': r.tree is not None,
+                               'entry_count': self.entry_count - entries,
+                               'ctime': r.rusage.ctime})
+                if r.tree:
+                    return r
+            return r
+
+        (u, r) = usage.time(deepen)
+        metrics = self.metrics()
+        metrics['deepening'] = passes
+        metrics['minimal_depth'] = r.max_levels if r.tree else None
+        return tree.TreeResult(r.tree, r.max_levels, self.strategy, u, root, metrics=metrics)
+
+
+    def _solve_anytime(self, strategy, remaining, root, time_limit):
+        """Solves the root strategy within *time_limit* seconds; see
+        :py:meth:`.TreeBuilder.build`."""
+        timer = usage.Timer()
+        self._deadline = timeit.default_timer() + time_limit
+        best = spine = None
+        try:
+            if self.greedy_strategy:
+                greedy = TreeBuilder(self.greedy_strategy, self.root_problem, self.progress)
+                greedy._deadline = self._deadline
+                best = greedy.build(remaining, root).tree
+            if best:
+                self._improved(best, remaining, root, timer)
+                spine = [[best, strategy.partition(best.root), None]]
+                self._refine(strategy, spine, remaining, root, timer)
+            else:
+                best = self._solve(strategy, remaining)
+                if best:
+                    self._improved(best, remaining, root, timer)
+        except _DeadlineExceeded:
+            self.deadline_reached = True
+        finally:
+            self._deadline = None
+
+        # the spine holds the latest tree.
+        if spine:
+            best = spine[0][0]
+        return best
+
+
+    def _refine(self, strategy, spine, remaining, root, timer):
+        """Improves a tree, one subtree at a time: subtrees are solved by the 
+        builder's strategy, the deepest first.  A solution better than the 
+        subtree, according to the strategy's evaluator, replaces it; see
+        :py:meth:`.TreeBuilder._better`.
+
+        :param strategy: the strategy for the problem of the last subtree 
+          of *spine*.
+        :param spine: the path to a subtree, from the root: a list of 
+          *[subtree, pr, score]* entries, where *pr* partitions the subtree's 
+          problem by its root, and *score* leads to the subtree from its parent.
+          The subtrees are updated as they are replaced.
+        :param remaining: maximum number of moves in the subtree.
+        """
+        pr = spine[-1][1]
+        for score in _SCORE_LIST:
+            child = spine[-1][0].children[score]
+            if score == CODETABLE.PERFECT_SCORE or not child or child.stats.problem_size <= 2:
+                continue
+            substrategy = self._substrategy(strategy, pr, score)
+            spine.append([child, substrategy.partition(child.root), score])
+            self._refine(substrategy, spine, remaining - 1, root, timer)
+            spine.pop()
+
+        current = spine[-1][0]
+        evaluator = strategy.solution_evaluator()
+        state = evaluator.initial_state()
+        evaluator.evaluate(strategy, current, state)
+        t = self._solve(strategy, remaining, self._move_bound(evaluator, state, None))
+        if not t or t is current or not self._better(strategy, t, current):
+            return
+
+        # replace the subtree, and rebuild its ancestors.
+        previous = spine[0][0]
+        for i in xrange(len(spine) - 1, 0, -1):
+            spine[i][0] = t
+            (parent, ppr, _) = spine[i-1]
+            u = tree.Tree(parent.root)
+            for (score, child) in enumerate(parent.children):
+                u.add_child(score, child)
+            u.add_child(spine[i][2], t)
+            u.update_stats(ppr)
+            t = u
+        spine[0][0] = t
+        # a better subtree may leave the tree's stats unchanged.
+        if self._better(strategy, t, previous):
+            self._improved(t, len(spine) - 1 + remaining, root, timer)
+
+
+    def _better(self, strategy, t, u):
+        """:return: true when the strategy's evaluator prefers the tree *t*
+          to *u*, whichever of them it evaluates first; ties are not 
+          improvements."""
+        evaluator = strategy.solution_evaluator()
+        for pair in ((u, t), (t, u)):
+            state = evaluator.initial_state()
+            for v in pair:
+                evaluator.evaluate(strategy, v, state)
+            if evaluator.best(state) is not t:
+                return False
+        return True
+
+
+    def _improved(self, t, maxdepth, root, timer):
+        """Records a better tree found by a build with a time limit."""
+        u = timer.stop()
+        self.improvements.append({'ctime': u.ctime,
+                                  'total_moves': t.stats.total_moves,
+                                  'max_depth': t.stats.max_depth})
+        if self.on_improvement:
+            self.on_improvement(tree.TreeResult(t, maxdepth, self.strategy, u, root,
+                                                metrics=self.metrics()))
+
+
+    def _solve_parallel(self, strategy, remaining, root):
+        """Solves the root strategy with a pool of :py:attr:`.TreeBuilder.workers`
+        processes; see :py:meth:`.TreeBuilder._solve`."""
+        # forked workers share the tables loaded before the pool starts.
+        score.initialize()
+        xforms.initialize()
+
+        options = dict((a, getattr(self, a)) for a in _WORKER_OPTIONS)
+        options['transposition_size'] = self.transpositions.maxsize
+        options['failure_size'] = self.failures.maxsize
+        self._pool = multiprocessing.Pool(
+            self.workers, _init_worker,
+            (self.strategy, self.root_problem, root, self.progress, options))
+        self._units = {}
+        try:
+            return self._solve(strategy, remaining)
+        finally:
+            # subproblems that the build did not need are abandoned.
+            for (r, _) in self._units.itervalues():
+                if r.ready() and r.successful():
+                    self._merge_unit(r.get())
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._units = None
+
+
+    def _lookahead(self, frame, pr, bound):
+        """:return: the frame's candidate *pr*, followed by the next 
+          candidates within the moves bound *bound*, up to one per worker; 
+          their subproblems keep the workers busy while this process waits
+          for those of *pr*.  Later candidates are submitted as the search
+          reaches them, with the bound of the best tree found by then."""
+        window = [pr]
+        candidates = frame.candidates
+        i = frame.index
+        while len(window) < self.workers and i < len(candidates):
+            c = candidates[i]
+            i += 1
+            s = c.stats
+            if s.n < 2 or s.optimal:
+                continue
+            if bound is not None and partition_moves_bound(c.sizes, s.in_solution) > bound:
+                continue
+            window.append(c)
+        return window
+
+
+    def _submit_units(self, strategy, candidates, remaining, bound):
+        """Queues the subproblems of *candidates* to the worker processes, in 
+        the order the serial build would solve them.
+
+        Each subproblem is solved with the largest moves budget the serial
+        build could give it under the moves bound *bound*: its result 
+        answers the subproblem for any smaller budget; see 
+        :py:func:`._is_usable`.
+        """
+        seen = set() if self.collapse_identical else None
+        for pr in candidates:
+            if pr.stats.n < 2 or pr.stats.optimal:
+                continue
+            pr = pr.result()
+            if seen is not None:
+                key = _family_key(strategy, pr)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+            for score in _parts_by_size(pr):
+                prob = pr.parts[score]
+                if len(prob) <= 2 or score == CODETABLE.PERFECT_SCORE:
+                    continue
+                path = _path_key(strategy) + ((pr.root, score),)
+                if self.checkpoint and _is_exact(self.checkpoint.get(path)):
+                    continue
+                if path not in self._units:
+                    budget = None
+                    if bound is not None:
+                        budget = bound - partition_moves_bound(pr.sizes, pr.stats.in_solution) \
+                            + _MIN_TOTAL_MOVES[len(prob)]
+                    self._units[path] = (self._pool.apply_async(
+                        _solve_unit, (path, remaining - 1, budget)), budget)
+
+
+    def _merge_unit(self, result):
+        (t, counters, pid, utime, stime, tables) = result
+        self._merge_counters(counters)
+        u = self.worker_usage.setdefault(pid, {'utime': 0.0, 'stime': 0.0, 'units': 0})
+        u['utime'] += utime
+        u['stime'] += stime
+        u['units'] += 1
+        # the worker's tables persist across its subproblems.
+        u.update(tables)
         return t
 
 
-    def _solve(self, strategy, remaining):
+    def _substrategy(self, strategy, pr, score):
+        """:return: the strategy for the subproblem of *pr* at *score*."""
+        substrategy = self.strategy(pr.parts[score], strategy.step(pr.root, score))
+        if isinstance(pr, MaskPartitionResult):
+            substrategy.problem_mask = pr.part_masks[score]
+        return substrategy
+
+
+    def _move_bound(self, evaluator, state, budget):
+        if not self.branch_and_bound:
+            return None
+        limit = evaluator.move_limit(state)
+        if limit is None:
+            return budget
+        if budget is None:
+            return limit
+        return min(limit, budget)
+
+
+    def _solve(self, strategy, remaining, budget=None):
+        """Solves the strategy's problem.
+
+        The solver keeps the state of each open subproblem in a
+        :py:class:`._Frame` of an explicit stack, rather than recursing; see
+        :py:meth:`.TreeBuilder.search_state`.
+
+        :param strategy: an instance of the builder's strategy class.
+        :param remaining: maximum number of moves in any game.
+        :param budget: optional upper bound on the total moves of a useful tree;
+          candidates known to exceed it are abandoned.
+        :return: a tree, or *None*.  The tree may exceed the budget.
+        """
+        (t, memo) = self._open(strategy, remaining, budget)
+        if memo is None:
+            return t
+
+        frames = self._frames
+        if len(frames) <= remaining:
+            frames.extend(_Frame() for _ in xrange(remaining + 1 - len(frames)))
+
+        level = 0
+        frame = frames[0]
+        frame.open(strategy, remaining, memo.budget, memo)
+        result = _START
+        try:
+            while True:
+                result = self._step(frame, result)
+                if result is _CALL:
+                    # solve the subproblem set up in the frame.
+                    (result, memo) = self._open(frame.substrategy, frame.remaining - 1,
+                                                frame.child_budget)
+                    if memo is not None:
+                        level += 1
+                        if level == len(frames):
+                            frames.append(_Frame())
+                        child = frames[level]
+                        child.open(frame.substrategy, frame.remaining - 1, memo.budget, memo)
+                        frame = child
+                        result = _START
+                    continue
+
+                result = self._close(frame.memo, result)
+                frame.close()
+                if level == 0:
+                    return result
+                level -= 1
+                frame = frames[level]
+        except:
+            # the search is abandoned.
+            for f in frames[:level+1]:
+                f.close()
+            raise
+
+
+    def _open(self, strategy, remaining, budget):
+        """Answers the strategy's problem without exploring its candidates, 
+        when possible.
+
+        :return: a pair *(t, memo)*.  When *memo* is null, *t* is the answer;
+          otherwise, the problem must be searched with the budget *memo.budget*,
+          and its result passed to :py:meth:`.TreeBuilder._close` with *memo*.
+        """
         self.entry_count += 1
         if self.entry_count % self.reporting_cycle == 0:
             strategy.status.report(self.entry_count)
 
+        if self._deadline is not None and timeit.default_timer() > self._deadline:
+            raise _DeadlineExceeded
+
         if not strategy.possible(remaining):
-            return None
+            return (None, None)
 
         n = strategy.problem_size
+        if budget is not None and _MIN_TOTAL_MOVES[n] > budget:
+            self.prunes[strategy.depth] = self.prunes.get(strategy.depth, 0) + 1
+            return (None, None)
+
         if n == 1:
-            return tree.one_element_tree(strategy.problem[0])
+            return (tree.one_element_tree(strategy.problem[0]), None)
         if n == 2:
-            return tree.two_element_tree(strategy.problem)
+            return (tree.two_element_tree(strategy.problem), None)
+
+        path = None
+        if self.checkpoint and strategy.depth <= self.checkpoint.depth:
+            path = _path_key(strategy)
+            entry = self.checkpoint.get(path)
+            if entry is not None and _is_usable(entry, budget):
+                self.checkpoint.reused += 1
+                return (entry[0], None)
+
+        if self._units is not None and strategy.depth == self.parallel_depth:
+            unit = self._units.pop(_path_key(strategy), None)
+            if unit is not None:
+                t = self._merge_unit(unit[0].get())
+                if _is_usable(_entry(t, unit[1]), budget):
+                    self._close(_Memo(strategy, remaining, path, None, budget, None), t)
+                    return (t, None)
+
+        # Transposition table entries are (tree, floor) pairs; see _entry.
+        key = None
+        if self.transpositions.maxsize > 0 and not strategy.candidates:
+            key = (strategy.problem_key, remaining, strategy.context_key)
+            entry = self.transpositions.get(key)
+            if entry is not None and _is_usable(entry, budget):
+                self.transposition_hits += 1
+                self._close(_Memo(strategy, remaining, path, None, budget, None), entry[0])
+                return (entry[0], None)
+            self.transposition_misses += 1
+
+            # A tree solving the problem in fewer moves is a solution; its 
+            # total moves bound the search.
+            incumbent = None
+            if self.branch_and_bound:
+                entry = self.transpositions.get((strategy.problem_key, remaining - 1,
+                                                 strategy.context_key))
+                if entry is not None and entry[0] and entry[1] is None:
+                    incumbent = self._incumbent(strategy, entry, budget)
+            if incumbent:
+                self.incumbent_hits += 1
+                return (None, _Memo(strategy, remaining, path, key,
+                                    incumbent[1], incumbent[0]))
+
+        return (None, _Memo(strategy, remaining, path, key, budget, None))
+
+
+    def _incumbent(self, strategy, entry, budget):
+        """:return: a pair *(t, budget)*: the tree of a transposition table 
+          *entry*, and the moves budget it sets; or *None* when the 
+          strategy's evaluator does not rank trees by total moves."""
+        t = entry[0]
+        evaluator = strategy.solution_evaluator()
+        state = evaluator.initial_state()
+        evaluator.evaluate(strategy, t, state)
+        limit = evaluator.move_limit(state)
+        if limit is None:
+            return None
+        return (t, limit if budget is None else min(limit, budget))
+
 
+    def _close(self, memo, t):
+        """Records the result *t* of searching a problem in the transposition 
+        table, the checkpoint and the failure cache, as directed by *memo*; 
+        see :py:meth:`.TreeBuilder._open`.
+
+        :return: the problem's solution: *t*, or *memo.incumbent* when the 
+          search did not improve on it.
+        """
+        incumbent = memo.incumbent
+        if incumbent and (not t or t.stats.total_moves > incumbent.stats.total_moves):
+            t = incumbent
+        if memo.key is not None:
+            self.transpositions.put(memo.key, _entry(t, memo.budget))
+        if memo.path is not None:
+            self.checkpoint.leave(memo.path, _entry(t, memo.budget))
+        if t is None and memo.budget is None:
+            strategy = memo.strategy
+            # preselected candidates may miss the problem's solutions.
+            if strategy.failures is not None and not strategy.candidates:
+                strategy.failures.record(strategy.failure_key, memo.remaining)
+        return t
+
+
+    def _candidates(self, strategy):
+        """:return: the strategy's candidate guesses, in the order of 
+          :py:attr:`.TreeBuilder.ordering`."""
         candidates = strategy.candidate_guesses()
-        if not candidates:
-            return None
+        if self.ordering and candidates:
+            candidates = self.ordering.order(strategy, candidates)
+        return candidates
 
-        strategy.status.candidate_count = len(candidates)
 
-        evaluator = strategy.solution_evaluator()
-        state = evaluator.initial_state()
+    def _best(self, strategy, evaluator, state, found):
+        """:return: the best tree found for the strategy's problem.
 
-        for pr in candidates:
+        :param found: the position of the best tree's candidate.
+        """
+        t = evaluator.best(state)
+        if t and found is not None:
+            depth = strategy.depth
+            self.searched[depth] = self.searched.get(depth, 0) + 1
+            self.best_ranks[depth] = self.best_ranks.get(depth, 0) + found
+        return t
+
+
+    def _step(self, frame, child):
+        """Advances the search of a frame's problem, until it needs a 
+        subproblem solved, or it is solved.
+
+        :param frame: an open :py:class:`._Frame`.
+        :param child: the solution to the subproblem the frame last asked for;
+          :py:data:`._START` for a new frame.
+        :return: :py:data:`._CALL`, when the subproblem set up in the frame
+          needs solving; the frame's result otherwise.
+        """
+        strategy = frame.strategy
+        if child is _START:
+            candidates = self._candidates(strategy)
+            if not candidates:
+                return None
+
+            strategy.status.candidate_count = len(candidates)
+
+            frame.candidates = candidates
+            frame.evaluator = strategy.solution_evaluator()
+            frame.state = frame.evaluator.initial_state()
+            # Candidates splitting the problem into the same sets, in the 
+            # same context, have the same subproblems, and cannot improve on
+            # the first one.
+            frame.seen = set() if self.collapse_identical else None
+            frame.found = None
+        elif child:
+            frame.subtrees[frame.score] = child
+            frame.committed += child.stats.total_moves - _MIN_TOTAL_MOVES[frame.size]
+        else:
+            frame.failed = True
+
+        evaluator = frame.evaluator
+        state = frame.state
+        while True:
+            pr = frame.pr
+            if pr is not None:
+                if not frame.failed and self._next_part(frame):
+                    return _CALL
+
+                frame.pr = None
+                if not frame.failed:
+                    subtrees = frame.subtrees
+                    t = tree.Tree(pr.root)
+                    for score in _SCORE_LIST:
+                        t.add_child(score, subtrees[score])
+                    t.update_stats(pr)
+
+                    done = evaluator.evaluate(strategy, t, state)
+                    if evaluator.best(state) is t:
+                        frame.found = frame.index
+                    if done:
+                        return self._best(strategy, evaluator, state, frame.found)
+
+            if frame.index == len(frame.candidates):
+                return self._best(strategy, evaluator, state, frame.found)
+
+            pr = frame.candidates[frame.index]
+            frame.index += 1
             strategy.status.next_candidate(pr)
 
             s = pr.stats
             if s.n < 2: # not a usable guess.
                 continue
 
+            self.examined += 1
+            bound = self._move_bound(evaluator, state, frame.budget)
+            if bound is not None and not s.optimal and \
+                    partition_moves_bound(pr.sizes, s.in_solution) > bound:
+                self.prunes[strategy.depth] = self.prunes.get(strategy.depth, 0) + 1
+                continue
+
+            pr = pr.result()
 
-            t = None
             if pr.stats.optimal:
                 t = tree.optimal_tree(pr)
-                if evaluator.evaluate(strategy, t, state):
-                    return evaluator.best(state)
-            else:
-                subtrees = [None] * CODETABLE.NSCORES
+                done = evaluator.evaluate(strategy, t, state)
+                if evaluator.best(state) is t:
+                    frame.found = frame.index
+                if done:
+                    return self._best(strategy, evaluator, state, frame.found)
+                continue
+
+            seen = frame.seen
+            if seen is not None:
+                key = _family_key(strategy, pr)
+                if key in seen:
+                    self.collapsed[strategy.depth] = self.collapsed.get(strategy.depth, 0) + 1
+                    continue
+                seen.add(key)
+
+            if self._units is not None and strategy.depth == self.parallel_depth - 1:
+                self._submit_units(strategy, self._lookahead(frame, pr, bound),
+                                   frame.remaining, bound)
+
+            frame.pr = pr
+            frame.bound = bound
+            frame.failed = False
+            frame.subtrees[:] = _NO_SUBTREES
+            # Total moves of the tree: one for the root when it's in the
+            # problem, plus size + total moves of each subtree.  Unsolved
+            # parts are counted at their lower bound.
+            frame.committed = partition_moves_bound(pr.sizes, s.in_solution)
+            # Proceed thru parts in descending size.  Larger partitions are
+            # more likely to fail under a depth constraint than smaller ones.
+            # The frame's list is sorted in place; ties stay in score order.
+            scores = frame.scores
+            scores[:] = _SCORE_LIST
+            scores.sort(key=pr.sizes.__getitem__, reverse=True)
+            frame.pos = 0
+
+
+    def _next_part(self, frame):
+        """Sets up the next subproblem of the frame's current candidate.  
+        Subproblems of one or two codes are answered in place, see 
+        :py:meth:`.TreeBuilder._solve_small`.
+
+        :return: true when a subproblem needs solving; false when the candidate
+          has no more parts, or it exceeds the moves budget.
+        """
+        strategy = frame.strategy
+        pr = frame.pr
+        scores = frame.scores
+        while frame.pos < len(scores):
+            score = scores[frame.pos]
+            frame.pos += 1
+            prob = pr.parts[score]
+            if not prob: # we hit the zeros, exit loop.
+                return False
+
+            # count a non-empty child
+            strategy.status.cur_child += 1
+
+            if score == CODETABLE.PERFECT_SCORE:
+                continue
+
+            size = len(prob)
+            child_budget = None
+            if frame.bound is not None:
+                lb = _MIN_TOTAL_MOVES[size]
+                child_budget = frame.bound - frame.committed + lb
+                if child_budget < lb:
+                    self.cutoffs[strategy.depth] = self.cutoffs.get(strategy.depth, 0) + 1
+                    frame.failed = True
+                    return False
+
+            if size <= 2:
+                t = self._solve_small(strategy, prob, frame.remaining - 1)
+                if not t:
+                    frame.failed = True
+                    return False
+                frame.subtrees[score] = t
+                frame.committed += t.stats.total_moves - _MIN_TOTAL_MOVES[size]
+                continue
+
+            frame.score = score
+            frame.size = size
+            frame.child_budget = child_budget
+            frame.substrategy = self._substrategy(strategy, pr, score)
+            return True
+        return False
+
+
+    def _solve_small(self, strategy, problem, remaining):
+        """Solves a subproblem of one or two codes of the strategy's problem,
+        as :py:meth:`.TreeBuilder._open` would, without a strategy for it: 
+        these are most of the subproblems, and need no search.
 
-                # Proceed thru parts in descending size.  Larger partitions
-                # are more likely to fail under a depth constraint than smaller
-                # ones.
-                for score in sorted(_SCORE_LIST, lambda a, b: cmp(len(pr.parts[b]), 
-                                                                  len(pr.parts[a]))):
-                    prob = pr.parts[score]
-                    if not prob: # we hit the zeros, exit loop.
-                        break
+        :return: a tree, or *None* when *remaining* moves do not suffice.
+        """
+        self.entry_count += 1
+        if self.entry_count % self.reporting_cycle == 0:
+            strategy.status.report(self.entry_count)
+
+        if self._deadline is not None and timeit.default_timer() > self._deadline:
+            raise _DeadlineExceeded
 
-                    # count a non-empty child
-                    strategy.status.cur_child += 1
+        if remaining <= 0 or len(problem) > size_limit(remaining):
+            return None
+        if len(problem) == 1:
+            return tree.one_element_tree(problem[0])
+        return tree.two_element_tree(problem)
 
-                    if score == CODETABLE.PERFECT_SCORE:
-                        continue
 
-                    child = self._solve(self.strategy(prob, strategy.step(pr.root, score)),
-                                        remaining - 1)
-                    if not child:
-                        subtrees = None
-                        break
+    def search_state(self):
+        """:return: the state of the solver: a list of dictionaries
+          describing the open subproblems, outermost first; empty when the
+          builder is not solving."""
+        return [f.as_dict() for f in itertools.takewhile(lambda f: f.strategy is not None, self._frames)]
 
-                    subtrees[score] = child
 
-                if not subtrees: # failed building subtrees.
-                    continue # to next candidate
+_Memo = namedtuple('_Memo', ['strategy', 'remaining', 'path', 'key', 'budget', 'incumbent'])
+"""Bookkeeping for a problem searched by the solver, from 
+:py:meth:`.TreeBuilder._open` to :py:meth:`.TreeBuilder._close`: the 
+*strategy* and *remaining* moves of the search, the problem's checkpoint
+*path* and transposition table *key*, the moves *budget* of the
+search, and the *incumbent* solution it must improve on."""
 
-                t = tree.Tree(pr.root)
-                for score in _SCORE_LIST:
-                    t.add_child(score, subtrees[score])
-                t.update_stats(pr)
 
-                if evaluator.evaluate(strategy, t, state):
-                    return evaluator.best(state)
+class _DeadlineExceeded(Exception):
+    """Raised by the solver when a build runs out of time."""
+    pass
 
-        result = evaluator.best(state)
-        return result
+
+_START = object()
+"""Marks a new frame in :py:meth:`.TreeBuilder._step`."""
+
+_CALL = object()
+"""Returned by :py:meth:`.TreeBuilder._step` for a frame waiting on a subproblem."""
+
+_NO_SUBTREES = [None] * CODETABLE.NSCORES
+
+
+class _Frame(object):
+    """Solver state for one open subproblem: its candidates, the best tree so
+    far, and the parts of the candidate being solved; see
+    :py:meth:`.TreeBuilder._step`.  Frames are allocated once per depth, and
+    reused."""
+
+    __slots__ = ('strategy', 'remaining', 'budget', 'memo',
+                 'candidates', 'index', 'evaluator', 'state', 'seen', 'found',
+                 'pr', 'bound', 'failed', 'subtrees', 'committed', 'scores', 'pos',
+                 'score', 'size', 'child_budget', 'substrategy')
+
+    def __init__(self):
+        self.subtrees = [None] * CODETABLE.NSCORES
+        self.scores = list(_SCORE_LIST)
+        self.close()
+
+    def open(self, strategy, remaining, budget, memo):
+        self.strategy = strategy
+        self.remaining = remaining
+        self.budget = budget
+        self.memo = memo
+        self.index = 0
+
+    def close(self):
+        """Drops the references to the frame's subproblem."""
+        self.strategy = self.memo = self.candidates = None
+        self.evaluator = self.state = self.seen = None
+        self.pr = self.substrategy = None
+        self.score = self.size = self.child_budget = None
+        self.subtrees[:] = _NO_SUBTREES
+
+    def as_dict(self):
+        """:return: a description of the frame, for 
+          :py:meth:`.TreeBuilder.search_state`."""
+        return {
+            'path': [list(p) for p in _path_key(self.strategy)],
+            'remaining': self.remaining,
+            'budget': self.budget,
+            'candidate_count': len(self.candidates) if self.candidates else 0,
+            'candidate_index': self.index,
+            'guess': self.pr.root if self.pr else None,
+            'score': self.score,
+            }
+
+
+_WORKER_OPTIONS = ('reporting_cycle', 'collapse_identical', 'branch_and_bound', 'ordering')
+"""Builder attributes copied to the worker processes' builders."""
+
+_WORKER = None
+"""Worker process state: the builder, the root strategy, and a dictionary
+holding the strategy of the last subproblem's parent, by its path."""
+
+def _family_key(strategy, pr):
+    """:return: the key of a candidate *pr* of the strategy, equal for
+      candidates with the same subproblems; see 
+      :py:attr:`.TreeBuilder.collapse_identical`."""
+    return (pr.parts_key, strategy.context_key_after(pr.root))
+
+
+def _path_key(strategy):
+    """:return: the strategy's path, as a tuple of *(root, score)* pairs."""
+    return tuple((st.root, st.score) for st in strategy.path)
+
+
+def _entry(t, budget):
+    """:return: a *(tree, floor)* pair recording the result *t* of solving
+      a problem with the moves budget *budget*.  A null *floor* marks the best
+      tree for the problem.  Otherwise, the solver failed to fit the budget 
+      *floor*: no tree has that many moves or fewer.
+    """
+    # A tree within budget is the best tree: the bounds never reject a
+    # candidate that fits the budget.
+    if budget is None or (t and t.stats.total_moves <= budget):
+        return (t, None)
+    return (None, budget)
+
+
+def _is_exact(entry):
+    """:return: true when *entry*, see :py:func:`._entry`, holds the best tree."""
+    return entry is not None and entry[1] is None
+
+
+def _is_usable(entry, budget):
+    """:return: true when *entry*, see :py:func:`._entry`, answers a problem
+      solved with the moves budget *budget*."""
+    floor = entry[1]
+    return floor is None or (budget is not None and budget <= floor)
+
+
+def _init_worker(strategy, problem, root, progress, options):
+    """Process pool initializer, see :py:meth:`.TreeBuilder._solve_parallel`."""
+    global _WORKER
+
+    score.initialize()
+    xforms.initialize()
+
+    builder = TreeBuilder(strategy, problem, progress, options.pop('transposition_size'),
+                          options.pop('failure_size'))
+    for (name, value) in options.iteritems():
+        setattr(builder, name, value)
+
+    candidates = None
+    if root:
+        candidates = strategy.preselected(problem, root)
+    root_strategy = strategy(problem, None, candidates, status_socket=progress)
+    root_strategy.failures = builder.failures
+    _WORKER = (builder, root_strategy, {})
+
+
+def _solve_unit(path, remaining, budget):
+    """Solves a subproblem in a worker process.
+
+    :param path: a sequence of *(root, score)* pairs from the root problem.
+    :param remaining: maximum number of moves.
+    :param budget: the moves budget, see :py:meth:`.TreeBuilder._solve`.
+    :return: a tuple of the tree, the builder counters, the process id, 
+      the user and system time spent, and a dictionary of the sizes of the
+      worker's tables; see :py:attr:`.TreeBuilder.worker_usage`.
+    """
+    (builder, strategy, parents) = _WORKER
+    start = resource.getrusage(resource.RUSAGE_SELF)
+
+    # subproblems arrive in the serial build's order: consecutive ones 
+    # share their parent, whose strategy is costly to set up.
+    parent = parents.get(path[:-1])
+    if parent is None:
+        parent = strategy
+        for (code, score) in path[:-1]:
+            parent = builder._substrategy(parent, parent.partition(code), score)
+        parents.clear()
+        parents[path[:-1]] = parent
+    (code, score) = path[-1]
+    strategy = builder._substrategy(parent, parent.partition(code), score)
+
+    builder._reset_counters()
+    t = builder._solve(strategy, remaining, budget)
+
+    end = resource.getrusage(resource.RUSAGE_SELF)
+    tables = {
+        'transposition_entries': len(builder.transpositions),
+        'transposition_evictions': builder.transpositions.evictions,
+        'failure_entries': len(builder.failures),
+        'failure_hits': builder.failures.hits,
+        }
+    return (t, builder._counters(), os.getpid(),
+            end.ru_utime - start.ru_utime, end.ru_stime - start.ru_stime, tables)
@@ -0,0 +1,118 @@
+# -*- python -*-
+"""Bounded caches for memoizing solver results."""
+
+import collections
+
+class LRUCache(object):
+    """A mapping with a bounded number of entries; when full, storing a new
+    entry evicts the least recently used one."""
+
+    def __init__(self, maxsize):
+        """:param maxsize: maximum number of entries; a non-positive value
+          disables the cache, so that nothing is stored.
+        """
+        self.maxsize = maxsize
+        """Maximum number of entries."""
+
+        self.evictions = 0
+        """Number of entries dropped to make room for new ones."""
+
+        self._data = collections.OrderedDict()
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+    def get(self, key, default=None):
+        """Looks up an entry, and marks it as most recently used.
+
+        :param key: entry key.
+        :param default: value returned when the key is not in the cache.
+        :return: the value associated with *key*, or *default*.
+        """
+        data = self._data
+        if key not in data:
+            return default
+        value = data.pop(key)
+        data[key] = value
+        return value
+
+
+    def put(self, key, value):
+        """Stores an entry, evicting the least recently used entry when full.
+
+        :param key: entry key.
+        :param value: entry value.
+        """
+        if self.maxsize <= 0:
+            return
+        data = self._data
+        if key in data:
+            del data[key]
+        elif len(data) >= self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+        data[key] = value
+
+
+    def clear(self):
+        """Removes all entries."""
+        self._data.clear()
+
+
+class FailureCache(object):
+    """Problems known to have no solution within a number of moves.  A
+    problem with no solution in *k* moves has none in fewer moves either, so
+    a single entry per problem, the largest such *k*, answers for all."""
+
+    def __init__(self, maxsize):
+        """:param maxsize: maximum number of problems; see :py:class:`.LRUCache`."""
+        self._data = LRUCache(maxsize)
+
+        self.hits = 0
+        """Number of failures answered from the cache."""
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    @property
+    def maxsize(self):
+        """Maximum number of problems."""
+        return self._data.maxsize
+
+
+    @property
+    def evictions(self):
+        """Number of problems evicted to make room for newer ones."""
+        return self._data.evictions
+
+
+    def fails(self, key, remaining):
+        """:param key: problem key.
+        :param remaining: number of moves.
+        :return: true when the problem is known to have no solution within
+          *remaining* moves.
+        """
+        k = self._data.get(key)
+        if k is not None and remaining <= k:
+            self.hits += 1
+            return True
+        return False
+
+
+    def record(self, key, remaining):
+        """Records that a problem has no solution within *remaining* moves.
+
+        :param key: problem key.
+        :param remaining: number of moves.
+        """
+        k = self._data.get(key)
+        if k is None or remaining > k:
+            self._data.put(key, remaining)
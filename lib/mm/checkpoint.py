@@ -0,0 +1,142 @@
+# -*- python -*-
+"""Checkpoints of tree builds.
+
+A checkpoint holds the subproblems solved by a :py:class:`.builder.TreeBuilder`,
+keyed by their :py:attr:`.builder.BuilderStrategy.path`.  The builder saves it
+to disk periodically; a build resumed from the saved checkpoint searches in the
+same order, and reuses the solved subproblems instead of solving them again.
+"""
+
+from . import *
+
+import cPickle as pickle
+import os
+import timeit
+
+VERSION = 2
+"""Version of the checkpoint file format."""
+
+DEFAULT_INTERVAL = 600
+"""Default number of seconds between saves."""
+
+DEFAULT_DEPTH = 2
+"""Default depth of the deepest subproblems recorded in a checkpoint."""
+
+
+class Checkpoint(object):
+    """Solved subproblems of a tree build, and their on-disk copy.
+
+    Entries are *(tree, floor)* pairs: a null *floor* marks the best tree for
+    the subproblem; otherwise, the builder failed to fit the moves budget
+    *floor*, see :py:attr:`.builder.TreeBuilder.transpositions`.
+    """
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL, depth=DEFAULT_DEPTH):
+        """:param path: checkpoint file path.
+        :param interval: minimum number of seconds between saves; 0 saves
+          when the build completes only.
+        :param depth: depth of the deepest subproblems recorded.
+        """
+
+        self.path = path
+        """Checkpoint file path."""
+
+        self.interval = interval
+        """Minimum number of seconds between saves; 0 disables periodic saves."""
+
+        self.depth = depth
+        """Subproblems up to this depth are recorded; the root is at depth 0."""
+
+        self.signature = None
+        """Identifies the build the checkpoint belongs to."""
+
+        self.solved = {}
+        """Solved subproblems, by path; a path is a tuple of *(root, score)* pairs."""
+
+        self.reused = 0
+        """Number of subproblems answered from the checkpoint."""
+
+        self.saves = 0
+        """Number of times the checkpoint was saved."""
+
+        self._last_save = timeit.default_timer()
+
+
+    def bind(self, signature):
+        """Associates the checkpoint with a build, and removes the temporary
+        file left by an interrupted save, see :py:meth:`.Checkpoint.save`.
+
+        :param signature: a value identifying the build.
+        :raise MMException: if the checkpoint holds subproblems of a different build.
+        """
+        if self.solved and self.signature != signature:
+            raise MMException, \
+                "Checkpoint {} belongs to a different build.".format(self.path)
+        self.signature = signature
+
+        tmp = self._tmp_path()
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+    def load(self):
+        """Reads the checkpoint file.
+
+        :return: true when the file was read; false when it does not exist.
+        :raise MMException: if the file is not a checkpoint of this version.
+        """
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, 'rb') as inp:
+            try:
+                version = pickle.load(inp)
+                data = pickle.load(inp) if version == VERSION else None
+            except (pickle.UnpicklingError, AttributeError, EOFError,
+                    ImportError, IndexError, ValueError):
+                data = None
+
+        if data is None:
+            raise MMException, "Unreadable checkpoint file: {}".format(self.path)
+
+        self.signature = data['signature']
+        self.solved = data['solved']
+        return True
+
+
+    def save(self):
+        """Writes the checkpoint file.  The file is replaced atomically, so that
+        an interruption leaves the previous copy intact."""
+        tmp = self._tmp_path()
+        with open(tmp, 'wb') as out:
+            pickle.dump(VERSION, out, pickle.HIGHEST_PROTOCOL)
+            pickle.dump({'signature': self.signature,
+                         'solved': self.solved},
+                        out, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, self.path)
+
+        self.saves += 1
+        self._last_save = timeit.default_timer()
+
+
+    def _tmp_path(self):
+        return self.path + '.tmp'
+
+
+    def get(self, path):
+        """:param path: subproblem path.
+        :return: the subproblem's entry, or *None*.
+        """
+        return self.solved.get(path)
+
+
+    def leave(self, path, entry):
+        """Records a solved subproblem, and saves the checkpoint when the save
+        interval has elapsed, unless periodic saves are disabled.
+
+        :param path: subproblem path.
+        :param entry: the subproblem's entry.
+        """
+        self.solved[path] = entry
+        if self.interval and timeit.default_timer() - self._last_save >= self.interval:
+            self.save()
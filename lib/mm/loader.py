@@ -1,9 +1,13 @@
-"""Utilities to load and store pickled data."""
+"""Utilities to load and store pickled data, and memory-mapped tables."""
 
+import array
 import collections
 import cPickle as pickle
+import ctypes
+import mmap
 import os
 import os.path
+import struct
 import sys
 import traceback
 
@@ -13,6 +17,9 @@ class StorageSpec(_StorageSpecBase):
     """A specifiction of storage location, consisting of a path prefix, and 
     a version."""
 
+    EXTENSION = 'pickle'
+    """File name extension of the storage path."""
+
     def __new__(cls, version, path_prefix):
         """Constructs an instsance.
 
@@ -20,9 +27,9 @@ class StorageSpec(_StorageSpecBase):
         :param version: version of the schema associated with the data.
         :param path_prefix: path_prefix of the storage path.
         :return: an instance of L{StorageSpec}, with the path set to 
-          *path_prefix*``.v``*version*``.pickle``
+          *path_prefix*``.v``*version*``.``*EXTENSION*
         """
-        path = '{}.v{}.pickle'.format(path_prefix, version)
+        path = '{}.v{}.{}'.format(path_prefix, version, cls.EXTENSION)
         """Path to the file used for storing/loading data."""
 
         return _StorageSpecBase.__new__(cls, version, path)
@@ -31,15 +38,26 @@ class StorageSpec(_StorageSpecBase):
         """:return: printable reprsentation of the object."""
         return super(StorageSpec, self).__repr__().replace(
             _StorageSpecBase.__name__,
-            StorageSpec.__name__,
+            self.__class__.__name__,
             1)
 
+
+class MappedStorageSpec(StorageSpec):
+    """A storage specification for tables in the binary format read by
+    :py:class:`.MappedLoader`; the path is *path_prefix*``.v``*version*``.bin``"""
+
+    EXTENSION = 'bin'
+
 class Loader(object):
     """Data loader.  Associates the method of construction the data with
     a storage path.  Unpickling the file is expected to yield the result
     faster than calling the data constructor.  In case the file loading
     fails, the data is constructed by computation."""
 
+    READ_ERRORS = (pickle.UnpicklingError, AttributeError,
+                   EOFError, ImportError, IndexError)
+    """Errors indicating a corrupt or incompatible file."""
+
     def __init__(self, make, pathspec):
         """:param make: creates the data computationally with the expression ``make()``.
         :param pathspec: path specification to pre-stored result.
@@ -71,11 +89,10 @@ class Loader(object):
             try:
                 with open(self.path, 'rb') as inp:
                     try:
-                        version = pickle.load(inp)
-                        if version == self.version:
-                            return pickle.load(inp)
-                    except (pickle.UnpicklingError, AttributeError, 
-                            EOFError, ImportError, IndexError):
+                        value = self._read(inp)
+                        if value is not None:
+                            return value
+                    except self.READ_ERRORS:
                         pass
                     except: # unfortunately, corrupt files raise all sorts of error.
                         print >>sys.stderr, "Error loading data: " + traceback.format_exc()
@@ -86,6 +103,18 @@ class Loader(object):
         return None
 
 
+    def _read(self, inp):
+        version = pickle.load(inp)
+        if version == self.version:
+            return pickle.load(inp)
+        return None
+
+
+    def _write(self, out, value):
+        pickle.dump(self.version, out)
+        pickle.dump(value, out)
+
+
     def make(self):
         """Calculate an instance of the associated data.
 
@@ -120,8 +149,7 @@ class Loader(object):
 
         with open(self.path, 'wb+') as out:
             import stat
-            pickle.dump(self.version, out)
-            pickle.dump(value, out)
+            self._write(out, value)
         os.chmod(self.path, stat.S_IRUSR|stat.S_IRGRP|stat.S_IROTH)
         return value
 
@@ -134,3 +162,120 @@ class Loader(object):
         calculated and stored before returning.
         """
         return self.load() or self.store(self.make())
+
+
+MAPPED_MAGIC = 'PYMMTBL\0'
+"""Leading bytes of a mapped table file."""
+
+MAPPED_FORMAT = 1
+"""Version of the mapped table file layout, independent of the data version."""
+
+MAPPED_BYTE_ORDER = 0x01020304
+"""Marker stored in native byte order; files written on a host with a different
+byte order are rejected."""
+
+MAPPED_HEADER_FORMAT = '=8sIIIQ'
+"""Header: magic, layout version, byte order marker, data version, table count."""
+
+MAPPED_ENTRY_FORMAT = '=16scxxxIIQ'
+"""Table directory entry: name, typecode, rows, columns, data offset."""
+
+MAPPED_ALIGNMENT = 64
+"""Alignment of table data within the file."""
+
+_CTYPES = {
+    'b': ctypes.c_int8,   'B': ctypes.c_uint8,
+    'h': ctypes.c_int16,  'H': ctypes.c_uint16,
+    'i': ctypes.c_int32,  'I': ctypes.c_uint32,
+    }
+"""Supported :py:mod:`array` typecodes and their fixed-width ctypes equivalents."""
+
+
+def _aligned(offset):
+    return (offset + MAPPED_ALIGNMENT - 1) // MAPPED_ALIGNMENT * MAPPED_ALIGNMENT
+
+
+class MappedLoader(Loader):
+    """Loader for two-dimensional integer tables, stored in a versioned
+    binary format and loaded with :py:mod:`mmap`.
+
+    The file starts with a header (:py:data:`.MAPPED_HEADER_FORMAT`), followed
+    by a directory of tables (:py:data:`.MAPPED_ENTRY_FORMAT`), and the
+    row-major contents of each table at an aligned offset.
+
+    Loading does not copy the table contents: each table is a tuple of rows,
+    ctypes arrays over a private mapping of the file, built once at load
+    time.  ``table[row][col]`` reads the mapped pages, which processes
+    loading the same file share through the page cache.  The mapping stays
+    open as long as rows of its tables are referenced.
+
+    The data class, given as *make*, must provide:
+
+    - ``to_mapped()``: an instance method returning a sequence of
+      *(name, typecode, rows)*, with *rows* a sequence of equal-length
+      sequences of integers, and *typecode* a key of :py:data:`._CTYPES`.
+    - ``from_mapped(tables)``: a class method constructing an instance from
+      a dictionary mapping the names to the mapped tables.
+    """
+
+    READ_ERRORS = (struct.error, ValueError, TypeError, KeyError,
+                   EnvironmentError)
+
+    def _read(self, inp):
+        header_size = struct.calcsize(MAPPED_HEADER_FORMAT)
+        entry_size = struct.calcsize(MAPPED_ENTRY_FORMAT)
+
+        # copy-on-write: ctypes views need a writable buffer; the pages are
+        # never written, so they stay shared.
+        mem = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_COPY)
+        value = None
+        try:
+            (magic, fmt, order, version, count) = \
+                struct.unpack_from(MAPPED_HEADER_FORMAT, mem, 0)
+            if magic != MAPPED_MAGIC or fmt != MAPPED_FORMAT or \
+                    order != MAPPED_BYTE_ORDER or version != self.version:
+                return None
+
+            tables = {}
+            for i in xrange(count):
+                (name, typecode, nrows, ncols, offset) = \
+                    struct.unpack_from(MAPPED_ENTRY_FORMAT, mem, header_size + i*entry_size)
+                row = _CTYPES[typecode] * ncols
+                size = ctypes.sizeof(row)
+                if offset + nrows*size > len(mem):
+                    raise ValueError("Truncated table: " + name.rstrip('\0'))
+                tables[name.rstrip('\0')] = tuple(row.from_buffer(mem, offset + r*size)
+                                                  for r in xrange(nrows))
+
+            value = self._make[0].from_mapped(tables)
+            return value
+        finally:
+            # the rows of a loaded value keep the mapping open.
+            if value is None:
+                mem.close()
+
+
+    def _write(self, out, value):
+        header_size = struct.calcsize(MAPPED_HEADER_FORMAT)
+        entry_size = struct.calcsize(MAPPED_ENTRY_FORMAT)
+
+        tables = tuple(value.to_mapped())
+        offset = _aligned(header_size + len(tables)*entry_size)
+        entries = []
+        for (name, typecode, rows) in tables:
+            if ctypes.sizeof(_CTYPES[typecode]) != array.array(typecode).itemsize:
+                raise ValueError("Unsupported typecode for mapped storage: " + typecode)
+            ncols = len(rows[0]) if rows else 0
+            entries.append((name, typecode, len(rows), ncols, offset))
+            offset = _aligned(offset + len(rows) * ncols * ctypes.sizeof(_CTYPES[typecode]))
+
+        out.write(struct.pack(MAPPED_HEADER_FORMAT, MAPPED_MAGIC, MAPPED_FORMAT,
+                              MAPPED_BYTE_ORDER, self.version, len(tables)))
+        for e in entries:
+            out.write(struct.pack(MAPPED_ENTRY_FORMAT, *e))
+
+        for ((name, typecode, rows), e) in zip(tables, entries):
+            out.seek(e[-1])
+            for row in rows:
+                out.write(array.array(typecode, row).tostring())
+
@@ -0,0 +1,80 @@
+# -*- python -*-
+"""Candidate ordering policies for the tree builder.
+
+The builder explores the candidate guesses of a problem in the order a policy
+puts them in.  The order does not change the quality of the tree built, but
+the sooner a strong tree is found, the more candidates the moves budget cuts
+off; see :py:attr:`.builder.TreeBuilder.branch_and_bound`.  Among equally
+good trees, the builder keeps the first one found, so the policy may change
+the tree built.
+
+Candidates are :py:class:`.partition.PartitionResult` or
+:py:class:`.partition.PartitionSizes` instances; policies only rely on their
+*root*, *sizes* and *stats*.
+"""
+
+from . import *
+from . import descr
+from . import partition
+
+def _not_implemented():
+    raise MMException("Not implemented.")
+
+
+class CandidateOrdering(descr.WithDescription):
+    """Base class for ordering policies; keeps the order chosen by the strategy."""
+
+    def order(self, strategy, candidates):
+        """:param strategy: the strategy whose problem is being solved.
+        :param candidates: the strategy's candidate guesses.
+        :return: the candidates, in the order they are to be explored.
+        """
+        return candidates
+
+
+class KeyOrdering(CandidateOrdering):
+    """Sorts candidates by ascending :py:meth:`.KeyOrdering.key`; candidates
+    with equal keys keep the strategy's order."""
+
+    def key(self, pr):
+        """:param pr: a candidate.
+        :return: the candidate's sort key.
+        """
+        _not_implemented()
+
+
+    def order(self, strategy, candidates):
+        return sorted(candidates, key=self.key)
+
+
+class LargestPartOrdering(KeyOrdering):
+    """By ascending largest part size, then by descending number of parts."""
+
+    def key(self, pr):
+        return (pr.stats.largest, -pr.stats.n)
+
+
+class EntropyOrdering(KeyOrdering):
+    """By descending entropy of the part sizes."""
+
+    def key(self, pr):
+        # the total size is the same for all candidates, so the entropy
+        # decreases with the sum of n.log(n) over the sizes.
+        xlogx = partition.XLOGX
+        return sum(xlogx[n] for n in pr.sizes)
+
+
+class TotsqOrdering(KeyOrdering):
+    """By ascending sum of squared part sizes, as in Irving's strategy."""
+
+    def key(self, pr):
+        return sum(n*n for n in pr.sizes)
+
+
+ORDERINGS = {
+    'none': CandidateOrdering,
+    'largest': LargestPartOrdering,
+    'entropy': EntropyOrdering,
+    'totsq': TotsqOrdering,
+    }
+"""Ordering policy classes, by name."""
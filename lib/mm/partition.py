@@ -4,9 +4,11 @@ code, called the root code.
 """
 
 import math
+import operator
 import sys
 
 from . import *
+from . import bitset as bitset
 from . import score as score
 
 PERFECT_SCORE = CodeTable.PERFECT_SCORE
@@ -119,6 +121,91 @@ class Stats(object):
         return b + "\n" + d
 
 
+class SizeStats(object):
+    """Subset of :py:class:`.Stats` that is cheap to compute from partition
+    sizes; sufficient for ranking candidates."""
+
+    def __init__(self, sizes, perfect):
+        """:param sizes: sizes of the partitions, indexed by numeric score.
+        :type sizes: list.
+        :param perfect: size of the perfect score partition.
+        :type perfect: int.
+        """
+        count = len(sizes) - sizes.count(0)
+        mx = max(sizes)
+
+        self.total = sum(sizes)
+        """Sum of sizes."""
+
+        self.n = count
+        """number of non-zero sizes."""
+
+        self.largest = mx
+        """size of largest partition."""
+
+        self.optimal = (mx == 1)
+        """True when the partitionning result is optimal."""
+
+        self.in_solution = (perfect != 0)
+        """True when the partitionning result contains a non-empty
+        partition for the perfect score."""
+
+
+class PartitionSizes(object):
+    """Sizes-only partition result: the score histogram of a set of codes
+    against a root code, and its :py:class:`.SizeStats`.
+
+    Used for ranking candidates without building the partitions; the
+    full :py:class:`.PartitionResult` is built by :py:meth:`.result` for
+    the candidates that are kept.
+    """
+
+    def __init__(self, codes, rootcode, mask=None):
+        """:param codes: a set of codes, in numeric encoding.
+        :param rootcode: code against which to split the code set.
+        :param mask: optional bitset representation of *codes*; when
+          present, the sizes are counted on the bitset, and the full
+          result is a :py:class:`.MaskPartitionResult`.
+        """
+        self.root = rootcode
+        """Root code."""
+
+        self._codes = codes
+        self._mask = mask
+        self._result = None
+
+        if mask is not None:
+            if not bitset.MASK_TABLE:
+                bitset.initialize()
+            sizes = [bitset.popcount(mask & m) for m in bitset.MASK_TABLE.MASKS[rootcode]]
+        else:
+            lookup = score.LOOKUP_TABLE
+            if not lookup:
+                score.initialize()
+                lookup = score.LOOKUP_TABLE
+
+            row = lookup[rootcode]
+            sizes = [0] * NSCORES
+            for c in codes:
+                sizes[row[c]] += 1
+
+        self.sizes = sizes
+        """The sizes of the partitions, indexable by score."""
+
+        self.stats = SizeStats(sizes, sizes[PERFECT_SCORE])
+        """Partitioning stats; see :py:class:`.SizeStats`"""
+
+
+    def result(self):
+        """:return: the full partition result, built once on first use."""
+        if self._result is None:
+            if self._mask is not None:
+                self._result = MaskPartitionResult(self._mask, self.root)
+            else:
+                self._result = PartitionResult(self._codes, self.root)
+        return self._result
+
+
 class PartitionResult(object):
     """Parition result. Groups a set of codes by their scores
     against a *root* code.
@@ -138,16 +225,19 @@ class PartitionResult(object):
         self.root = rootcode
         """Root code; the codes are partition by score against the root code."""
 
-        lookup = lookup[rootcode]
+        row = lookup[rootcode]
         p = tuple([] for i in range(0, NSCORES))
         for c in codes:
-            s = lookup[c]
-            p[s].append(c)
+            p[row[c]].append(c)
 
         self.parts = p
         """The partitions, an array indexable by score."""
 
-        self.sizes = tuple(len(x) for x in p)
+        self._set_sizes(tuple(len(x) for x in p))
+
+
+    def _set_sizes(self, sizes):
+        self.sizes = sizes
         """The sizes of the partitions, indexable by score."""
 
         n = sum(1 if sz > 0 else 0 for sz in self.sizes)
@@ -172,11 +262,42 @@ class PartitionResult(object):
         """
 
         self._long_signature = None
+        self._parts_key = None
 
-        if len(codes) <= 2:
+        if self.stats.total <= 2:
             self._long_signature = self.signature 
 
 
+    @property
+    def parts_key(self):
+        """Canonical key of the family of partitions.
+
+        :return: a hashable value, equal for partition results that split the
+          same problem into the same sets of codes, regardless of the scores
+          labelling the sets.
+
+        The key is the :py:attr:`.signature`, followed by the sorted
+        non-empty partitions.  The partitions keep the order of the codes
+        in the problem, so equal sets are equal tuples.
+        """
+        if self._parts_key is None:
+            parts = sorted(tuple(p) for p in self.parts if p)
+            self._parts_key = (self.signature, tuple(parts))
+        return self._parts_key
+
+
+    def result(self):
+        """:return: *self*; for compatibility with :py:meth:`.PartitionSizes.result`."""
+        return self
+
+
+    def part_mask(self, score):
+        """:param score: numeric score.
+        :return: the partition at *score* as a bitset; see :py:mod:`.bitset`.
+        """
+        return bitset.from_codes(self.parts[score])
+
+
     @property
     def long_signature(self):
         """From old C++ implementation (ca. 2005)
@@ -212,3 +333,168 @@ class PartitionResult(object):
         self._long_signature = lsig
 
         return self._long_signature
+
+
+class MaskPartitionResult(PartitionResult):
+    """Partition result computed from a bitset representation of the
+    code set; see :py:mod:`.bitset`.
+
+    The partitions are computed with one bitwise *and* per score, and
+    their sizes with population counts.  The code lists in
+    :py:attr:`.PartitionResult.parts` are only built when accessed.
+    """
+
+    def __init__(self, mask, rootcode):
+        """Constructs the partition result, and calculates the stats.
+
+        :param mask: a set of codes, as a bitset.
+        :param rootcode: code against which to split the code set.
+        """
+        if not bitset.MASK_TABLE:
+            bitset.initialize()
+
+        self.root = rootcode
+
+        self.part_masks = bitset.MASK_TABLE.partition(mask, rootcode)
+        """The partitions as bitsets, indexable by score."""
+
+        self._parts = None
+
+        self._set_sizes(tuple(bitset.popcount(m) for m in self.part_masks))
+
+
+    @property
+    def parts(self):
+        """The partitions, an array indexable by score."""
+        if self._parts is None:
+            self._parts = tuple(bitset.to_codes(m) for m in self.part_masks)
+        return self._parts
+
+    @parts.setter
+    def parts(self, value):
+        self._parts = value
+        self.part_masks = tuple(bitset.from_codes(p) for p in value)
+
+
+    def part_mask(self, score):
+        return self.part_masks[score]
+
+
+    @property
+    def parts_key(self):
+        """Canonical key of the family of partitions; the :py:attr:`.signature`
+        followed by the sorted bitsets of the non-empty partitions."""
+        if self._parts_key is None:
+            masks = sorted(m for m in self.part_masks if m)
+            self._parts_key = (self.signature, tuple(masks))
+        return self._parts_key
+
+
+_SCORE_CHARS = tuple(chr(s) for s in range(0, NSCORES))
+"""Scores as single bytes, for counting over score table rows."""
+
+XLOGX = tuple(float(n) * safelog(n) for n in range(0, CodeTable.NCODES+1))
+"""Precalculated :math:`n \\log_2 n` terms of the entropy."""
+
+
+class HistogramMatrix(object):
+    """Score histograms of one problem against many candidate roots.
+
+    Row *i* of :py:attr:`.counts` is the list of partition sizes of the
+    problem against the root ``root[i]``, the same as
+    :py:attr:`.PartitionResult.sizes`.  Each row is counted on a byte string
+    copy of a score table row, with one C-level count per score, rather
+    than one Python step per code.
+
+    The per-candidate stats are columns, with the same meaning as the
+    attributes of :py:class:`.Stats` by the same names.  The columns that
+    are not needed for :py:class:`.SizeStats` are computed on first use.
+    """
+
+    def __init__(self, problem, candidates):
+        """:param problem: a non-empty set of codes, in numeric encoding.
+        :param candidates: root codes, in numeric encoding.
+        """
+        lookup = score.LOOKUP_TABLE
+        if not lookup:
+            score.initialize()
+            lookup = score.LOOKUP_TABLE
+
+        self.root = tuple(candidates)
+        """Root codes, one per row."""
+
+        total = len(problem)
+        chars = _SCORE_CHARS
+        if total == CodeTable.NCODES:
+            counts = [map(str(buffer(lookup[c])).count, chars) for c in self.root]
+        else:
+            getp = operator.itemgetter(*problem)
+            counts = [map(''.join(getp(str(buffer(lookup[c])))).count, chars)
+                      for c in self.root]
+
+        self.counts = counts
+        """Partition sizes, one list per candidate, indexable by score."""
+
+        self.largest = map(max, counts)
+        """Largest partition size."""
+
+        self.n = [NSCORES - h.count(0) for h in counts]
+        """Number of non-empty partitions."""
+
+        self.in_solution = [h[PERFECT_SCORE] != 0 for h in counts]
+        """True when the perfect score partition is non-empty."""
+
+        self.optimal = [mx == 1 for mx in self.largest]
+        """True when all partitions have at most one member."""
+
+        self._total = total
+        self._totsq = None
+        self._entropy = None
+
+
+    @property
+    def totsq(self):
+        """Sum of squares of partition sizes, used in the Irving strategy."""
+        if self._totsq is None:
+            self._totsq = [sum(map(operator.mul, h, h)) for h in self.counts]
+        return self._totsq
+
+
+    @property
+    def entropy(self):
+        """Entropy of the partition sizes."""
+        if self._entropy is None:
+            total = self._total
+            lg = safelog(total)
+            eps = sys.float_info.epsilon*4
+            entropy = [lg - sum(map(XLOGX.__getitem__, h))/total for h in self.counts]
+            self._entropy = [0 if abs(e) <= eps else e for e in entropy]
+        return self._entropy
+
+
+    def keys(self, key_columns):
+        """Sort keys of the candidates.
+
+        :param key_columns: sequence of *(name, sign)* pairs; *name* is a
+          column attribute, and *sign* is 1 to prefer small values, or -1 to
+          prefer large values.  Earlier columns take precedence.
+        :return: a list of tuples, one per row; smaller is better.
+        """
+        cols = []
+        for (name, sign) in key_columns:
+            col = getattr(self, name)
+            if sign < 0:
+                col = map(operator.neg, col)
+            cols.append(col)
+
+        return zip(*cols)
+
+
+    def best(self, key_columns):
+        """Selects the candidate that minimizes a key.
+
+        :param key_columns: see :py:meth:`.HistogramMatrix.keys`.
+        :return: index of the best row.
+        """
+        keys = self.keys(key_columns)
+        return min(xrange(len(keys)), key=keys.__getitem__)
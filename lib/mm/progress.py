@@ -25,6 +25,10 @@ NAME_LENGTH_SIZE= struct.calcsize(NAME_LENGTH_FORMAT)
 
 NAME_FORMAT_TEMPLATE = "={}s"
 
+DISABLED = 'none'
+"""Progress destination that disables progress reporting; see
+:py:data:`.NULL_STATUS`."""
+
 class CalculationStatus(object):
     """Maintains counters indicating that allow esimation of progress of a tree
     calculation."""
@@ -54,6 +58,18 @@ class CalculationStatus(object):
         """Index of current problem being solved."""
 
 
+    def reset(self, problem_size):
+        """Reinitializes the status for a new problem, with the same parent.
+
+        :param problem_size: size of the problem being calculated.
+        """
+        self.problem_size = problem_size
+        self.candidate_count = 0
+        self.child_count = 0
+        self.cur_candidate = -1
+        self.cur_child = -1
+
+
     def next_candidate(self, pr):
         """:param pr: next candidate under consideration.
 
@@ -166,6 +182,27 @@ class CalculationStatus(object):
         return (n, total, name, chain)
 
 
+class NullCalculationStatus(CalculationStatus):
+    """A calculation status that reports nothing, and keeps no counters
+    up to date; see :py:data:`.NULL_STATUS`."""
+
+    def reset(self, problem_size):
+        pass
+
+
+    def next_candidate(self, pr):
+        pass
+
+
+    def report(self, total):
+        pass
+
+
+NULL_STATUS = NullCalculationStatus(None, 0)
+"""The status shared by all the problems of a calculation without progress
+reporting."""
+
+
 class ReportingCalculationStatus(CalculationStatus):
     """A calculation status with the ability to report its contents
     through a unix datagram socket."""
@@ -8,6 +8,7 @@ from . import *
 from . import singleton as singleton
 from . import loader as loader
 
+import array
 import collections
 
 _CODES= CODETABLE.CODES
@@ -18,7 +19,7 @@ NPOSITIONS = CodeTable.NPOSITIONS
 NCOLORS    = CodeTable.NCOLORS
 NSCORES    = CodeTable.NSCORES
 
-VERSION = 1
+VERSION = 2
 STORAGE_PATH = 'var/scoretable'
 
 NamedScoreTuple = collections.namedtuple('NamedScoreTuple',
@@ -124,25 +125,99 @@ def _genscores():
     return tuple(s)
 
 
-def _genscoretable():
-    return tuple(tuple(Score.from_vectors(_CODES[c1], _CODES[c2]).value \
-                           for c1 in range(0, NCODES)) \
+SCORE_TYPECODE = 'B'
+"""Element type of score table rows; see :py:mod:`array`.  Scores are
+small integers in the range [0, :py:data:`NSCORES`), an unsigned byte
+is sufficient."""
+
+
+def _genscoretable_pairwise():
+    """Reference implementation of the score table, one call to
+    :py:meth:`.Score.from_vectors` per code pair.  Slow; kept for
+    verification and benchmarking of :py:func:`._genscoretable`."""
+    return tuple(array.array(SCORE_TYPECODE,
+                             (Score.from_vectors(_CODES[c1], _CODES[c2]).value \
+                                  for c1 in range(0, NCODES))) \
                      for c2 in range(0, NCODES))
 
 
+def _exact_table(npos):
+    """:return: a square matrix of exact match counts between all codes
+      of length *npos*, indexed by the numeric encoding of the codes."""
+    n = NCOLORS ** npos
+    digits = tuple(tuple((c // NCOLORS ** i) % NCOLORS for i in range(0, npos))
+                   for c in range(0, n))
+    return tuple(tuple(sum(1 for (a, b) in zip(d1, d2) if a == b)
+                       for d2 in digits)
+                 for d1 in digits)
+
+
+def _genscoretable():
+    """Batched score kernel: computes the whole score matrix in one pass.
+
+    A score is the pair *(exact, total - exact)*, where *total* is the count of
+    color matches regardless of position.  Both components are assembled
+    from small precomputed tables:
+
+    - *exact* is the sum of exact matches over the low and high halves of the
+      positions, each looked up in a table indexed by the half-codes.
+    - *total* depends only on the color histograms of the two codes; there are
+      few distinct histograms, and the table of totals is indexed by histogram
+      numbers.
+
+    Each row is then a single list comprehension over per-code keys, instead
+    of :py:data:`NCODES` calls to :py:meth:`.Score.from_vectors`.  The result
+    is identical to :py:func:`._genscoretable_pairwise`.
+    """
+    nlo = NPOSITIONS // 2
+    base = NCOLORS ** nlo
+    exact_lo = _exact_table(nlo)
+    exact_hi = _exact_table(NPOSITIONS - nlo)
+
+    histograms = {}
+    kinds = []
+    for v in _CODES:
+        h = tuple(v.count(color) for color in range(0, NCOLORS))
+        kinds.append(histograms.setdefault(h, len(histograms)))
+    hlist = sorted(histograms, key=histograms.get)
+    totals = tuple(tuple(sum(map(min, h1, h2)) for h2 in hlist) for h1 in hlist)
+
+    encoded = tuple(tuple(CODETABLE.encode_score(e, t - e) if t >= e else None
+                          for t in range(0, NPOSITIONS+1))
+                    for e in range(0, NPOSITIONS+1))
+
+    keys = tuple((c % base, c // base, k) for (c, k) in zip(range(0, NCODES), kinds))
+
+    rows = []
+    for (lo, hi, kind) in keys:
+        el, eh, tm = exact_lo[lo], exact_hi[hi], totals[kind]
+        rows.append(array.array(SCORE_TYPECODE,
+                                [encoded[el[l] + eh[h]][tm[k]] for (l, h, k) in keys]))
+    return tuple(rows)
+
+
 class ScoreTable(singleton.SingletonBehavior):
     """Precalculated scores."""
     __metaclass__ = singleton.Singleton
 
 
-    def __init__(self):
+    def __init__(self, table=None):
+        """:param table: precomputed score matrix; computed with
+          :py:func:`._genscoretable` when null.
+        """
         self.SCORES = _genscores()
         """Table mapping numeric scores to :py:class:`.Score` objects."""
 
-        self.SCORE_TABLE = _genscoretable()
+        self.SCORE_TABLE = table if table is not None else _genscoretable()
         """A matrix storing scores of all possible code pairs.  The width
         and height are both :py:data:`.CODETABLE.NCODES`, and the contents
         are small integers representing mastermind scores.
+
+        The matrix is a sequence of rows of unsigned bytes (see
+        :py:data:`.SCORE_TYPECODE`); use as ``SCORE_TABLE[c1][c2]``.  The
+        rows are :py:class:`array.array` instances when computed, and ctypes
+        arrays over the mapped file when loaded with 
+        :py:class:`.loader.MappedLoader`.
         """
 
         self.ENCODED_SCORES = {s: i for (i, s) in enumerate(self.SCORES)}
@@ -155,6 +230,24 @@ class ScoreTable(singleton.SingletonBehavior):
         """
 
 
+    def to_mapped(self):
+        """:return: the tables to be stored by :py:class:`.loader.MappedLoader`."""
+        return (('scores', SCORE_TYPECODE, self.SCORE_TABLE),)
+
+
+    @classmethod
+    def from_mapped(cls, tables):
+        """Reconstructs the singleton instance from mapped tables.
+
+        :param tables: dictionary of tables produced by :py:meth:`.to_mapped`.
+        :return: the singleton instance.
+        """
+        tbl = cls.__new__(cls)
+        tbl.__init__(tables['scores'])
+        tbl.__setstate__({}) # register as the singleton, like unpickling.
+        return tbl
+
+
     def lookup_score(self, s):
         """Decodes a numeric score into a pair of numnbers (exact, approx).
 
@@ -181,7 +274,9 @@ SCORE_TABLE = None #scoretable()
 """The single instance of :py:class:`.ScoreTable`."""
 
 LOOKUP_TABLE = None
-"""Score lookup table."""
+"""Score lookup table; an alias for :py:attr:`.ScoreTable.SCORE_TABLE`.  Use
+as ``LOOKUP_TABLE[c1][c2]``, or fetch a row once with ``LOOKUP_TABLE[c1]``
+when scoring many codes against the same code."""
 
 
 def initialize():
@@ -193,8 +288,8 @@ def initialize():
     if SCORE_TABLE is not None:
         return
 
-    spec = loader.StorageSpec(VERSION, STORAGE_PATH)
-    ldr = loader.Loader(ScoreTable, spec)
+    spec = loader.MappedStorageSpec(VERSION, STORAGE_PATH)
+    ldr = loader.MappedLoader(ScoreTable, spec)
 
     tbl = ldr.get()
 
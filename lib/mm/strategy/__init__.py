@@ -56,6 +56,17 @@ class MinimizeMoveCount(builder.SolutionEvaluator):
         """
         return state[2] or state[1] or state[0]
 
+
+    def move_limit(self, state):
+        """:param state: evaluation state.
+        :return: total moves of the tree with the fewest moves so far, 
+          optimal or not; a tree with more moves can't replace it.  *None*
+          before the first evaluation.
+        """
+        if state[0]:
+            return state[0].stats.total_moves
+        return None
+
 class MinimizeTreeDepth(builder.SolutionEvaluator):
     """A tree evaluator, picks the shallowest tree.  When there's a tie, the
     evaluator favors lower depth.
@@ -106,6 +117,12 @@ class MinimizeTreeDepth(builder.SolutionEvaluator):
         return state[2] or state[1] or state[0]
 
 
+CANDIDATE_CHUNK_SIZE = 64
+"""Number of candidates per :py:class:`..partition.HistogramMatrix` when searching
+for the best candidate; smaller chunks stop sooner when an optimal candidate is found,
+larger chunks have less overhead."""
+
+
 def _not_implemented():
     raise MMException("Not implemented.")
 
@@ -150,6 +167,12 @@ class OptimizePartitionResultProperty(builder.BuilderStrategy):
 
     _comparator_sequence = [lambda a, b: _not_implemented()]
 
+    _key_columns = None
+    """Ordering equivalent to :py:attr:`._comparator_sequence`, as *(column, sign)*
+    pairs over :py:class:`..partition.HistogramMatrix` columns; when set, the
+    best candidate is chosen from a histogram matrix of all candidates.  See
+    :py:meth:`..partition.HistogramMatrix.best`."""
+
 
     def compare(self, a, b):
         """Defines an ordering on partition results, with *a < b* equivalent to 
@@ -159,9 +182,9 @@ class OptimizePartitionResultProperty(builder.BuilderStrategy):
         real implementations.
 
         :param a: a partition result of the problem.
-        :type a: :py:class:`..partition.PartitionResult`
+        :type a: :py:class:`..partition.PartitionSizes`
         :param b: another partition result of the same problem.
-        :type b: :py:class:`..partition.PartitionResult`
+        :type b: :py:class:`..partition.PartitionSizes`
         :returns: a negative number if *a is better than b*, a positive number if *b is better than a*,
           zero otherwise.
         """
@@ -176,29 +199,62 @@ class OptimizePartitionResultProperty(builder.BuilderStrategy):
         if self.problem_size <= 2:
             return list(partition.PartitionResult(self.problem, c) for c in (min(self.problem),))
 
-        best = partition.PartitionResult(self.problem, self.problem[0])
+        if self._key_columns is None:
+            return self._scan_best_candidate()
+
+        # Same choice as the scan: the first optimal candidate after the
+        # first problem member, then the best one in the problem, then the
+        # first optimal one, or the best one, over all the candidates.  The
+        # other candidates are evaluated in chunks, to stop early on optimal
+        # candidates.
+        keycols = self._key_columns
+        problem = tuple(self.problem)
+        m = partition.HistogramMatrix(problem, problem)
+        if True in m.optimal[1:]:
+            return (self.partition(problem[m.optimal.index(True, 1)]),)
+
+        i = m.best(keycols)
+        best = (m.keys(keycols)[i], problem[i])
+
+        if not self.restrict_to_problem:
+            others = tuple((CODETABLE.ALL_SET - frozenset(problem)) - self._prefix_set)
+            for start in xrange(0, len(others), CANDIDATE_CHUNK_SIZE):
+                m = partition.HistogramMatrix(problem, others[start:start+CANDIDATE_CHUNK_SIZE])
+                if True in m.optimal:
+                    return (self.partition(m.root[m.optimal.index(True)]),)
+
+                i = m.best(keycols)
+                best = min(best, (m.keys(keycols)[i], m.root[i]))
+
+        return (self.partition(best[1]),)
+
+
+    def _scan_best_candidate(self):
+        # rank candidates by their partition sizes, and build the partitions
+        # for the winner only.
+        best = self.partition_sizes(self.problem[0])
         for c in self.problem[1:]:
-            pr = partition.PartitionResult(self.problem, c)
+            pr = self.partition_sizes(c)
             if self.compare(pr, best) < 0:
                 best = pr
 
             if pr.stats.optimal:
                 best = pr
-                return (best,)
+                return (best.result(),)
 
         if self.restrict_to_problem:
-            return (best,)
+            return (best.result(),)
 
         for c in (CODETABLE.ALL_SET - frozenset(self.problem)) - self._prefix_set:
-            pr = partition.PartitionResult(self.problem, c)
+            pr = self.partition_sizes(c)
             if self.compare(pr, best) < 0:
                 best = pr
 
             if pr.stats.optimal:
                 best = pr
-                return (best, )
+                return (best.result(), )
 
-        return (best,)
+        return (best.result(),)
 
 
 class MinimizeLargestPartition(OptimizePartitionResultProperty):
@@ -213,6 +269,8 @@ class MinimizeLargestPartition(OptimizePartitionResultProperty):
         lambda a, b: cmp(a.root, b.root)
         ]
 
+    _key_columns = (('largest', 1), ('n', -1), ('in_solution', -1), ('root', 1))
+
 
 class MaximizePartitionCount(OptimizePartitionResultProperty):
     """Policy to maximize partition count.  When partition counts are tied,
@@ -226,6 +284,8 @@ class MaximizePartitionCount(OptimizePartitionResultProperty):
         lambda a, b: cmp(a.root, b.root)
         ]
 
+    _key_columns = (('n', -1), ('largest', 1), ('in_solution', -1), ('root', 1))
+
 
 
 class MinimizeLargestPartition01(OptimizePartitionResultProperty):
@@ -240,6 +300,8 @@ class MinimizeLargestPartition01(OptimizePartitionResultProperty):
         lambda a, b: cmp(a.root, b.root)
         ]
 
+    _key_columns = (('largest', 1), ('in_solution', -1), ('n', -1), ('root', 1))
+
 
 class MaximizePartitionCount01(OptimizePartitionResultProperty):
     """Policy to maximize partition count.  When partition counts are tied,
@@ -253,6 +315,8 @@ class MaximizePartitionCount01(OptimizePartitionResultProperty):
         lambda a, b: cmp(a.root, b.root)
         ]
 
+    _key_columns = (('n', -1), ('in_solution', -1), ('largest', 1), ('root', 1))
+
 
 class MinimizeLargestPartitionInProblem(MinimizeLargestPartition):
     """A specialization of :py:class:`.MinimizeLargestPartition` restricting
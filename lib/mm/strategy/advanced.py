@@ -46,47 +46,62 @@ class ScanDistinctFollowers(builder.BuilderStrategy):
         self._answer = None
         self._prefix_set = frozenset(self.prefix)
         self._problem_set = frozenset(problem)
+        self._distinct = None
 
-        self._set_distinct_candidates()
+        self._set_root_problem()
 
 
-    def _set_distinct_candidates(self):
-        self._set_root_problem()
-        self._set_preserving()
+    @property
+    def _distinct_candidates(self):
+        """:return: the candidates distinct under the prefix's preserving
+          transformations.  Computed on first use: strategies of subproblems
+          answered without a search never need them."""
+        if self._distinct is None:
+            self._distinct = self._find_distinct_candidates()
+        return self._distinct
+
 
-        if len(self._preserving) == 1:
+    def _find_distinct_candidates(self):
+        if len(self.preserving) == 1:
             if self.restrict_to_problem:
-                self._distinct_candidates = tuple(self._problem_set - self._prefix_set)
+                return tuple(self._problem_set - self._prefix_set)
             else:
-                self._distinct_candidates = tuple(self._root_problem - self._prefix_set)
-            return
+                return tuple(self._root_problem - self._prefix_set)
 
         if not self.parent:
             if len(self.problem) == CODETABLE.NCODES:
-                self._distinct_candidates = CODETABLE.FIRST
-                return
+                return CODETABLE.FIRST
 
         pg = distinct.PrefixGen()
 
         p = self._root_problem
         if self.restrict_to_problem:
             p = self._problem_set
-        self._distinct_candidates = tuple(pg.distinct_subset(self._preserving, p, self._prefix_set))
+        return tuple(pg.distinct_subset(self.preserving, p, self._prefix_set))
 
 
-    def _set_preserving(self):
-        XFTBL = xforms.XF_LOOKUP_TABLE # must have been initialized.
-        if not self.parent:
-            self._preserving = XFTBL.ALL
-            return
+    @property
+    def context_key(self):
+        """The candidates depend on the prefix through its preserving
+        transformations, and on the prefix and depth for some options."""
+        return self._context_key(self.preserving, self._prefix_set, self.depth)
+
+
+    def context_key_after(self, root):
+        preserving = self.preserving
+        if len(preserving) > 1:
+            preserving = xforms.XF_LOOKUP_TABLE.preserving((root,), seed=preserving)
+        return self._context_key(preserving, self._prefix_set | frozenset((root,)),
+                                 self.depth + 1)
 
-        p0 = self.parent._preserving
-        if len(p0) == 1:
-            self._preserving = p0
-            return
 
-        c = self.path[-1].root
-        self._preserving = XFTBL.preserving((c,), seed=p0)
+    def _context_key(self, preserving, prefix_set, depth):
+        key = (preserving,)
+        if not self.restrict_to_problem:
+            key += (prefix_set,)
+        if self.restrict_problem_size:
+            key += (depth,)
+        return key
 
 
     def _set_root_problem(self):
@@ -118,13 +133,15 @@ class ScanDistinctFollowers(builder.BuilderStrategy):
         if self.problem_size <= 2:
             return (partition.PartitionResult(self.problem, min(self.problem)), )
 
+        # candidates are sizes-only results; the builder expands the ones it
+        # explores.
         candidates = []
         optimal = None
         for c in self._distinct_candidates:
-            pr = partition.PartitionResult(self.problem, c)
+            pr = self.partition_sizes(c)
             if pr.stats.optimal:
                 if pr.stats.in_solution:
-                    return (pr,)
+                    return (pr.result(),)
                 elif not optimal:
                     optimal = pr
                 elif optimal.root > c:
@@ -133,7 +150,7 @@ class ScanDistinctFollowers(builder.BuilderStrategy):
             candidates.append(pr)
 
         if optimal:
-            return (optimal,)
+            return (optimal.result(),)
 
         return tuple(candidates)
 
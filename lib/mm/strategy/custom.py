@@ -101,6 +101,7 @@ class DebugExhaustiveDistinctLogic(BaseStrategy):
     def __init__(self, *args, **kwargs):
         super(DebugExhaustiveDistinctLogic, self).__init__(*args, **kwargs)
         pth = tuple((s.root, s.score) for s in self.path)
+        self._pth = pth
         self.debug_enabled = False
 
         while pth:
@@ -109,6 +110,17 @@ class DebugExhaustiveDistinctLogic(BaseStrategy):
                 break
             pth = pth[:-1]
 
+    @property
+    def context_key(self):
+        """The candidates depend on the path, through :py:data:`.PATH_RESPONSE`:
+        solved subproblems are reused at the same path only."""
+        return (super(DebugExhaustiveDistinctLogic, self).context_key, self._pth)
+
+    def context_key_after(self, root):
+        """Includes the path to *root*, so that no two candidates collapse."""
+        return (super(DebugExhaustiveDistinctLogic, self).context_key_after(root),
+                self._pth + (root,))
+
     def _best_candidates(self):
         base = super(DebugExhaustiveDistinctLogic, self)._best_candidates()
         pth = tuple((s.root, s.score) for s in self.path)
@@ -117,7 +129,7 @@ class DebugExhaustiveDistinctLogic(BaseStrategy):
             return _preselected(pth, self.problem, None)
 
         print >>sys.stderr, "# returning base result of size {} at path {}, probsize={}; #distinct={}, #preserving={}, #root_problem={}".format(
-            len(base), pth, len(self.problem), len(self._distinct_candidates), len(self._preserving), len(self._root_problem))
+            len(base), pth, len(self.problem), len(self._distinct_candidates), len(self.preserving), len(self._root_problem))
 
         return base
 
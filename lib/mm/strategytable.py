@@ -0,0 +1,153 @@
+# -*- python -*-
+"""Compiled strategy tables.
+
+A :py:class:`.StrategyTable` holds a strategy tree as two flat arrays: the
+guess at each node, and the next node for each node and score.  Nodes are
+numbered in preorder, from the root, node 0, as in :py:mod:`.treefile`.
+Playing a game, or finding the next guess after a game's history, is a few
+array lookups per move, without walking the tree's objects or dictionaries.
+"""
+
+from . import *
+from . import score
+
+import array
+
+_NONE = -1
+"""Node number of absent children."""
+
+
+def _dict_node(t):
+    """:return: the root, and *(score, child)* pairs, of a tree in the
+      dictionary representation; scores may be strings, as in JSON."""
+    children = t.get('children') or {}
+    return (t['root'], [(int(s), c) for (s, c) in children.iteritems()])
+
+
+def _tree_node(t):
+    """:return: the root, and *(score, child)* pairs, of a
+      :py:class:`.tree.Tree`."""
+    return (t.root, [(s, c) for (s, c) in enumerate(t.children) if c])
+
+
+class StrategyTable(object):
+    """A strategy tree, compiled to lookup tables."""
+
+    def __init__(self, size):
+        """:param size: number of nodes."""
+        self.guess = array.array('H', [0]) * size
+        """The guess of each node."""
+
+        self.next = array.array('i', [_NONE]) * (size * CODETABLE.NSCORES)
+        """The next node, by node and score: at index *node* times
+        :py:data:`.CODETABLE.NSCORES`, plus *score*; -1 when absent."""
+
+
+    @classmethod
+    def from_tree(cls, t):
+        """:param t: a strategy tree: a :py:class:`.tree.Tree`, or its
+          dictionary representation, as loaded by
+          :py:func:`.treewalk.loadfile`.
+        :return: the compiled tree.
+        """
+        node = _dict_node if isinstance(t, dict) else _tree_node
+        guesses = []
+        links = []
+        stack = [(t, _NONE, None)]
+        while stack:
+            (t, parent, s) = stack.pop()
+            i = len(guesses)
+            if parent != _NONE:
+                links.append((parent * CODETABLE.NSCORES + s, i))
+            (root, children) = node(t)
+            guesses.append(root)
+            for (cs, c) in sorted(children, reverse=True):
+                stack.append((c, i, cs))
+
+        table = cls(len(guesses))
+        table.guess[:] = array.array('H', guesses)
+        for (j, i) in links:
+            table.next[j] = i
+        return table
+
+
+    @classmethod
+    def from_treefile(cls, tf):
+        """:param tf: a :py:class:`.treefile.TreeFile`.
+        :return: the compiled tree; node numbers are the file's record
+          numbers.
+        """
+        table = cls(len(tf))
+        base = 0
+        for i in xrange(len(tf)):
+            table.guess[i] = tf.root(i)
+            table.next[base:base + CODETABLE.NSCORES] = array.array('i', tf.children(i))
+            base += CODETABLE.NSCORES
+        return table
+
+
+    def __len__(self):
+        """:return: the number of nodes."""
+        return len(self.guess)
+
+
+    @property
+    def nbytes(self):
+        """Size of the tables, in bytes."""
+        return len(self.guess) * self.guess.itemsize + len(self.next) * self.next.itemsize
+
+
+    def find(self, path):
+        """:param path: a sequence of *(guess, score)* pairs from the root.
+        :return: the node at the end of *path*, or -1 when the tree has no
+          such node.
+        :raise MMException: if a score of *path* is not a score.
+        """
+        i = 0
+        for (guess, s) in path:
+            if not 0 <= s < CODETABLE.NSCORES:
+                raise MMException, "Invalid score: {}".format(s)
+            if self.guess[i] != guess:
+                return _NONE
+            i = self.next[i * CODETABLE.NSCORES + s]
+            if i == _NONE:
+                break
+        return i
+
+
+    def next_guess(self, path):
+        """:param path: the history of a game: a sequence of *(guess,
+          score)* pairs.
+        :return: the strategy's next guess, or null when the strategy does
+          not reach *path*, or has no guess after it.
+        :raise MMException: if a score of *path* is not a score.
+        """
+        i = self.find(path)
+        return None if i == _NONE else self.guess[i]
+
+
+    def play(self, secret):
+        """Plays the strategy against a secret code; see
+        :py:func:`.treewalk.play`.
+
+        :param secret: numeric code to use as the hidden code.
+        :return: a sequence of *(code, score)* pairs, terminating with perfect
+          score and the secret code.
+        """
+        score.initialize()
+        guess = self.guess
+        nxt = self.next
+        lookup = score.LOOKUP_TABLE
+        nscores = CODETABLE.NSCORES
+        perfect = CODETABLE.PERFECT_SCORE
+
+        path = []
+        i = 0
+        while i != _NONE:
+            g = guess[i]
+            s = lookup[g][secret]
+            path.append((g, s))
+            if s == perfect:
+                break
+            i = nxt[i * nscores + s]
+        return tuple(path)
@@ -1,14 +1,21 @@
 """Game Tree construction."""
 
 from . import *
+from . import cache
 from . import score
 from . import descr
+from . import partition
 
+import copy
 import json
+import operator
 import platform
 
 _SCORE_LIST = range(CODETABLE.NSCORES)
 
+SMALL_TREE_TABLE_SIZE = 100000
+"""Maximum number of interned optimal trees; see :py:func:`.optimal_tree`."""
+
 class TreeResult(descr.WithDescription):
     """The result of calculating a game tree.  Non-null entity encapsulating
     the result of calculation, the strategy used during generating, and
@@ -17,12 +24,14 @@ class TreeResult(descr.WithDescription):
     The game tree, itself, may be null.
     """
 
-    def __init__(self, tree, max_levels, strategy, rusage, root=None):
+    def __init__(self, tree, max_levels, strategy, rusage, root=None, metrics=None):
         """
         :param tree: game tree, may be null.
         :param max_levels: depth constraint on the contsruction.
         :param strategy: strategy for building the tree.
         :param rusage: cputime/usertime consumed during construction.
+        :param metrics: optional dictionary of builder counters, reported
+          with the *metrics* in :py:meth:`.TreeResult.as_dict`.
         """
 
         self.tree = tree
@@ -40,19 +49,33 @@ class TreeResult(descr.WithDescription):
         self.initial_guess = root
         """Pre-defined initial guess, when not null."""
 
+        self.metrics = metrics or {}
+        """Builder counters."""
+
     def description_qualifiers(self):
         return {
             'initial_guess': self.initial_guess
             }
 
-    def to_json_file(self, fname):
+    def to_json_file(self, fname, compact=False):
         """Writes a JSON representation of the tree to a file.
 
         :param fname: name, or path, of output file.
+        :param compact: see :py:meth:`.TreeResult.write_json`.
+        """
+        with open(fname, 'w') as fp:
+            self.write_json(fp, compact)
+
+    def write_json(self, fp, compact=False):
+        """Writes a JSON representation of the tree to a file object, one
+        node at a time; see :py:func:`.dump_json`.
+
+        :param fp: output file object.
+        :param compact: when true, the JSON text has no indentation or 
+          whitespace; otherwise, it is indented as by
+          :py:meth:`.TreeResult.as_json_string`.
         """
-        fp = open(fname, 'w')
-        json.dump(self.as_dict(), fp, skipkeys=True, sort_keys=True,
-                  check_circular=True, indent=2)
+        dump_json(self._as_dict(self.tree), fp, None if compact else 2)
 
     def as_json_string(self):
         """Returns a JSON represtation of the tree as a string.
@@ -67,13 +90,20 @@ class TreeResult(descr.WithDescription):
 
         :return: representation as a dictionary; typically for generating JSON.
         """
-        return {
-            'tree': self.tree.as_dict() if self.tree else None,
-            'metrics': {
+        return self._as_dict(self.tree.as_dict() if self.tree else None)
+
+    def _as_dict(self, tree):
+        """:return: the representation of the tree result, with *tree* for
+          the tree's."""
+        metrics = dict(self.metrics)
+        metrics.update({
                 'rusage': self.rusage.as_dict(),
                 'python': [platform.python_implementation(),
                            platform.python_version()],
-                },
+                })
+        return {
+            'tree': tree or None,
+            'metrics': metrics,
             'strategy': self.strategy.description(),
             'max_levels': self.max_levels,
             'initial_guess': self.initial_guess
@@ -182,6 +212,18 @@ class Tree(object):
            """
         self.children[score] = child
 
+    def copy(self):
+        """Returns a copy of the tree's root node, with its own stats; the
+        subtrees are shared.  Interned trees, see :py:func:`.one_element_tree`,
+        must not be changed, but their copies may."""
+        t = Tree(self.root)
+        t.children = list(self.children)
+        t.root_in_solution = self.root_in_solution
+        t.stats = copy.copy(self.stats)
+        if hasattr(self, 'pr_stats'):
+            t.pr_stats = self.pr_stats
+        return t
+
     def as_dict(self):
         """Returns a representation of the tree as a dictionary."""
         d = { }
@@ -206,6 +248,20 @@ class Tree(object):
                           check_circular=True, indent=2)
 
 
+    def json_items(self):
+        """:return: the items of :py:meth:`.Tree.as_dict`, sorted by key, 
+          except for *children*, which come last, as the subtrees 
+          themselves; see :py:func:`.dump_json`."""
+        items = [('in_solution', self.root_in_solution),
+                 ('problem_size', self.stats.problem_size),
+                 ('root', self.root),
+                 ('stats', self.stats.as_dict())]
+        children = [(s, c) for (s, c) in enumerate(self.children) if c]
+        if children:
+            items.append(('children', dict(children)))
+        return items
+
+
     def update_stats(self, pr):
         """Derives the tree stats from the stats of the subtrees, and
         the root's properties.
@@ -244,6 +300,9 @@ class Tree(object):
                 format(sz, s.problem_size)
         s.problem_size = sz
 
+Stats = Tree.Stats
+"""Alias for :py:class:`.Tree.Stats`, which pickle looks up as a module attribute."""
+
 _ONE_ELEMENT_PR_STATS = partition.Stats([1], 1)
 _TWO_ELEMENT_PR_STATS = partition.Stats([1, 1], 1)
 
@@ -264,41 +323,262 @@ _TWO_ELEMENT_STATS = Tree.Stats(problem_size = 2,
                                 pr_stats     = _TWO_ELEMENT_PR_STATS)
 
 
+def dump_json(value, fp, indent=2):
+    """Writes a JSON representation of a value to a file, as 
+    ``json.dump(value, fp, skipkeys=True, sort_keys=True, indent=indent)``
+    does, but without building the representation of trees: objects with a
+    *json_items* method, such as :py:class:`.Tree`, are written as 
+    dictionaries of the items it returns, one at a time.
+
+    The *children* of tree nodes are written after the node's other items,
+    so that a reader meets the root of each node before its subtrees; see
+    :py:func:`.treewalk.iterpaths`.
+
+    :param value: a JSON-serializable value, which may contain trees.
+    :param fp: output file object.
+    :param indent: indentation; when null, the JSON text is written without 
+      whitespace.
+    """
+    _JSONWriter(fp.write, indent).write(value, 0)
+
+
+class _JSONWriter(object):
+    """Streaming JSON serializer; see :py:func:`.dump_json`."""
+
+    def __init__(self, write, indent):
+        self.out = write
+        self.indent = indent
+        if indent is None:
+            self.item_separator, self.key_separator = ',', ':'
+        else:
+            self.item_separator, self.key_separator = ', ', ': '
+
+    def newline(self, level):
+        if self.indent is not None:
+            self.out('\n' + ' ' * (self.indent * level))
+
+    def write(self, value, level):
+        if isinstance(value, basestring):
+            self.out(_encode_string(value))
+        elif value is None:
+            self.out('null')
+        elif value is True:
+            self.out('true')
+        elif value is False:
+            self.out('false')
+        elif isinstance(value, (int, long)):
+            self.out(str(value))
+        elif hasattr(value, 'json_items'):
+            self.write_object(value.json_items(), level)
+        elif isinstance(value, dict):
+            self.write_object(_sorted_items(value), level)
+        elif isinstance(value, (list, tuple)):
+            self.write_array(value, level)
+        else:
+            self.out(json.dumps(value))
+
+    def write_object(self, items, level):
+        out = self.out
+        first = True
+        for (k, v) in items:
+            k = _json_key(k)
+            if k is None:
+                continue
+            out('{' if first else self.item_separator)
+            first = False
+            self.newline(level + 1)
+            out(_encode_string(k))
+            out(self.key_separator)
+            self.write(v, level + 1)
+        if first:
+            out('{}')
+        else:
+            self.newline(level)
+            out('}')
+
+    def write_array(self, values, level):
+        if not values:
+            self.out('[]')
+            return
+        out = self.out
+        for (i, v) in enumerate(values):
+            out(self.item_separator if i else '[')
+            self.newline(level + 1)
+            self.write(v, level + 1)
+        self.newline(level)
+        out(']')
+
+
+_encode_string = json.encoder.encode_basestring_ascii
+
+
+def _sorted_items(d):
+    """:return: the items of the dictionary *d*, sorted by key; the 
+      *children* of a tree node come last."""
+    items = sorted(d.iteritems(), key=operator.itemgetter(0))
+    if 'children' in d and 'root' in d:
+        items.sort(key=lambda p: p[0] == 'children')
+    return items
+
+
+def _json_key(k):
+    """:return: a dictionary key, as :py:mod:`json` converts it to a string;
+      null for the keys it skips."""
+    if isinstance(k, basestring):
+        return k
+    if k is True:
+        return 'true'
+    if k is False:
+        return 'false'
+    if k is None:
+        return 'null'
+    if isinstance(k, float):
+        return json.dumps(k)
+    if isinstance(k, (int, long)):
+        return str(k)
+    return None
+
+
+def as_dag_dict(trees):
+    """Returns a deduplicated representation of trees as a dictionary: 
+    identical subtrees are represented once.  The subproblems of a tree are
+    disjoint, so a tree has no identical subtrees, but trees for overlapping
+    problems do; interned subtrees, see :py:func:`.one_element_tree`, are 
+    shared, the others are identified by their roots and their children.
+
+    :param trees: a sequence of trees.
+    :return: a dictionary of *nodes*, a list of node dictionaries, and
+      *roots*, the indices of the trees' roots in *nodes*.  A node is 
+      represented as in :py:meth:`.Tree.as_dict`, except that its 
+      *children* are node indices; children precede their parents.  The
+      stats of the trees' roots include their timing.
+    """
+    nodes = []
+    index = {}   # node index, by node key.
+    done = {}    # node index, by tree id.
+
+    def add(t, top):
+        children = tuple((s, done[id(c)]) for (s, c) in enumerate(t.children) if c)
+        key = (t.root, t.root_in_solution, children, top and t.stats.rusage is not None)
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(nodes)
+            d = {'root': t.root,
+                 'in_solution': t.root_in_solution,
+                 'problem_size': t.stats.problem_size,
+                 'stats': t.stats.as_dict()}
+            if not top:
+                d['stats'].pop('rusage', None)
+            if children:
+                d['children'] = dict(children)
+            nodes.append(d)
+        if not top:
+            done[id(t)] = i
+        return i
+
+    roots = []
+    for top in trees:
+        stack = [top]
+        while stack:
+            t = stack[-1]
+            pending = [c for c in t.children if c and id(c) not in done]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if t is top:
+                roots.append(add(t, True))
+            elif id(t) not in done:
+                add(t, False)
+
+    return {'nodes': nodes, 'roots': roots}
+
+
+def from_dag_dict(d):
+    """Inverse of :py:func:`.as_dag_dict`, less the timing of the trees.
+
+    :param d: a deduplicated representation of trees.
+    :return: the list of trees; identical subtrees are shared.
+    """
+    trees = []
+    for n in d['nodes']:
+        t = Tree(n['root'])
+        t.root_in_solution = n['in_solution']
+        s = n['stats']
+        t.stats = Tree.Stats(problem_size = n['problem_size'],
+                             min_depth    = s['min_depth'],
+                             max_depth    = s['max_depth'],
+                             total_moves  = s['total_moves'],
+                             optimal      = s['optimal'],
+                             in_solution  = s['in_solution'])
+        for (score, i) in (n.get('children') or {}).iteritems():
+            t.children[int(score)] = trees[i]
+        trees.append(t)
+    return [trees[i] for i in d['roots']]
+
+
+_LEAVES = [None] * CODETABLE.NCODES
+"""Interned one-element trees, by code."""
+
+_SMALL_TREES = cache.LRUCache(SMALL_TREE_TABLE_SIZE)
+"""Interned two-element and optimal trees, by *(root, in_solution, 
+leaves)*, where *leaves* are *(score, code)* pairs."""
+
+
 def one_element_tree(code):
     """Trivial one-element tree.
 
+    The trees returned by this function, :py:func:`.two_element_tree` and
+    :py:func:`.optimal_tree` are interned: equal trees are the same object,
+    which must not be changed, and trees built from them share them.
+
     :param code: the tree root.
     :return: a strategy tree for a 1-code problem.
     """
-    t = Tree(code)
-    t.root_in_solution = True
-    t.stats = _ONE_ELEMENT_STATS
-    t.pr_stats = _ONE_ELEMENT_PR_STATS
+    t = _LEAVES[code]
+    if t is None:
+        t = Tree(code)
+        t.root_in_solution = True
+        t.stats = _ONE_ELEMENT_STATS
+        t.pr_stats = _ONE_ELEMENT_PR_STATS
+        _LEAVES[code] = t
     return t
 
 def two_element_tree(codes):
-    """Trivial two-element tree.
+    """Trivial two-element tree; interned.
 
     :param codes: the 2-element problem.
     :return: a strategy tree for a 2-code problem.
     """
     c1, c2 = min(codes), max(codes)
-    s = score.score(c1, c2)
-
-    t = Tree(c1)
-    t.root_in_solution = True
-    t.add_child(s, one_element_tree(c2))
-    t.stats = _TWO_ELEMENT_STATS
-    t.pr_stats = _TWO_ELEMENT_PR_STATS
+    s = score.LOOKUP_TABLE[c1][c2]
+
+    key = (c1, True, ((s, c2),))
+    t = _SMALL_TREES.get(key)
+    if t is None:
+        t = Tree(c1)
+        t.root_in_solution = True
+        t.add_child(s, one_element_tree(c2))
+        t.stats = _TWO_ELEMENT_STATS
+        t.pr_stats = _TWO_ELEMENT_PR_STATS
+        _SMALL_TREES.put(key, t)
     return t
 
 
 def optimal_tree(pr):
-    """Build an optimal tree from an optimal partition result.
+    """Build an optimal tree from an optimal partition result; interned.
 
     :param pr: An instance of :py:class:`.partition.PartitionResult`
     :return: a tree.
     """
+    parts = pr.parts
+    key = (pr.root, bool(parts[CODETABLE.PERFECT_SCORE]),
+           tuple((score, parts[score][0]) for score in _SCORE_LIST
+                 if score != CODETABLE.PERFECT_SCORE and parts[score]))
+    t = _SMALL_TREES.get(key)
+    if t is not None:
+        return t
+
     t = Tree(pr.root)
     for score in _SCORE_LIST:
         if score == CODETABLE.PERFECT_SCORE:
@@ -314,4 +594,5 @@ def optimal_tree(pr):
     t.update_stats(pr)
     if type(t.stats.total_moves) is not int:
         raise MMException("Improperly set stats.")
+    _SMALL_TREES.put(key, t)
     return t
@@ -0,0 +1,404 @@
+# -*- python -*-
+"""Binary strategy tree files.
+
+A tree file holds a strategy tree as fixed-width node records, so that a
+node is read without parsing the rest of the file.  Each record holds a
+node's root, flags and stats, and the record numbers of its children, one
+slot per score: the records are an index of the tree's nodes by their
+*(guess, score)* path from the root, at the root's record, number 0.
+
+The file starts with a header, and the remaining items of the
+:py:meth:`.tree.TreeResult.as_dict` representation, in JSON; see
+:py:func:`.write` and :py:func:`.write_nodes`.  :py:class:`.TreeFile` reads
+the file through :py:mod:`mmap`, and converts it back to the dictionary
+representation.
+"""
+
+from . import *
+from . import score
+
+import collections
+import json
+import mmap
+import struct
+import tempfile
+
+MAGIC = 'MMTREE'
+"""File signature."""
+
+VERSION = 1
+"""Version of the file format."""
+
+HEADER_FORMAT = '<6sHII'
+"""Header: signature, version, number of nodes, and length of the JSON
+metadata that follows."""
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+RECORD_FORMAT = '<HBbbHBBI{}i'.format(CODETABLE.NSCORES)
+"""Node record: root, root in solution, stats in_solution and optimal (-1
+when null), problem size, min and max depth, total moves, and the record
+numbers of the children by score (-1 when absent)."""
+
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+_CHILDREN = 8
+"""Index of the first child in a record."""
+
+_NONE = -1
+
+_STATS_KEYS = ('problem_size', 'min_depth', 'max_depth', 'total_moves')
+
+
+def _encode(value):
+    return _NONE if value is None else int(value)
+
+
+def _decode(value):
+    return None if value == _NONE else bool(value)
+
+
+def _records(tree):
+    """:param tree: a tree, in its dictionary representation.
+    :return: the list of packed node records of *tree*, in preorder.
+    """
+    records = []
+    stack = [(tree, None, None)]
+    while stack:
+        (t, parent, s) = stack.pop()
+        i = len(records)
+        if parent is not None:
+            records[parent][1][s] = i
+        records.append((t, [_NONE] * CODETABLE.NSCORES))
+        children = t.get('children') or {}
+        for (cs, c) in sorted(children.iteritems(), key=lambda p: int(p[0]), reverse=True):
+            stack.append((c, i, int(cs)))
+
+    return [_pack(t, children) for (t, children) in records]
+
+
+def _pack(t, children):
+    """:param t: a tree node, in its dictionary representation.
+    :param children: the record numbers of its children, by score.
+    :return: the packed node record.
+    """
+    stats = t.get('stats') or {}
+    return struct.pack(RECORD_FORMAT, t['root'],
+                       bool(t['in_solution']),
+                       _encode(stats.get('in_solution')),
+                       _encode(stats.get('optimal')),
+                       t['problem_size'],
+                       *([stats.get(k) or 0 for k in _STATS_KEYS[1:]] + children))
+
+
+def write(fname, d):
+    """Writes a tree file.
+
+    :param fname: name, or path, of output file.
+    :param d: a tree result, in the :py:meth:`.tree.TreeResult.as_dict`
+      representation; or a tree, in the :py:meth:`.tree.Tree.as_dict`
+      representation.
+    :raise MMException: if there is no tree.
+    """
+    if 'tree' in d:
+        meta = dict((k, v) for (k, v) in d.iteritems() if k != 'tree')
+        tree = d['tree']
+    else:
+        meta = None
+        tree = d
+    if not tree:
+        raise MMException, "No tree to write."
+
+    rusage = (tree.get('stats') or {}).get('rusage')
+    meta = json.dumps({'result': meta, 'rusage': rusage}, sort_keys=True)
+    records = _records(tree)
+    with open(fname, 'wb') as fp:
+        fp.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(records), len(meta)))
+        fp.write(meta)
+        for r in records:
+            fp.write(r)
+
+
+def write_nodes(fname, nodes, result=None):
+    """Writes a tree file from the nodes of a tree, from the leaves up, as 
+    :py:func:`.treewalk.iternodes` reads them from a JSON file.  Only the 
+    record numbers of the subtrees awaiting their parent are held; the 
+    records go to a temporary file, to be written to *fname* in reverse, 
+    with the root first.
+
+    :param fname: name, or path, of output file.
+    :param nodes: *(scores, node)* pairs, children before their parent, and
+      the root last.
+    :param result: a dictionary holding, once *nodes* are read, the items
+      of the tree result other than the tree; empty or null for a tree 
+      only.
+    :raise MMException: if there is no tree, or a node has no parent.
+    """
+    pending = {}    # record numbers of the subtrees awaiting their parent, by scores.
+    rusage = None
+    n = 0
+    with tempfile.TemporaryFile() as tmp:
+        for (scores, t) in nodes:
+            children = [_NONE] * CODETABLE.NSCORES
+            for s in (t.get('children') or {}):
+                children[int(s)] = pending.pop(scores + (int(s),))
+            tmp.write(_pack(t, children))
+            pending[scores] = n
+            n += 1
+            if not scores:
+                rusage = (t.get('stats') or {}).get('rusage')
+        if not n:
+            raise MMException, "No tree to write."
+        if pending.keys() != [()]:
+            raise MMException, "Nodes without a parent: {}".format(
+                sorted(s for s in pending if s)[:10])
+
+        meta = json.dumps({'result': dict(result) if result else None, 'rusage': rusage},
+                          sort_keys=True)
+        with open(fname, 'wb') as fp:
+            fp.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, n, len(meta)))
+            fp.write(meta)
+            # record i of the temporary file is record n-1-i of the tree file.
+            for i in xrange(n - 1, -1, -1):
+                tmp.seek(i * RECORD_SIZE)
+                r = list(struct.unpack(RECORD_FORMAT, tmp.read(RECORD_SIZE)))
+                r[_CHILDREN:] = [c if c == _NONE else n - 1 - c for c in r[_CHILDREN:]]
+                fp.write(struct.pack(RECORD_FORMAT, *r))
+
+
+class TreeFile(object):
+    """A tree file, opened for reading."""
+
+    def __init__(self, fname):
+        """:param fname: name, or path, of the tree file.
+        :raise MMException: if the file is not a tree file of this version.
+        """
+        with open(fname, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < HEADER_SIZE:
+            self.close()
+            raise MMException, "Not a tree file: {}".format(fname)
+        (magic, version, n, meta_length) = struct.unpack_from(HEADER_FORMAT, self._map, 0)
+        if magic != MAGIC or version != VERSION or \
+                len(self._map) != HEADER_SIZE + meta_length + n * RECORD_SIZE:
+            self.close()
+            raise MMException, "Not a tree file of version {}: {}".format(VERSION, fname)
+
+        self.size = n
+        """Number of nodes."""
+
+        self._meta_length = meta_length
+        self._base = HEADER_SIZE + meta_length
+
+
+    def close(self):
+        """Releases the file mapping."""
+        self._map.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def __len__(self):
+        return self.size
+
+
+    def record(self, i):
+        """:param i: a record number.
+        :return: the node record, unpacked; see :py:data:`.RECORD_FORMAT`.
+        """
+        return struct.unpack_from(RECORD_FORMAT, self._map, self._base + i * RECORD_SIZE)
+
+
+    def root(self, i=0):
+        """:param i: a record number.
+        :return: the root of the node.
+        """
+        return struct.unpack_from('<H', self._map, self._base + i * RECORD_SIZE)[0]
+
+
+    def children(self, i):
+        """:param i: a record number.
+        :return: the record numbers of the node's subtrees, by score; -1 for
+          absent subtrees.
+        """
+        return self.record(i)[_CHILDREN:]
+
+
+    def child(self, i, s):
+        """:param i: a record number.
+        :param s: a score.
+        :return: the record number of the node's subtree for score *s*, or
+          -1.
+        :raise MMException: if *s* is not a score.
+        """
+        if not 0 <= s < CODETABLE.NSCORES:
+            raise MMException, "Invalid score: {}".format(s)
+        return self._child(i, s)
+
+
+    def _child(self, i, s):
+        offset = self._base + i * RECORD_SIZE + RECORD_SIZE - 4 * (CODETABLE.NSCORES - s)
+        return struct.unpack_from('<i', self._map, offset)[0]
+
+
+    def find(self, path):
+        """:param path: a sequence of *(guess, score)* pairs from the root.
+        :return: the record number of the node at the end of *path*, or -1
+          when the tree has no such node.
+        :raise MMException: if a score of *path* is not a score.
+        """
+        i = 0
+        for (guess, s) in path:
+            if self.root(i) != guess:
+                return _NONE
+            i = self.child(i, s)
+            if i == _NONE:
+                break
+        return i
+
+
+    def play(self, secret):
+        """Plays the strategy tree against a secret code; see
+        :py:func:`.treewalk.play`.
+
+        :param secret: numeric code to use as the hidden code.
+        :return: a sequence of *(code, score)* pairs, terminating with perfect
+          score and the secret code.
+        """
+        score.initialize()
+        path = []
+        i = 0
+        while i != _NONE:
+            root = self.root(i)
+            s = score.score(root, secret)
+            path.append((root, s))
+            if s == CODETABLE.PERFECT_SCORE:
+                break
+            i = self._child(i, s)
+        return tuple(path)
+
+
+    def metadata(self):
+        """:return: the items of the tree result, other than the tree, or
+          null when the file holds a tree only."""
+        return self._meta()['result']
+
+
+    def _meta(self):
+        return json.loads(self._map[HEADER_SIZE:self._base])
+
+
+    def as_dict(self, i=0):
+        """:param i: a record number.
+        :return: the node's subtree, in the :py:meth:`.tree.Tree.as_dict`
+          representation.
+        """
+        rusage = self._meta()['rusage'] if i == 0 else None
+        top = self._node_dict(i, rusage)
+        stack = [(i, top)]
+        while stack:
+            (j, d) = stack.pop()
+            children = self.children(j)
+            for (s, c) in enumerate(children):
+                if c != _NONE:
+                    cd = self._node_dict(c, None)
+                    d.setdefault('children', {})[s] = cd
+                    stack.append((c, cd))
+        return top
+
+
+    def node(self, i=0):
+        """:param i: a record number.
+        :return: a :py:class:`.NodeView` of the node's subtree.
+        """
+        return NodeView(self, i)
+
+
+    def _node_dict(self, i, rusage):
+        r = self.record(i)
+        stats = dict(zip(_STATS_KEYS, (r[4], r[5], r[6], r[7])))
+        stats['in_solution'] = _decode(r[2])
+        stats['optimal'] = _decode(r[3])
+        stats['average_game_length'] = float(r[7]) / r[4]
+        if rusage is not None:
+            stats['rusage'] = rusage
+        return {'root': r[0],
+                'in_solution': bool(r[1]),
+                'problem_size': r[4],
+                'stats': stats}
+
+
+    def as_result_dict(self):
+        """:return: the tree result, in the
+          :py:meth:`.tree.TreeResult.as_dict` representation; or the tree,
+          when the file holds a tree only.
+        """
+        meta = self.metadata()
+        if meta is None:
+            return self.as_dict()
+        d = dict(meta)
+        d['tree'] = self.as_dict()
+        return d
+
+
+class NodeView(collections.Mapping):
+    """A read-only view of a subtree of a :py:class:`.TreeFile`, with the
+    items of its :py:meth:`.tree.Tree.as_dict` representation.
+
+    The node's record is read when the view is first looked up.  Its
+    *children* are views too, made anew on each lookup, so that a walk from
+    the root holds the nodes on its path, and their children, only; see
+    :py:meth:`.treewalk.TreeWalker.walkfile`.
+    """
+
+    def __init__(self, tf, index):
+        """:param tf: a :py:class:`.TreeFile`.
+        :param index: the record number of the node.
+        """
+        self.treefile = tf
+        self.index = index
+        self._items = None
+
+
+    def _node(self):
+        if self._items is None:
+            tf = self.treefile
+            rusage = tf._meta()['rusage'] if self.index == 0 else None
+            self._items = tf._node_dict(self.index, rusage)
+            if any(c != _NONE for c in tf.children(self.index)):
+                self._items['children'] = None
+        return self._items
+
+
+    def __getitem__(self, key):
+        value = self._node()[key]
+        if key == 'children':
+            tf = self.treefile
+            value = dict((s, NodeView(tf, c)) for (s, c) in enumerate(tf.children(self.index))
+                         if c != _NONE)
+        return value
+
+
+    def __iter__(self):
+        return iter(self._node())
+
+
+    def __len__(self):
+        return len(self._node())
+
+
+    def json_items(self):
+        """:return: the items of the node, sorted by key, except for 
+          *children*, which come last, as views; see 
+          :py:func:`.tree.dump_json`."""
+        items = sorted((k, v) for (k, v) in self._node().iteritems() if k != 'children')
+        if 'children' in self._node():
+            items.append(('children', self['children']))
+        return items
@@ -1,34 +1,66 @@
 """Tree walker for anlayzing game trees, represented as dictionaries.
 
 The tree walker can operates on tree dictionaries, or produce the trees from
-JSON data files.
+JSON data files, or binary tree files, see :py:mod:`.treefile`.
+
+The *children* keys of the trees read from files, scores, are converted to
+integers as the trees are read.  :py:func:`.iternodes` parses a JSON file
+incrementally, see :py:func:`.iterevents`, and produces the nodes of its
+tree from the leaves up, in memory proportional to the depth of the tree;
+:py:meth:`.TreeWalker.walkfile` walks JSON files that way.  Binary tree 
+files are walked from the root, reading the nodes on the walk's path only;
+see :py:func:`.openfile`.
 """
 
-from . import CODETABLE
+from . import *
 from . import score
+from . import treefile
 
 import json
+import re
+import shutil
 import sys
+import tempfile
 
 _EMPTY_PREFIX = tuple()
 
+CHUNK_SIZE = 1 << 16
+"""Number of bytes read at a time by :py:func:`.iterevents`."""
+
+_TOKEN = re.compile(r'[ \t\n\r]*(?:([][{},:])|(")|(-?[0-9]+)([.eE][-+.eE0-9]*)?|(true|false|null))')
+
+_NUMBER = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?$')
+"""JSON number grammar; :py:data:`._TOKEN` matches a number token as a 
+whole, to be checked against it."""
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+# Parser states of :py:func:`.iterevents`: the tokens expected next.
+(_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _NEXT, _DONE) = range(7)
+
 class Unimplemented(Exception):
     pass
 
 
+def _open(fname):
+    """:return: the named file, or :py:data:`sys.stdin` when the name is empty 
+      or null."""
+    return open(fname, 'r') if fname else sys.stdin
+
+
 def loadfile(fname=None):
     """Reads a JSON file from a named file or stadnard input.
 
     :param fname: name of the file, an empty or null file name indicates
       that input is from :py:data:`sys.stdin`.
-    :return: dictionary reprsenting a strategy tree.
+    :return: dictionary reprsenting a strategy tree, with integer scores as
+      the keys of *children*.
     """
-    fp = sys.stdin
-    if fname:
-        fp = open(fname, 'r')
-
-    d = json.load(fp)
-    fp.close()
+    fp = _open(fname)
+    try:
+        d = json.load(fp, object_hook=_tree_hook)
+    finally:
+        fp.close()
 
     if 'tree' in d:
         d = d['tree']
@@ -36,6 +68,302 @@ def loadfile(fname=None):
     return d
 
 
+def openfile(fname=None):
+    """Opens a tree file, JSON or binary.
+
+    :param fname: name of the file, an empty or null file name indicates
+      that input is from :py:data:`sys.stdin`, in JSON.
+    :return: dictionary representing a strategy tree, see
+      :py:func:`.loadfile`; for a binary tree file, a
+      :py:class:`.treefile.NodeView` of its tree, which reads the nodes
+      as they are looked up.
+
+    A JSON tree is assembled from its nodes as :py:func:`.iternodes` reads 
+    them, without holding the text of the file; the tree itself is held 
+    whole.  Convert it to a binary tree file with ``scripts/tree-convert`` 
+    to read large trees in bounded memory.
+    """
+    if fname:
+        with open(fname, 'rb') as fp:
+            magic = fp.read(len(treefile.MAGIC))
+        if magic == treefile.MAGIC:
+            return treefile.TreeFile(fname).node()
+    return _assemble(iternodes(fname))
+
+
+def _assemble(nodes):
+    """:param nodes: *(scores, node)* pairs; see :py:func:`.iternodes`.
+    :return: the tree of the nodes; null when there are none.
+    """
+    subtrees = {}   # the subtrees awaiting their parent, by scores.
+    for (scores, node) in nodes:
+        children = node.get('children')
+        if children:
+            node['children'] = dict((s, subtrees.pop(scores + (s,))) for s in children)
+        subtrees[scores] = node
+    return subtrees.get(())
+
+
+def _is_node(d):
+    """:return: true when the dictionary *d* represents a tree node."""
+    return 'root' in d and 'problem_size' in d
+
+
+def _tree_hook(d):
+    """JSON object hook converting the children keys of tree nodes to integers."""
+    children = d.get('children')
+    if children and _is_node(d):
+        d['children'] = dict((int(s), c) for (s, c) in children.iteritems())
+    return d
+
+
+def children(tree):
+    """:param tree: a tree node, in the dictionary representation.
+    :return: the node's *children*, by integer score; null when it has none.
+      The string scores of trees read with plain :py:func:`json.load` are
+      converted.
+    :raise MMException: if a score is not a number.
+    """
+    children = tree.get('children')
+    if children and not all(isinstance(s, (int, long)) for s in children):
+        subtrees = {}
+        for (s, c) in children.iteritems():
+            try:
+                subtrees[int(s)] = c
+            except ValueError:
+                raise MMException, "Score is not an integer: {!r}".format(s)
+        children = subtrees
+    return children
+
+
+def iterevents(fp, chunk_size=CHUNK_SIZE):
+    """Parses JSON text incrementally.
+
+    :param fp: input file object.
+    :param chunk_size: number of bytes read at a time.
+    :return: a generator of *(event, value)* pairs, where *event* is one of
+      ``start_map``, ``key``, ``end_map``, ``start_array``, ``end_array`` and
+      ``value``.  The *value* is the key of ``key`` events, the scalar of 
+      ``value`` events, and null otherwise.
+    :raise MMException: on malformed input.
+    """
+    scanstring = json.decoder.scanstring
+    buf = ''
+    pos = 0
+    eof = False
+    maps = []          # for each open container, true for objects.
+    state = _VALUE
+    while True:
+        m = _TOKEN.match(buf, pos)
+        if m and m.group(2):
+            try:
+                (value, end) = scanstring(buf, m.end())
+            except ValueError:
+                if eof:
+                    raise MMException, "Malformed JSON string at: {!r}".format(buf[pos:pos+40])
+                m = None
+        elif m and not m.group(1) and m.end() == len(buf) and not eof:
+            m = None   # the token may go on in the next chunk.
+
+        if m is None:
+            if eof:
+                if buf[pos:].strip():
+                    raise MMException, "Malformed JSON at: {!r}".format(buf[pos:pos+40])
+                if state != _DONE:
+                    raise MMException, "Truncated JSON."
+                return
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+
+        # the token must be allowed in the state.
+        c = m.group(1)
+        if c == '}':
+            ok = state in (_KEY_OR_END, _NEXT) and maps[-1]
+        elif c == ']':
+            ok = state in (_VALUE_OR_END, _NEXT) and not maps[-1]
+        elif c == ',':
+            ok = state == _NEXT
+        elif c == ':':
+            ok = state == _COLON
+        elif m.group(2) and state in (_KEY, _KEY_OR_END):
+            ok = True
+        else:
+            ok = state in (_VALUE, _VALUE_OR_END)
+        if not ok:
+            raise MMException, "Malformed JSON at: {!r}".format(buf[pos:pos+40])
+
+        if c:
+            end = m.end()
+            if c == '{':
+                maps.append(True)
+                state = _KEY_OR_END
+                yield ('start_map', None)
+            elif c == '}':
+                maps.pop()
+                state = _NEXT if maps else _DONE
+                yield ('end_map', None)
+            elif c == '[':
+                maps.append(False)
+                state = _VALUE_OR_END
+                yield ('start_array', None)
+            elif c == ']':
+                maps.pop()
+                state = _NEXT if maps else _DONE
+                yield ('end_array', None)
+            elif c == ',':
+                state = _KEY if maps[-1] else _VALUE
+            else:
+                state = _VALUE
+        else:
+            if m.group(2):
+                if state in (_KEY, _KEY_OR_END):
+                    state = _COLON
+                    yield ('key', value)
+                    pos = end
+                    continue
+                event = ('value', value)
+            elif m.group(3):
+                end = m.end()
+                number = m.group(3) + (m.group(4) or '')
+                if not _NUMBER.match(number):
+                    raise MMException, "Malformed JSON at: {!r}".format(buf[pos:pos+40])
+                if m.group(4):
+                    event = ('value', float(number))
+                else:
+                    event = ('value', int(number))
+            else:
+                end = m.end()
+                event = ('value', _LITERALS[m.group(5)])
+            state = _NEXT if maps else _DONE
+            yield event
+        pos = end
+
+
+def iternodes(fname=None, result=None):
+    """Reads the nodes of a tree from a JSON file, from the leaves up, in 
+    memory proportional to the depth of the tree.
+
+    :param fname: name of the file, an empty or null file name indicates
+      that input is from :py:data:`sys.stdin`.
+    :param result: optional dictionary, updated with the items of the tree 
+      result other than its tree once the nodes are read; it stays empty 
+      for a file holding a tree only.
+    :return: a generator of *(scores, node)* pairs: *scores* are the scores
+      on the path from the root to the node, and *node* is the node's 
+      dictionary, whose *children* have no *children* of their own.  A node 
+      follows its children; the root is last.
+    """
+    fp = _open(fname)
+    try:
+        for (path, node) in _iternodes(iterevents(fp), result):
+            yield (tuple(s for (_, s) in path), node)
+    finally:
+        fp.close()
+
+
+def iterpaths(fname=None):
+    """Reads the nodes of a tree from a JSON file, as :py:func:`.iternodes`
+    does, with their paths from the root.
+
+    :param fname: name of the file, an empty or null file name indicates
+      that input is from :py:data:`sys.stdin`.
+    :return: a generator of *(path, node)* pairs: *path* is the sequence of
+      *(guess, score)* pairs from the root to the node; see 
+      :py:class:`.Context`.
+
+    The roots of the nodes precede their children in the files written by 
+    :py:func:`.tree.dump_json`.  Files written with sorted keys, by 
+    :py:func:`json.dump`, have the children first; the roots are then 
+    gathered in a first pass over the file, and standard input is spooled
+    to a temporary file for the second.
+    """
+    fp = _open(fname)
+    try:
+        if not fname:
+            spool = tempfile.TemporaryFile()
+            shutil.copyfileobj(fp, spool)
+            spool.seek(0)
+            fp = spool
+
+        n = 0
+        for (path, node) in _iternodes(iterevents(fp)):
+            if any(root is None for (root, _) in path):
+                if n:
+                    raise MMException, "Root read after its children at: {}".format(path)
+                break
+            yield (path, node)
+            n += 1
+        else:
+            return
+
+        # children before roots: the roots of the nodes with children first.
+        fp.seek(0)
+        roots = dict((tuple(s for (_, s) in path), node['root']) 
+                     for (path, node) in _iternodes(iterevents(fp)) if node.get('children'))
+        fp.seek(0)
+        for (path, node) in _iternodes(iterevents(fp)):
+            scores = tuple(s for (_, s) in path)
+            yield (tuple((roots[scores[:i]], s) for (i, s) in enumerate(scores)), node)
+    finally:
+        fp.close()
+
+
+def _iternodes(events, result=None):
+    """Builds the values of JSON events, and strips tree nodes of their 
+    grandchildren.
+
+    :param events: see :py:func:`.iterevents`.
+    :param result: see :py:func:`.iternodes`.
+    :return: a generator of *(path, node)* pairs for the tree nodes, with
+      null guesses in *path* for the roots not read yet; see 
+      :py:func:`.iterpaths`.
+    """
+    stack = []   # [container, key] pairs.
+    value = None
+    for (event, v) in events:
+        if event == 'key':
+            stack[-1][1] = v
+            continue
+        if event == 'start_map':
+            stack.append([{}, None])
+            continue
+        if event == 'start_array':
+            stack.append([[], None])
+            continue
+
+        if event == 'value':
+            value = v
+        else:
+            value = stack.pop()[0]
+            if event == 'end_map' and _is_node(value):
+                children = value.get('children')
+                if children:
+                    value['children'] = dict(
+                        (int(s), dict((k, x) for (k, x) in c.iteritems() if k != 'children'))
+                        for (s, c) in children.iteritems())
+                yield (_path(stack), value)
+            if not stack and result is not None and isinstance(value, dict) \
+                    and 'tree' in value:
+                result.update((k, x) for (k, x) in value.iteritems() if k != 'tree')
+
+        if stack:
+            (container, key) = stack[-1]
+            if key is None:
+                container.append(value)
+            else:
+                container[key] = value
+
+
+def _path(stack):
+    """:return: the *(guess, score)* pairs leading to the tree node being 
+      built on top of *stack*; see :py:func:`._iternodes`."""
+    return tuple((stack[i-1][0].get('root'), int(stack[i][1])) for i in xrange(1, len(stack)) 
+                 if stack[i-1][1] == 'children')
+
+
 class Context(object):
     """Traversal context for a recursive tree walk.
 
@@ -126,10 +454,17 @@ class TreeWalkerContext(Context):
 
 
     def child(self, score, root):
-        """Override of parent implementation to pass the subtree.
+        """Override of parent implementation to pass the subtree; null when
+        the context has no tree, as in :py:meth:`.TreeWalker.walknodes`.
+
+        :raise MMException: if the tree has no subtree for *score*; see
+          :py:func:`.children`.
         """
-        children = self.tree['children']
-        subtree = children.get(score, children.get(str(score)))
+        if self.tree is None:
+            return super(TreeWalkerContext, self).child(score, root, tree=None)
+        subtree = (children(self.tree) or {}).get(score)
+        if subtree is None:
+            raise MMException, "No subtree for score {} at: {}".format(score, self.path)
         return super(TreeWalkerContext, self).child(score, root, tree=subtree)
 
 
@@ -155,11 +490,49 @@ class TreeWalker(object):
 
     def walkfile(self, fname=None):
         """
-        :param fname: name of the file to read the JSON encoding of the tree from.
-          If null, the loader will use :py:data:`sys.stdin`.
+        :param fname: name of the file to read the tree from, JSON or binary;
+          see :py:func:`.openfile`.  If null, the loader will read JSON from
+          :py:data:`sys.stdin`.
+
+        A binary tree file is walked from the root, see 
+        :py:meth:`.TreeWalker.walktree`; a JSON file from the leaves up, as 
+        it is read, see :py:meth:`.TreeWalker.walknodes`.
+        """
+        if fname:
+            with open(fname, 'rb') as fp:
+                magic = fp.read(len(treefile.MAGIC))
+            if magic == treefile.MAGIC:
+                self.walktree(openfile(fname))
+                return
+        self.walknodes(iterpaths(fname))
+
+
+    def walknodes(self, nodes):
+        """Applies the action to the nodes of a tree, from the leaves up.
+
+        :param nodes: *(path, node)* pairs, children before their parent; 
+          see :py:func:`.iterpaths`.
+
+        The context of a node has the node as its tree, with children less
+        their own subtrees; the contexts of its ancestors have no tree.  
+        Every node is visited: the result of the action is ignored.
         """
-        tree = loadfile(fname)
-        self.walktree(tree)
+        chain = []   # the contexts from the root to the latest node.
+        for (path, node) in nodes:
+            roots = tuple(c for (c, _) in path) + (node['root'],)
+            k = 0
+            while k < min(len(chain), len(roots)) and chain[k].root == roots[k] \
+                    and chain[k].path == path[:k]:
+                k += 1
+            del chain[k:]
+            for i in xrange(k, len(roots)):
+                if i == 0:
+                    chain.append(self.context(None, tuple(), roots[0], tree=None))
+                else:
+                    chain.append(chain[-1].child(path[i-1][1], roots[i]))
+            ctx = chain[-1]
+            ctx.tree = node
+            self.action(ctx)
 
 
     def walktree(self, tree):
@@ -187,20 +560,26 @@ class TreeWalker(object):
         """
         if self.action(ctx):
             root = ctx.root
-            children = ctx.tree.get('children')
-            if children:
-                for (score, child) in children.iteritems():
-                    self.walk(self._childctx(ctx, int(score), child))
+            subtrees = children(ctx.tree)
+            if subtrees:
+                for (score, child) in subtrees.iteritems():
+                    self.walk(self._childctx(ctx, score, child))
 
 
 def play(secret, tree):
     """Play the strategy tree against the secret code.
 
     :param secret: numeric code to use as the hidden code.
-    :param tree: strategy tree, expressed as a dictionary.
+    :param tree: strategy tree, expressed as a dictionary with integer
+      scores as the keys of *children*; or a :py:class:`.treefile.TreeFile`.
     :return: a sequence of *(code, score)* pairs, terminating
       with perfect score and the secret code.
+    :raise MMException: if a score of the tree is not a number; see
+      :py:func:`.children`.
     """
+    if hasattr(tree, 'play'):
+        return tree.play(secret)
+
     path = []
     cur = tree
     while cur:
@@ -210,9 +589,8 @@ def play(secret, tree):
         if s == CODETABLE.PERFECT_SCORE:
             break
 
-        children = cur.get('children')
-        if children:
-            cur = children.get(s, children.get(str(s)))
+        subtrees = children(cur)
+        cur = subtrees.get(s) if subtrees else None
 
     return tuple(path)
 
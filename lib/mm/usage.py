@@ -80,9 +80,15 @@ class Timer(descr.WithDescription):
 
 
 
-    def __init__(self):
-        """Initializes the object, and starts the timer."""
+    def __init__(self, children=False):
+        """Initializes the object, and starts the timer.
+
+        :param children: when true, the timer also counts the CPU time of 
+          the child processes waited for between start and stop.
+        """
+        self.children = children
         self._start = self.getrusage(res.RUSAGE_SELF)
+        self._start_children = res.getrusage(res.RUSAGE_CHILDREN) if children else None
         self.delta = None
         """Difference in rusage between the last start/stop rusage instants;
         an instance of :py:class:`.Timer.CPUTime`.
@@ -99,7 +105,7 @@ class Timer(descr.WithDescription):
 
     def start(self):
         """Start time; equivalent to :py:meth:`.Timer.__init__`."""
-        self.__init__()
+        self.__init__(self.children)
 
 
     def stop(self):
@@ -109,20 +115,25 @@ class Timer(descr.WithDescription):
         """
         end = self.getrusage(res.RUSAGE_SELF)
         self.delta = Timer.CPUTime(self._start, end)
+        if self.children:
+            ru = res.getrusage(res.RUSAGE_CHILDREN)
+            self.delta.utime += ru.ru_utime - self._start_children.ru_utime
+            self.delta.stime += ru.ru_stime - self._start_children.ru_stime
         return self.delta
 
 
-def time(fn):
+def time(fn, children=False):
     """Runs the function *fn*, within a timer start/stop interval.
 
     :param fn: a function to be executed under a timer.
+    :param children: see :py:class:`.Timer`.
     :return: a tuple *(delta, r)*, where *delta* is the 
       timer's *delta*, an instance of :py:class:`.Timer.CPUTime`, measured
       around the function execution, and *r* is the value returned from the
       function.
     """
 
-    t = Timer()
+    t = Timer(children)
     t.start()
     r = fn()
     delta = t.stop()
@@ -23,6 +23,10 @@ EMPTY_SET  = frozenset()
 VERSION = 1
 STORAGE_PATH = 'var/xftable'
 
+LOOKUP_TYPECODE = 'H'
+"""Element type of the stored transformation lookup tables; see :py:mod:`array`.
+Entries are numeric codes, which fit in an unsigned short."""
+
 def permutations(v):
     """Yields all permutation of the input tuple ``v``.
     The permuations are strictly by position.  So, a 
@@ -226,19 +230,28 @@ class TransformLookupTable(singleton.SingletonBehavior):
     ALL = None
     """All transformations."""
 
-    def __init__(self):
+    def __init__(self, pos_table=None, color_table=None):
+        """:param pos_table: precomputed position permutation lookup table;
+          computed when null.
+        :param color_table: precomputed color permutation lookup table;
+          computed when null.
+        """
         self.xftbl = TransformTable()
 
-        TransformLookupTable.POS_LOOKUP_TABLE = tuple(
-            tuple(CODETABLE.encode(self.xftbl.apply_pp(i, CODETABLE.CODES[c]))
-                  for i in xrange(self.NPOSPERMS))
-            for c in CODETABLE.ALL)
+        if pos_table is None:
+            pos_table = tuple(
+                tuple(CODETABLE.encode(self.xftbl.apply_pp(i, CODETABLE.CODES[c]))
+                      for i in xrange(self.NPOSPERMS))
+                for c in CODETABLE.ALL)
 
-        TransformLookupTable.COLOR_LOOKUP_TABLE = tuple(
-            tuple(CODETABLE.encode(self.xftbl.apply_cp(i, CODETABLE.CODES[c]))
-                  for i in xrange(self.NCOLORPERMS))
-            for c in CODETABLE.ALL)
+        if color_table is None:
+            color_table = tuple(
+                tuple(CODETABLE.encode(self.xftbl.apply_cp(i, CODETABLE.CODES[c]))
+                      for i in xrange(self.NCOLORPERMS))
+                for c in CODETABLE.ALL)
 
+        TransformLookupTable.POS_LOOKUP_TABLE = pos_table
+        TransformLookupTable.COLOR_LOOKUP_TABLE = color_table
         TransformLookupTable.ALL = self.xftbl.ALL
 
         self.POS_LOOKUP_TABLE = TransformLookupTable.POS_LOOKUP_TABLE
@@ -246,6 +259,25 @@ class TransformLookupTable(singleton.SingletonBehavior):
         self.ALL = TransformLookupTable.ALL
 
 
+    def to_mapped(self):
+        """:return: the tables to be stored by :py:class:`.loader.MappedLoader`."""
+        return (('pos', LOOKUP_TYPECODE, self.POS_LOOKUP_TABLE),
+                ('color', LOOKUP_TYPECODE, self.COLOR_LOOKUP_TABLE))
+
+
+    @classmethod
+    def from_mapped(cls, tables):
+        """Reconstructs the singleton instance from mapped tables.
+
+        :param tables: dictionary of tables produced by :py:meth:`.to_mapped`.
+        :return: the singleton instance.
+        """
+        tbl = cls.__new__(cls)
+        tbl.__init__(tables['pos'], tables['color'])
+        tbl.__setstate__({}) # register as the singleton, like unpickling.
+        return tbl
+
+
     def apply(self, t, c):
         """Applies the information to the numeric code.
 
@@ -298,8 +330,8 @@ def initialize():
     if XF_LOOKUP_TABLE is not None:
         return
 
-    spec = loader.StorageSpec(VERSION, STORAGE_PATH)
-    ldr = loader.Loader(TransformLookupTable, spec)
+    spec = loader.MappedStorageSpec(VERSION, STORAGE_PATH)
+    ldr = loader.MappedLoader(TransformLookupTable, spec)
 
     tbl = ldr.get()
 
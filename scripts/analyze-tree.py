@@ -1,6 +1,6 @@
 from mm import CODETABLE
 from mm.partition import PartitionResult
-from mm.treewalk import TreeWalker, TreeWalkerContext, play, loadfile
+from mm.treewalk import TreeWalker, TreeWalkerContext
 from mm.xforms import TransformTable
 from mm.distinct import PrefixGen
 
@@ -19,6 +19,7 @@ LENGTH_SIZE_MAP = defaultdict(lambda: defaultdict(int))
 XFTBL = TransformTable()
 
 RECORDS = []
+SUMMARY = None
 MAX_PFX_LEN = 0
 PRINTED_PFX_LEN = 0
 
@@ -78,11 +79,15 @@ def action(ctx):
     global SEEN
     global MAX_PFX_LEN
     global RECORDS
+    global SUMMARY
 
     tree = ctx.tree
     path = ctx.path
     cpfx = ctx.prefix
 
+    if ctx.parent is None:
+        SUMMARY = Summary(tree)
+
     psize = tree['problem_size']
     if psize <= 2:
         return False
@@ -122,9 +127,10 @@ def action(ctx):
 
 class Summary(object):
     def __init__(self, tree):
-        games = map(lambda c: play(c, tree), CODETABLE.ALL)
-        self.maxlen = max(map(len, games))
-        self.moves = sum(map(len, games))
+        # the stats of the root cover the games against every code.
+        stats = tree['stats']
+        self.maxlen = stats['max_depth']
+        self.moves = stats['total_moves']
 
     def mean_game(self):
         return float(self.moves)/CODETABLE.NCODES
@@ -135,7 +141,7 @@ class Summary(object):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--input', '-i', help="Input file, default: stdin.",
+    parser.add_argument('--input', '-i', help="JSON or binary tree file, default: JSON from stdin.",
                         default=None, type=str, dest='fname')
 
     args = parser.parse_args()
@@ -155,9 +161,8 @@ def main():
 
     tw = TreeWalker(action, Ctx)
 
-    tree = loadfile(fname)
-    tw.walktree(tree)
-    summary = Summary(tree)
+    tw.walkfile(fname)
+    summary = SUMMARY
 
     global PRINTED_PFX_LEN
     PRINTED_PFX_LEN = (len(str(CODETABLE.CODES[0]))+2) * MAX_PFX_LEN + 2
@@ -0,0 +1,74 @@
+"""Throughput benchmark for serving a strategy tree: games played against
+all secret codes, per second, walking the tree's dictionary representation,
+a binary tree file, and the compiled strategy table."""
+
+from mm import CODETABLE
+from mm.strategy import STRATEGIES
+import mm.strategy.all
+import mm.builder as builder
+import mm.score as score
+import mm.strategytable as strategytable
+import mm.treefile as treefile
+import mm.treewalk as treewalk
+
+import argparse
+import os
+import tempfile
+import timeit
+
+def parser():
+    p = argparse.ArgumentParser(description='Strategy tree play benchmark.')
+    p.add_argument('--input', '-i', type=str, dest='fname',
+                   help='Tree file, JSON; default: build a min_largest tree.',
+                   action='store', default=None)
+    p.add_argument('--repeat', '-r', type=int, dest='repeat',
+                   help='Number of passes over all secret codes.',
+                   action='store', default=5)
+    return p
+
+
+def play_rate(play, repeat):
+    """:return: games per second, playing with *play* against every code
+      *repeat* times."""
+    t = timeit.default_timer()
+    for _ in xrange(repeat):
+        for secret in CODETABLE.ALL:
+            play(secret)
+    t = timeit.default_timer() - t
+    return repeat * CODETABLE.NCODES / t
+
+
+def main():
+    args = parser().parse_args()
+    score.initialize()
+
+    if args.fname:
+        tree = treewalk.loadfile(args.fname)
+    else:
+        b = builder.TreeBuilder(STRATEGIES['min_largest'], CODETABLE.ALL, None)
+        tree = b.build(7, 8).tree.as_dict()
+
+    (fd, path) = tempfile.mkstemp(suffix='.mmt')
+    os.close(fd)
+    try:
+        treefile.write(path, tree)
+        with treefile.TreeFile(path) as tf:
+            start = timeit.default_timer()
+            table = strategytable.StrategyTable.from_treefile(tf)
+            compiled = timeit.default_timer() - start
+
+            expected = [treewalk.play(secret, tree) for secret in CODETABLE.ALL]
+            assert expected == [table.play(secret) for secret in CODETABLE.ALL]
+
+            print "nodes={}; table={} bytes; compiled in {:.2f}ms".format(
+                len(table), table.nbytes, compiled * 1000)
+            fmt = "{:>12s}: {:9.0f} games/s"
+            print fmt.format('dict', play_rate(lambda s: treewalk.play(s, tree), args.repeat))
+            print fmt.format('treefile', play_rate(tf.play, args.repeat))
+            print fmt.format('table', play_rate(table.play, args.repeat))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
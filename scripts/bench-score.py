@@ -0,0 +1,99 @@
+"""Benchmark for the score lookup table: generation time of the batched
+kernel against the pairwise builder, and memory footprint, partition
+throughput and lookup rate of the array-backed table, computed and as loaded
+from the mapped file, against the former tuple-of-tuples representation."""
+
+from mm import CODETABLE
+import mm.partition as partition
+import mm.score as score
+
+import argparse
+import sys
+import timeit
+
+def parser():
+    p = argparse.ArgumentParser(description='Score table benchmark.')
+    p.add_argument('--repeat', '-r', type=int, dest='repeat',
+                   help='Number of passes over all roots.',
+                   action='store', default=3)
+    p.add_argument('--skip-generate', '-G',
+                   help='Do not time score table generation.',
+                   action='store_true', dest='skip_generate',
+                   default=False)
+    return p
+
+
+def table_size(tbl):
+    """:return: approximate size in bytes of a row-indexable table, or
+      None when :py:func:`sys.getsizeof` is not supported (e.g. pypy)."""
+    try:
+        total = sys.getsizeof(tbl)
+        for row in tbl:
+            total += sys.getsizeof(row)
+        return total
+    except TypeError:
+        return None
+
+
+def partition_rate(tbl, repeat):
+    """:return: partitions of the full code set per second, using *tbl*
+      as the score lookup table."""
+    saved = score.LOOKUP_TABLE
+    score.LOOKUP_TABLE = tbl
+    try:
+        t = timeit.default_timer()
+        for _ in xrange(repeat):
+            for root in CODETABLE.ALL:
+                partition.PartitionResult(CODETABLE.ALL, root)
+        t = timeit.default_timer() - t
+    finally:
+        score.LOOKUP_TABLE = saved
+    return repeat * CODETABLE.NCODES / t
+
+
+def lookup_rate(tbl, repeat):
+    """:return: score lookups per second, ``tbl[c1][c2]``, over all pairs of
+      codes."""
+    codes = CODETABLE.ALL
+    t = timeit.default_timer()
+    for _ in xrange(repeat):
+        for c1 in codes:
+            for c2 in codes:
+                tbl[c1][c2]
+    t = timeit.default_timer() - t
+    return repeat * CODETABLE.NCODES * CODETABLE.NCODES / t
+
+
+def generation_time(gen):
+    """:return: seconds spent computing the score table with *gen*."""
+    t = timeit.default_timer()
+    gen()
+    return timeit.default_timer() - t
+
+
+def main():
+    args = parser().parse_args()
+
+    if not args.skip_generate:
+        fmt = "{:>16s}: generation={:8.3f}s"
+        for (name, gen) in (('pairwise', score._genscoretable_pairwise),
+                            ('batched', score._genscoretable)):
+            print fmt.format(name, generation_time(gen))
+
+    score.initialize()
+
+    mapped = score.LOOKUP_TABLE
+    computed = score._genscoretable()
+    legacy = tuple(tuple(row) for row in mapped)
+
+    fmt = "{:>16s}: size={:>12s} bytes; partitions/s={:10.1f}; lookups/s={:12.0f}"
+    for (name, tbl) in (('tuple-of-tuples', legacy), ('computed rows', computed),
+                        ('mapped rows', mapped)):
+        sz = table_size(tbl)
+        print fmt.format(name, 'n/a' if sz is None else '{:,d}'.format(sz),
+                         partition_rate(tbl, args.repeat),
+                         lookup_rate(tbl, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
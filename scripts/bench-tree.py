@@ -0,0 +1,59 @@
+"""Benchmark for the tree builder's solver: subproblems entered per second
+of CPU time, with the transposition table disabled."""
+
+from mm import CODETABLE
+from mm.strategy import STRATEGIES
+import mm.strategy.all
+import mm.builder as builder
+import mm.score as score
+import mm.xforms as xforms
+
+import argparse
+import resource
+
+def parser():
+    p = argparse.ArgumentParser(description='Tree builder benchmark.')
+    p.add_argument('--strategy', '-s', type=str, dest='strategy',
+                   help='Strategy name.',
+                   action='store', default='min_largest')
+    p.add_argument('--max-depth', '-m', type=int, dest='maxdepth',
+                   help='Maximum tree depth.',
+                   action='store', default=6)
+    p.add_argument('--root', '-r', type=int, dest='root',
+                   help='Initial guess.',
+                   action='store', default=8)
+    p.add_argument('--repeat', '-n', type=int, dest='repeat',
+                   help='Number of builds.',
+                   action='store', default=3)
+    return p
+
+
+def node_rate(strategy, maxdepth, root, repeat):
+    """:return: a triple: subproblems entered per second, and the CPU 
+      seconds of a build, at the best of *repeat* builds, and the tree built.
+      User CPU time varies less than wall time with the load of the host."""
+    best = None
+    for _ in xrange(repeat):
+        b = builder.TreeBuilder(strategy, CODETABLE.ALL, None)
+        # table hits would hide the cost of the solver.
+        b.transpositions.maxsize = 0
+        t = resource.getrusage(resource.RUSAGE_SELF).ru_utime
+        result = b.build(maxdepth, root)
+        t = resource.getrusage(resource.RUSAGE_SELF).ru_utime - t
+        best = t if best is None else min(t, best)
+    return (b.entry_count / best, best, result)
+
+
+def main():
+    args = parser().parse_args()
+    score.initialize()
+    xforms.initialize()
+
+    strategy = STRATEGIES[args.strategy]
+    (rate, cpu, result) = node_rate(strategy, args.maxdepth, args.root, args.repeat)
+    print "{}: nodes/s={:.1f}; cpu={:.3f}s; total_moves={}".format(
+        args.strategy, rate, cpu, result.tree.stats.total_moves if result.tree else None)
+
+
+if __name__ == '__main__':
+    main()
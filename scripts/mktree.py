@@ -2,11 +2,14 @@ from mm import *
 from mm.strategy import STRATEGIES
 import mm.strategy.all
 
+import mm.checkpoint as checkpoint
+import mm.ordering as ordering
 import mm.score as score
 import mm.xforms as xforms
 
 
 import argparse
+import os
 import sys
 
 def initialize():
@@ -27,6 +30,11 @@ def parser():
                    action='store', dest='maxdepth',
                    default=6)
 
+    p.add_argument('--deepen', '-d',
+                   help='Find the smallest tree depth, up to the maximum depth, and build a tree of that depth.',
+                   action='store_true', dest='deepen',
+                   default=False)
+
     p.add_argument('--list', '-l',
                    help='List strategies',
                    action='store_true', dest='list_strategies',
@@ -47,8 +55,56 @@ def parser():
                    action='store', dest='output',
                    default=None)
 
+    p.add_argument('--ordering', '-O', type=str,
+                   help='Candidate ordering policy: {}; default is none'.format(
+            ', '.join(sorted(ordering.ORDERINGS.keys()))),
+                   action='store', dest='ordering',
+                   choices=sorted(ordering.ORDERINGS.keys()),
+                   default='none')
+
+    p.add_argument('--workers', '-w', type=int,
+                   help='Number of processes building the tree; default is 1',
+                   action='store', dest='workers',
+                   default=1)
+
+    p.add_argument('--parallel-depth', type=int,
+                   help='Depth of the subproblems solved by the worker processes; default is 1',
+                   action='store', dest='parallel_depth',
+                   default=1)
+
+    p.add_argument('--checkpoint', '-c',
+                   help='Checkpoint file, saved periodically during the build; default is no checkpoint.',
+                   action='store', dest='checkpoint',
+                   default=None)
+
+    p.add_argument('--checkpoint-interval', type=int,
+                   help='Seconds between checkpoint saves; 0 saves at the end of the build only; default is {}'.format(
+            checkpoint.DEFAULT_INTERVAL),
+                   action='store', dest='checkpoint_interval',
+                   default=checkpoint.DEFAULT_INTERVAL)
+
+    p.add_argument('--resume',
+                   help='Resume the build saved in the checkpoint file, skipping the subproblems already solved.',
+                   action='store_true', dest='resume',
+                   default=False)
+
+    p.add_argument('--time-limit', '-t', type=float,
+                   help='Seconds allowed for the build; the best tree found in time is returned, and each improvement is written to the output file.  Default is no limit.',
+                   action='store', dest='time_limit',
+                   default=None)
+
+    p.add_argument('--greedy', '-g', type=str,
+                   help='Strategy building the initial tree of a build with a time limit; default is min_largest',
+                   action='store', dest='greedy',
+                   default='min_largest')
+
+    p.add_argument('--compact',
+                   help='Write the tree without indentation or whitespace.',
+                   action='store_true', dest='compact',
+                   default=False)
+
     p.add_argument('--progress', '-p',
-                   help='Progress socket destination, including identifier; default is unix://default//tmp/mm.progress.<pid>',
+                   help='Progress socket destination, including identifier, or "none" to disable progress reporting; default is unix://default//tmp/mm.progress.<pid>',
                    action='store', dest='progress',
                    default=None)
 
@@ -77,6 +133,13 @@ def list_strategies(showdocs, output=sys.stdout):
         print >>output, fmt.format(*data(name))
 
 
+def write_result(t, output, compact=False):
+    """Writes a tree result to a file, replacing it atomically."""
+    tmp = output + '.tmp'
+    t.to_json_file(tmp, compact)
+    os.rename(tmp, output)
+
+
 def main():
     p = parser()
     args = p.parse_args()
@@ -106,14 +169,69 @@ def main():
             0, CODETABLE.NCODES-1, args.root)
         sys.exit(1)
 
+    if args.workers <= 0:
+        print >>sys.stderr, "Number of workers must be a positive integer."
+        sys.exit(1)
+
+    if args.parallel_depth <= 0:
+        print >>sys.stderr, "Parallel depth must be a positive integer."
+        sys.exit(1)
+
+    if args.resume and not args.checkpoint:
+        print >>sys.stderr, "A checkpoint file is required to resume a build."
+        sys.exit(1)
+
+    if args.checkpoint_interval < 0:
+        print >>sys.stderr, "Checkpoint interval must be a non-negative integer."
+        sys.exit(1)
+
+    if args.time_limit is not None:
+        if args.time_limit < 0:
+            print >>sys.stderr, "Time limit must be a non-negative number."
+            sys.exit(1)
+        if args.workers > 1:
+            print >>sys.stderr, "A build with a time limit runs with a single worker."
+            sys.exit(1)
+
+    if args.deepen and (args.checkpoint or args.time_limit is not None):
+        print >>sys.stderr, "Iterative deepening does not support checkpoints or time limits."
+        sys.exit(1)
+
+    greedy = STRATEGIES.get(args.greedy)
+    if not greedy:
+        print >>sys.stderr, "Unknown greedy strategy name: '{}'".format(args.greedy)
+        sys.exit(1)
+
+    on_improvement = None
+    if args.output:
+        on_improvement = lambda t: write_result(t, args.output, args.compact)
+
     initialize()
 
-    t = s.build_tree(CODETABLE.ALL, args.maxdepth, args.root, progress=args.progress)
+    ckpt = None
+    if args.checkpoint:
+        ckpt = checkpoint.Checkpoint(args.checkpoint, args.checkpoint_interval)
+
+    try:
+        if args.resume and not ckpt.load():
+            print >>sys.stderr, "Checkpoint file not found, starting a new build: {}".format(
+                args.checkpoint)
+
+        t = s.build_tree(CODETABLE.ALL, args.maxdepth, args.root, progress=args.progress,
+                         workers=args.workers, parallel_depth=args.parallel_depth,
+                         checkpoint=ckpt,
+                         ordering=ordering.ORDERINGS[args.ordering](),
+                         time_limit=args.time_limit, greedy=greedy,
+                         on_improvement=on_improvement, deepen=args.deepen)
+    except MMException, e:
+        print >>sys.stderr, e
+        sys.exit(1)
 
     if args.output:
-        t.to_json_file(args.output)
+        write_result(t, args.output, args.compact)
     else:
-        print t.as_json_string()
+        t.write_json(sys.stdout, args.compact)
+        print
 
 
 if __name__ == '__main__':
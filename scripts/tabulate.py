@@ -1,3 +1,9 @@
+"""Tabulates the nodes of a strategy tree as CSV.
+
+Usage: tabulate [FILE], where *FILE* is a JSON or binary tree file; default
+is JSON from stdin.  The nodes of a JSON tree are listed from the leaves up,
+as they are read."""
+
 from mm import *
 
 import mm.distinct as distinct
@@ -14,11 +20,13 @@ def initialize():
 
 
 def populate_stats(tree):
+    """Derives the stats of a node missing them from the stats of its 
+    children, which the walk visits first; see 
+    :py:meth:`mm.treewalk.TreeWalker.walknodes`."""
     if tree.get('stats') and 'total_moves' in tree.get('stats'):
         return tree
 
     children = tree.get('children') or {}
-    children = { int(s): populate_stats(c) for (s, c) in children.iteritems() }
     
     stats = { 'problem_size': tree['problem_size'],
               'in_solution': tree['in_solution'], }
@@ -60,7 +68,7 @@ def populate_stats(tree):
 
 
 def action(ctx):
-    tree = ctx.tree
+    tree = populate_stats(ctx.tree)
     pfx  = ctx.prefix
 
     vpfx = (CODETABLE.CODES[c] for c in pfx)
@@ -82,11 +90,11 @@ def action(ctx):
     return True
 
 
-def print_tree(tree):
+def print_tree(fname):
     print ','.join(('prefix', 'prefix_length', 'problem_size', 'total_moves', 'max_depth',
                     'in_solution', 'optimal', 'child_sizes'))
     w = tw.TreeWalker(action)
-    w.walktree(tree)
+    w.walkfile(fname)
 
 def main():
     initialize()
@@ -94,10 +102,8 @@ def main():
     fname = None
     if len(sys.argv) > 1:
         fname = sys.argv[1]
-    tree = tw.loadfile(fname)
 
-    tree = populate_stats(tree)
-    print_tree(tree)
+    print_tree(fname)
 
 
 if __name__ == '__main__':
@@ -48,7 +48,7 @@ def edit_cell(e):
         edwin.bind('<Escape>', lambda e: close_ed(w, edwin))
 
 def mk_key(TagList, key):
-    return '.'.join(TagList+[key])
+    return '.'.join(map(str, TagList+[key]))
 
 def JSONTree(Tree, Parent, Dictionery, TagList=[]):
     for key in sorted(Dictionery.keys()) :
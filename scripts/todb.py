@@ -23,11 +23,13 @@ def node_id(ctx):
 
 
 def populate_stats(tree):
+    """Derives the stats of a node missing them from the stats of its 
+    children, which the walk visits first; see 
+    :py:meth:`mm.treewalk.TreeWalker.walknodes`."""
     if tree.get('stats') and 'total_moves' in tree.get('stats'):
         return tree
 
     children = tree.get('children') or {}
-    children = { int(s): populate_stats(c) for (s, c) in children.iteritems() }
     
     stats = { 'problem_size': tree['problem_size'],
               'in_solution': tree['in_solution'], }
@@ -69,7 +71,7 @@ def populate_stats(tree):
 
 
 def action(ctx):
-    tree = ctx.tree
+    tree = populate_stats(ctx.tree)
     pfx  = ctx.prefix
 
     ctx.tree_id = node_id(ctx)
@@ -106,14 +108,14 @@ def action(ctx):
     return True
 
 
-def print_tree(tree):
+def print_tree(fname):
     w = treewalk.TreeWalker(action)
-    w.walktree(tree)
+    w.walkfile(fname)
 
 
 def parser():
     p = argparse.ArgumentParser(description="Tree to librebase tree_node table.")
-    p.add_argument('--input', '-i', help="JSON input file",
+    p.add_argument('--input', '-i', help="JSON or binary tree file, default: JSON from stdin.",
                    type=str, action='store', dest='fname', default=None)
     p.add_argument('--name', '-n', help="Tree name",
                    type=str, action='store', dest='name', required=True)
@@ -130,10 +132,7 @@ def main():
     global ROOT_ID
     ROOT_ID = args.name
 
-    tree = treewalk.loadfile(fname)
-
-    tree = populate_stats(tree)
-    print_tree(tree)
+    print_tree(fname)
 
 
 if __name__ == '__main__':
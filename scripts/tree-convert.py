@@ -0,0 +1,31 @@
+"""Converts strategy trees between the JSON representation, see
+:py:meth:`mm.tree.TreeResult.as_dict`, and binary tree files, see
+:py:mod:`mm.treefile`.  The tree is converted a node at a time, either way."""
+
+import mm.tree as tree
+import mm.treefile as treefile
+import mm.treewalk as treewalk
+
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='Strategy tree file conversion.')
+    parser.add_argument('--to-json', '-j', action='store_true', default=False,
+                        dest='to_json',
+                        help="Convert a tree file to JSON; default: JSON to a tree file.")
+    parser.add_argument('input', help="Input file.")
+    parser.add_argument('output', help="Output file.")
+
+    args = parser.parse_args()
+    if args.to_json:
+        with treefile.TreeFile(args.input) as tf:
+            meta = tf.metadata()
+            d = tf.node() if meta is None else dict(meta, tree=tf.node())
+            with open(args.output, 'w') as fp:
+                tree.dump_json(d, fp)
+    else:
+        result = {}
+        treefile.write_nodes(args.output, treewalk.iternodes(args.input, result), result)
+
+if __name__ == '__main__':
+    main()
@@ -1,60 +1,53 @@
-from mm import CODETABLE
-from mm.partition import PartitionResult
-from mm.treewalk import TreeWalker, TreeWalkerContext, play, loadfile
+from mm import CODETABLE, MMException
+from mm.treewalk import iternodes
+import mm.score as score
 
 import argparse
-from collections import defaultdict
-import locale
-import os
 import sys
 
-class Ctx(TreeWalkerContext):
-    def __init__(self, parent, path, root, tree=None):
-        super(Ctx, self).__init__(parent, path, root, tree=tree)
+def verify(nodes):
+    """Checks that every subtree of a tree solves the subproblem its score
+    defines, and that the problem sizes recorded add up.
+
+    The nodes come from the leaves up; the problem of a subtree is the set of
+    codes it finds, which its parent checks against its own root.
+
+    :param nodes: *(scores, node)* pairs; see :py:func:`mm.treewalk.iternodes`.
+    :return: the number of errors found.
+    """
+    errors = 0
+    problems = {}   # codes found by each subtree awaiting its parent, by scores.
+    for (scores, tree) in nodes:
+        root = tree['root']
+        problem = set([root]) if tree['in_solution'] else set()
+        stats = tree.get('stats')
+        optimal = stats.get('optimal', 'n/a') if stats else 'n/a'
+
+        for (s, child) in sorted((tree.get('children') or {}).iteritems()):
+            subproblem = problems.pop(scores + (s,))
+            misplaced = [c for c in subproblem if score.score(root, c) != s]
+            if misplaced:
+                errors += 1
+                print "Score mismatch: scores:{}, root:{}, score:{}, misplaced codes:{}".format(
+                    scores, root, s, len(misplaced))
+            if len(subproblem) != child['problem_size']:
+                errors += 1
+                print "Problem size mismatch: scores:{}, insoln:{}, stat value:{}, len(problem):{}".format(
+                    scores + (s,), child['in_solution'], child['problem_size'], len(subproblem))
+            problem |= subproblem
+
+        if len(problem) != tree['problem_size']:
+            errors += 1
+            print "Problem size mismatch: scores:{}, insoln:{}, optimal:{}, stat value:{}, sum over children:{}".format(
+                scores, tree['in_solution'], optimal, tree['problem_size'], len(problem))
+        problems[scores] = problem
+
+    problem = problems.get((), ())
+    if len(problem) != CODETABLE.NCODES:
+        errors += 1
+        print "Codes not solved by the tree: {}".format(CODETABLE.NCODES - len(problem))
+    return errors
 
-        if parent is None:
-            self.problem = CODETABLE.ALL
-        else:
-            score = path[-1][1]
-            self.problem = parent.subproblems[score]
-
-        p = PartitionResult(self.problem, self.root)
-        self.subproblems = p.parts
-
-        problem_size = self.tree['problem_size']
-        stats = self.tree.get('stats')
-        optimal = 'n/a'
-        if stats:
-            optimal = stats.get('optimal', 'n/a')
-
-        if problem_size != len(self.problem):
-            print "Problem size mismatch: path:{}, insoln:{}, optimal:{}, stat value:{}, len(problem):{}".format(
-                self.path,
-                self.tree['in_solution'],
-                optimal,
-                problem_size,
-                len(self.problem))
-            return
-
-        children = self.tree.get('children')
-        if not children:
-            return
-
-        total = 1 if self.tree['in_solution'] else 0
-        for t in children.itervalues():
-            total += t['problem_size']
-
-        if total != problem_size:
-            print "Problem size mismatch: path:{}, insoln:{}, optimal:{}, len(problem):{}, sum over children:{}".format(
-                self.path,
-                self.tree['in_solution'],
-                optimal,
-                len(self.problem),
-                total)
-
-
-def action(ctx):
-    return True
 
 def main():
     parser = argparse.ArgumentParser()
@@ -62,12 +55,15 @@ def main():
                         default=None, type=str, dest='fname')
 
     args = parser.parse_args()
-    fname = args.fname
-
-    tw = TreeWalker(action, Ctx)
-
-    tree = loadfile(fname)
-    tw.walktree(tree)
+    score.initialize()
+
+    try:
+        errors = verify(iternodes(args.fname))
+    except MMException, e:
+        print >>sys.stderr, e
+        sys.exit(1)
+    if errors:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,54 @@
+import unittest as ut
+
+from mm import *
+import mm.bitset as bitset
+import mm.partition as partition
+import mm.score as score
+
+import random
+
+class BitsetTestCase(ut.TestCase):
+    def testRoundTrip(self):
+        self.assertEqual([], bitset.to_codes(bitset.EMPTY))
+        self.assertEqual(list(CODETABLE.ALL), bitset.to_codes(bitset.ALL))
+        self.assertEqual(bitset.ALL, bitset.from_codes(CODETABLE.ALL))
+        self.assertEqual(CODETABLE.NCODES, bitset.popcount(bitset.ALL))
+
+        for codes in ([0], [CODETABLE.NCODES-1], [7, 8, 9, 1000],
+                      random.sample(CODETABLE.ALL, 100)):
+            m = bitset.from_codes(codes)
+            self.assertEqual(len(codes), bitset.popcount(m))
+            self.assertEqual(sorted(codes), bitset.to_codes(m))
+
+
+class ScoreMaskTableTestCase(ut.TestCase):
+    def setUp(self):
+        bitset.initialize()
+
+    def testMasks(self):
+        tbl = bitset.MASK_TABLE
+        self.assertIs(bitset.ScoreMaskTable(), tbl)
+
+        for root in (0, 8, 51, CODETABLE.NCODES-1):
+            masks = tbl.MASKS[root]
+            self.assertEqual(bitset.ALL, reduce(lambda a, b: a | b, masks))
+            for (s, m) in enumerate(masks):
+                for c in bitset.to_codes(m):
+                    self.assertEqual(s, score.score(root, c))
+
+    def testMaskPartitionResult(self):
+        problem = sorted(random.sample(CODETABLE.ALL, 300))
+        mask = bitset.from_codes(problem)
+        for root in (8, 51, problem[0]):
+            expected = partition.PartitionResult(problem, root)
+            observed = partition.MaskPartitionResult(mask, root)
+            self.assertEqual(expected.sizes, observed.sizes)
+            self.assertEqual(expected.signature, observed.signature)
+            self.assertEqual(expected.long_signature, observed.long_signature)
+            self.assertEqual(tuple(expected.parts), tuple(observed.parts))
+            for s in range(CODETABLE.NSCORES):
+                self.assertEqual(expected.part_mask(s), observed.part_mask(s))
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
@@ -0,0 +1,50 @@
+import unittest as ut
+
+import mm.cache as cache
+
+class LRUCacheTestCase(ut.TestCase):
+    def testEviction(self):
+        c = cache.LRUCache(3)
+        for k in 'abc':
+            c.put(k, k.upper())
+        self.assertEqual('A', c.get('a'))
+        c.put('d', 'D')
+        self.assertEqual(3, len(c))
+        self.assertEqual(1, c.evictions)
+        self.assertNotIn('b', c)
+        self.assertIs(None, c.get('b'))
+        for k in 'acd':
+            self.assertIn(k, c)
+
+        c.put('c', 'C2')
+        c.put('e', 'E')
+        self.assertNotIn('a', c)
+        self.assertEqual('C2', c.get('c'))
+
+    def testDisabled(self):
+        c = cache.LRUCache(0)
+        c.put('a', 1)
+        self.assertEqual(0, len(c))
+        self.assertEqual(2, c.get('a', 2))
+
+
+class FailureCacheTestCase(ut.TestCase):
+    def testDominance(self):
+        c = cache.FailureCache(10)
+        self.assertFalse(c.fails('a', 3))
+        c.record('a', 3)
+        self.assertTrue(c.fails('a', 3))
+        self.assertTrue(c.fails('a', 1))
+        self.assertFalse(c.fails('a', 4))
+        self.assertEqual(2, c.hits)
+
+        # a failure with fewer moves adds nothing.
+        c.record('a', 2)
+        self.assertTrue(c.fails('a', 3))
+        c.record('a', 5)
+        self.assertTrue(c.fails('a', 4))
+        self.assertEqual(1, len(c))
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
@@ -0,0 +1,98 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.checkpoint as checkpoint
+import mm.partition as partition
+import mm.xforms as xforms
+
+import cPickle as pickle
+import os
+import shutil
+import tempfile
+
+class CheckpointTestCase(ut.TestCase):
+    def setUp(self):
+        import mm.strategy.all
+        from mm.strategy import STRATEGIES
+        xforms.initialize()
+
+        self.strategy = STRATEGIES['min_moves_distinct_in']
+        self.problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[4]
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'build.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def build(self, ckpt, maxdepth=6):
+        b = builder.TreeBuilder(self.strategy, self.problem, progress=None)
+        b.checkpoint = ckpt
+        return b.build(maxdepth)
+
+    @staticmethod
+    def tree_dict(t):
+        d = t.tree.as_dict()
+        del d['stats']['rusage']
+        return d
+
+    def testResume(self):
+        expected = self.build(None)
+        first = self.build(checkpoint.Checkpoint(self.path))
+        self.assertEqual(self.tree_dict(expected), self.tree_dict(first))
+        self.assertEqual(0, first.metrics['checkpoint_reused'])
+        self.assertLess(0, first.metrics['checkpoint_saves'])
+
+        # an interrupted build: the root, and half the subproblems, are missing.
+        ckpt = checkpoint.Checkpoint(self.path)
+        self.assertTrue(ckpt.load())
+        del ckpt.solved[()]
+        for path in sorted(ckpt.solved.keys())[::2]:
+            del ckpt.solved[path]
+
+        resumed = self.build(ckpt)
+        self.assertEqual(self.tree_dict(expected), self.tree_dict(resumed))
+        self.assertLess(0, resumed.metrics['checkpoint_reused'])
+        self.assertLess(resumed.metrics['entry_count'], expected.metrics['entry_count'])
+
+    def testPeriodicSave(self):
+        ckpt = checkpoint.Checkpoint(self.path, interval=1e-6)
+        self.build(ckpt)
+        self.assertLess(1, ckpt.saves)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+        # no periodic saves: the build saves once, when it completes.
+        ckpt = checkpoint.Checkpoint(os.path.join(self.dir, 'final.ckpt'), interval=0)
+        self.build(ckpt)
+        self.assertEqual(1, ckpt.saves)
+
+    def testLeftoverTemporary(self):
+        # a save interrupted before the rename.
+        with open(self.path + '.tmp', 'wb') as out:
+            out.write('partial')
+        ckpt = checkpoint.Checkpoint(self.path, interval=0)
+        ckpt.bind(None)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+        self.assertFalse(ckpt.load())
+
+    def testMismatch(self):
+        self.build(checkpoint.Checkpoint(self.path))
+        ckpt = checkpoint.Checkpoint(self.path)
+        ckpt.load()
+        self.assertRaises(MMException, self.build, ckpt, 5)
+
+    def testUnreadable(self):
+        self.assertFalse(checkpoint.Checkpoint(self.path).load())
+        with open(self.path, 'w') as out:
+            out.write('not a checkpoint')
+        self.assertRaises(MMException, checkpoint.Checkpoint(self.path).load)
+
+        # an earlier version of the file format.
+        with open(self.path, 'wb') as out:
+            pickle.dump(checkpoint.VERSION - 1, out)
+            pickle.dump({'signature': None, 'solved': {}, 'frontier': ()}, out)
+        self.assertRaises(MMException, checkpoint.Checkpoint(self.path).load)
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
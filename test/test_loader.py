@@ -2,6 +2,7 @@ import mm.loader
 import mm.singleton
 from mm import *
 
+import ctypes
 import glob
 import os
 import os.path
@@ -101,6 +102,96 @@ class LoaderTest(ut.TestCase):
             os.unlink(spec2.path)
 
 
+MAPPED_PATH = "/tmp/testmapped"
+MAPPED_SPEC = mm.loader.MappedStorageSpec(DATA_VERSION, MAPPED_PATH)
+
+class MappedSingleton(mm.singleton.SingletonBehavior):
+    __metaclass__ = mm.singleton.Singleton
+
+    def __init__(self, squares=None, codes=None):
+        self.squares = squares or tuple(tuple(i*j for j in xrange(300)) for i in xrange(7))
+        self.codes = codes or CODETABLE.CODES
+
+    def to_mapped(self):
+        return (('squares', 'I', self.squares), ('codes', 'B', self.codes))
+
+    @classmethod
+    def from_mapped(cls, tables):
+        s = cls.__new__(cls)
+        s.__init__(tables['squares'], tables['codes'])
+        s.__setstate__({})
+        return s
+
+
+class MappedLoaderTestCase(ut.TestCase):
+    def setUp(self):
+        for p in glob.glob(MAPPED_SPEC.path + '*'):
+            os.remove(p)
+        MappedSingleton.clear()
+
+    def tearDown(self):
+        self.setUp()
+
+    def testRoundTrip(self):
+        self.assertTrue(MAPPED_SPEC.path.endswith('.v1.bin'))
+        self.assertIn('MappedStorageSpec', repr(MAPPED_SPEC))
+
+        loader = mm.loader.MappedLoader(MappedSingleton, MAPPED_SPEC)
+        self.assertIs(None, loader.load())
+
+        s = loader.get()
+        self.assertTrue(os.path.exists(loader.path))
+        self.assertIs(s, MappedSingleton())
+        self.assertIs(s.squares, MappedSingleton().squares) # not reloaded.
+
+        MappedSingleton.clear()
+        s = loader.get()
+        self.assertIs(s, MappedSingleton())
+
+        expected = MappedSingleton.__new__(MappedSingleton)
+        expected.__init__()
+        for name in ('squares', 'codes'):
+            e = getattr(expected, name)
+            o = getattr(s, name)
+            self.assertEqual(len(e), len(o))
+            for (er, orow) in zip(e, o):
+                self.assertIsInstance(orow, ctypes.Array)
+                self.assertEqual(tuple(er), tuple(orow))
+
+        MappedSingleton.clear()
+        ss = mm.loader.MappedLoader(MappedSingleton, MAPPED_SPEC).load()
+        self.assertEqual(299*6, ss.squares[6][299])
+
+        # the rows are adjacent views of one mapping, which they keep open.
+        (row, nxt) = ss.squares[1:3]
+        self.assertEqual(ctypes.sizeof(row), ctypes.addressof(nxt) - ctypes.addressof(row))
+        del ss
+        MappedSingleton.clear()
+        self.assertEqual(299, row[299])
+
+    def testMismatch(self):
+        loader = mm.loader.MappedLoader(MappedSingleton, MAPPED_SPEC)
+        loader.get()
+
+        other = mm.loader.MappedStorageSpec(DATA_VERSION+1, MAPPED_PATH)
+        os.rename(loader.path, other.path)
+        self.assertIs(None, mm.loader.MappedLoader(MappedSingleton, other).load())
+        self.assertFalse(os.path.exists(other.path))
+
+    def testCorrupt(self):
+        loader = mm.loader.MappedLoader(MappedSingleton, MAPPED_SPEC)
+        loader.get()
+
+        with open(loader.path, 'rb') as fp:
+            data = fp.read()
+        os.remove(loader.path)
+        with open(loader.path, 'wb') as fp:
+            fp.write(data[:100])
+
+        self.assertIs(None, loader.load())
+        self.assertFalse(os.path.exists(loader.path))
+
+
 if __name__ == '__main__':
     ut.main(verbosity=2)
 
@@ -0,0 +1,56 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.ordering as ordering
+import mm.partition as partition
+import mm.xforms as xforms
+
+class OrderingTestCase(ut.TestCase):
+    def setUp(self):
+        import mm.strategy.all
+        from mm.strategy import STRATEGIES
+        xforms.initialize()
+        self.strategy = STRATEGIES['min_moves_distinct_in']
+        self.problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[4]
+
+    def testPolicies(self):
+        s = self.strategy(self.problem, None)
+        candidates = [s.partition_sizes(c) for c in self.problem]
+
+        largest = ordering.LargestPartOrdering().order(s, candidates)
+        keys = [(pr.stats.largest, -pr.stats.n) for pr in largest]
+        self.assertEqual(sorted(keys), keys)
+
+        totsq = ordering.TotsqOrdering().order(s, candidates)
+        keys = [partition.Stats(pr.sizes, 0).totsq for pr in totsq]
+        self.assertEqual(sorted(keys), keys)
+
+        entropy = ordering.EntropyOrdering().order(s, candidates)
+        keys = [partition.Stats(pr.sizes, 0).entropy for pr in entropy]
+        for (a, b) in zip(keys, keys[1:]):
+            self.assertGreaterEqual(a + 1e-9, b)
+
+        self.assertEqual(candidates, ordering.CandidateOrdering().order(s, candidates))
+        self.assertRaises(MMException, ordering.KeyOrdering().order, s, candidates)
+
+    def testBuild(self):
+        results = {}
+        for name in sorted(ordering.ORDERINGS.keys()):
+            b = builder.TreeBuilder(self.strategy, self.problem, progress=None)
+            b.ordering = ordering.ORDERINGS[name]()
+            results[name] = b.build(6)
+
+        baseline = results['none']
+        for (name, t) in results.iteritems():
+            self.assertEqual(baseline.tree.stats.total_moves, t.tree.stats.total_moves)
+            m = t.metrics
+            self.assertEqual(set(m['searched']), set(m['mean_best_rank']))
+            for rank in m['mean_best_rank'].itervalues():
+                self.assertLessEqual(1.0, rank)
+        self.assertLess(results['largest'].metrics['entry_count'],
+                        baseline.metrics['entry_count'])
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
@@ -1,6 +1,7 @@
 import unittest as ut
 
 from mm import *
+import mm.bitset as bitset
 import mm.partition as partition
 import mm.score as score
 
@@ -52,3 +53,77 @@ class PartitionResultTestCase(ut.TestCase):
 
         sig = pr.long_signature
         self.assertEqual(1, sig[0])
+
+
+class PartitionSizesTestCase(ut.TestCase):
+    def setUp(self):
+        score.initialize()
+
+    def runTest(self):
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[3]
+        mask = bitset.from_codes(problem)
+        for root in (0, 1, 7, 8, problem[0]):
+            full = partition.PartitionResult(problem, root)
+            for ps in (partition.PartitionSizes(problem, root),
+                       partition.PartitionSizes(problem, root, mask)):
+                self.assertEqual(root, ps.root)
+                self.assertEqual(full.sizes, tuple(ps.sizes))
+                for a in ('total', 'n', 'largest', 'optimal', 'in_solution'):
+                    self.assertEqual(getattr(full.stats, a), getattr(ps.stats, a))
+
+                pr = ps.result()
+                self.assertIs(pr, ps.result())
+                self.assertEqual(full.signature, pr.signature)
+                self.assertEqual(tuple(full.parts), tuple(pr.parts))
+
+            self.assertIsInstance(partition.PartitionSizes(problem, root, mask).result(),
+                                  partition.MaskPartitionResult)
+            self.assertIs(full, full.result())
+
+
+class HistogramMatrixTestCase(ut.TestCase):
+    def setUp(self):
+        score.initialize()
+
+    def runTest(self):
+        for problem in (CODETABLE.ALL, partition.PartitionResult(CODETABLE.ALL, 8).parts[3]):
+            candidates = range(0, CODETABLE.NCODES, 5)
+            m = partition.HistogramMatrix(problem, candidates)
+            self.assertEqual(tuple(candidates), m.root)
+
+            for (i, c) in enumerate(candidates):
+                pr = partition.PartitionResult(problem, c)
+                self.assertEqual(pr.sizes, tuple(m.counts[i]))
+                self.assertEqual(pr.stats.largest, m.largest[i])
+                self.assertEqual(pr.stats.n, m.n[i])
+                self.assertEqual(pr.stats.totsq, m.totsq[i])
+                self.assertAlmostEqual(pr.stats.entropy, m.entropy[i])
+                self.assertEqual(pr.stats.in_solution, m.in_solution[i])
+                self.assertEqual(pr.stats.optimal, m.optimal[i])
+
+            i = m.best((('largest', 1), ('n', -1), ('root', 1)))
+            expected = min(candidates, key=lambda c: (m.largest[candidates.index(c)],
+                                                      -m.n[candidates.index(c)], c))
+            self.assertEqual(expected, m.root[i])
+
+
+class PartsKeyTestCase(ut.TestCase):
+    def setUp(self):
+        score.initialize()
+
+    def runTest(self):
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[3]
+        mask = bitset.from_codes(problem)
+        families = {}
+        for c in CODETABLE.ALL:
+            pr = partition.PartitionResult(problem, c)
+            self.assertEqual(pr.parts_key,
+                             partition.PartitionResult(list(problem), c).parts_key)
+            family = frozenset(frozenset(p) for p in pr.parts if p)
+            key = pr.parts_key
+            self.assertEqual(family, families.setdefault(key, family))
+
+            mr = partition.MaskPartitionResult(mask, c)
+            self.assertEqual(pr.signature, mr.parts_key[0])
+
+        self.assertLess(len(families), CODETABLE.NCODES)
@@ -0,0 +1,58 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.partition as partition
+import mm.progress as progress
+
+class ProgressTestCase(ut.TestCase):
+    def testReset(self):
+        c = progress.CalculationStatus(None, 1296)
+        c.candidate_count = 10
+        c.next_candidate(partition.PartitionResult(CODETABLE.ALL, 8))
+        c.cur_child += 1
+        c.reset(256)
+
+        expected = progress.CalculationStatus(None, 256)
+        self.assertEqual(expected.to_string(), c.to_string())
+        self.assertIs(None, c.parent)
+
+    def testStatusChain(self):
+        root = builder.BuilderStrategy(CODETABLE.ALL, None)
+        pr = partition.PartitionResult(CODETABLE.ALL, 8)
+        (s1, s2) = [builder.BuilderStrategy(pr.parts[score], root.step(8, score))
+                    for score in (4, 8)]
+        self.assertIs(s1.status, s2.status)
+        self.assertIs(root.status, s2.status.parent)
+        self.assertEqual(len(pr.parts[8]), s2.status.problem_size)
+
+        # a deeper problem extends the chain.
+        u = builder.BuilderStrategy(pr.parts[8][:3], s2.step(9, 1))
+        self.assertIs(s2.status, u.status.parent)
+        (n, _, _, chain) = progress.CalculationStatus.parse_message(u.status.make_message(1, 'x'))
+        self.assertEqual(3, n)
+        self.assertEqual([3, len(pr.parts[8]), 1296], [c.problem_size for c in chain])
+
+    def testDisabled(self):
+        import mm.strategy.all
+        from mm.strategy import STRATEGIES
+        s = STRATEGIES['min_largest']
+
+        root = s(CODETABLE.ALL, None, status_socket=progress.DISABLED)
+        self.assertIs(progress.NULL_STATUS, root.status)
+        child = s((1, 2, 3), root.step(8, 4))
+        self.assertIs(progress.NULL_STATUS, child.status)
+
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[8]
+        results = []
+        for dest in (None, progress.DISABLED):
+            b = builder.TreeBuilder(s, problem, progress=dest)
+            b.reporting_cycle = 1
+            d = b.build(6).tree.as_dict()
+            del d['stats']['rusage']
+            results.append(d)
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
@@ -1,5 +1,7 @@
 import unittest as ut
 
+import array
+
 import mm
 import mm.score
 
@@ -27,6 +29,32 @@ class ScoreTableTestCase(ut.TestCase):
                              tbl.score(i, i))
 
 
+class LookupTableTestCase(ut.TestCase):
+    def setUp(self):
+        mm.score.initialize()
+
+    def runTest(self):
+        tbl = mm.score.LOOKUP_TABLE
+        self.assertIs(mm.score.SCORE_TABLE.SCORE_TABLE, tbl)
+        self.assertEqual(mm.CODETABLE.NCODES, len(tbl))
+
+        row = tbl[51]
+        self.assertEqual(mm.CODETABLE.NCODES, len(row))
+        self.assertEqual(array.array(mm.score.SCORE_TYPECODE, row),
+                         mm.score._genscoretable()[51])
+
+        for c in xrange(0, mm.CODETABLE.NCODES, 7):
+            self.assertEqual(mm.score.Score.from_encoded(51, c).value, row[c])
+            self.assertEqual(row[c], mm.score.score(c, 51))
+
+class GenerateTableTestCase(ut.TestCase):
+    def runTest(self):
+        expected = mm.score._genscoretable_pairwise()
+        observed = mm.score._genscoretable()
+        self.assertEqual(len(expected), len(observed))
+        for (c, (e, o)) in enumerate(zip(expected, observed)):
+            self.assertEqual(e, o, "row {} differs".format(c))
+
 
 if __name__ == '__main__':
     ut.main(verbosity=2)
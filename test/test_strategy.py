@@ -0,0 +1,51 @@
+import unittest as ut
+
+from mm import *
+import mm.partition as partition
+import mm.score as score
+import mm.strategy as strategy
+
+class BestCandidateTestCase(ut.TestCase):
+    """The histogram matrix choice of the comparator strategies agrees with
+    the comparator scan."""
+
+    def setUp(self):
+        import mm.strategy.all
+        score.initialize()
+
+        self.classes = []
+        for (name, cls) in sorted(strategy.STRATEGIES.iteritems()):
+            if issubclass(cls, strategy.OptimizePartitionResultProperty) and \
+                    cls._key_columns is not None:
+                # in-problem and all-codes variants of every ordering.
+                other = type(cls.__name__ + 'Other', (cls,),
+                             {'restrict_to_problem': not cls.restrict_to_problem})
+                self.classes.extend([(name, cls), (name + '/other', other)])
+
+    def subproblems(self, cls):
+        """:return: strategies for the nontrivial subproblems of two
+          levels, under two first guesses."""
+        root = cls(CODETABLE.ALL, None)
+        for guess in (8, 1):
+            pr = partition.PartitionResult(CODETABLE.ALL, guess)
+            for (s, part) in enumerate(pr.parts):
+                if len(part) <= 2:
+                    continue
+                child = cls(part, root.step(guess, s))
+                yield child
+                cpr = partition.PartitionResult(part, part[len(part) // 2])
+                for (cs, cpart) in enumerate(cpr.parts):
+                    if len(cpart) > 2:
+                        yield cls(cpart, child.step(cpr.root, cs))
+
+    def runTest(self):
+        self.assertTrue(self.classes)
+        for (name, cls) in self.classes:
+            for s in self.subproblems(cls):
+                expected = s._scan_best_candidate()[0].root
+                self.assertEqual(expected, s._best_candidate()[0].root,
+                                 "{}: problem size {}".format(name, s.problem_size))
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
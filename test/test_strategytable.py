@@ -0,0 +1,58 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.score as score
+import mm.strategytable as strategytable
+import mm.treefile as treefile
+import mm.treewalk as treewalk
+
+import json
+import os
+import tempfile
+
+class StrategyTableTestCase(ut.TestCase):
+    def setUp(self):
+        score.initialize()
+        b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
+        self.tree = b.build(10, root=8).tree
+        self.d = self.tree.as_dict()
+
+    def testCompile(self):
+        table = strategytable.StrategyTable.from_tree(self.d)
+        self.assertEqual(8, table.guess[0])
+        self.assertLess(0, table.nbytes)
+
+        # the same tables from every representation.
+        others = [strategytable.StrategyTable.from_tree(self.tree),
+                  strategytable.StrategyTable.from_tree(json.loads(json.dumps(self.d)))]
+        (fd, path) = tempfile.mkstemp(suffix='.mmt')
+        os.close(fd)
+        try:
+            treefile.write(path, self.d)
+            with treefile.TreeFile(path) as tf:
+                others.append(strategytable.StrategyTable.from_treefile(tf))
+        finally:
+            os.remove(path)
+        for t in others:
+            self.assertEqual(table.guess, t.guess)
+            self.assertEqual(table.next, t.next)
+
+    def testPlay(self):
+        table = strategytable.StrategyTable.from_tree(self.d)
+        for secret in CODETABLE.ALL:
+            path = treewalk.play(secret, self.d)
+            self.assertEqual(path, table.play(secret))
+            self.assertEqual(path, treewalk.play(secret, table))
+            for k in xrange(len(path)):
+                self.assertEqual(path[k][0], table.next_guess(path[:k]))
+
+        self.assertIs(None, table.next_guess([(9, 0)]))
+        self.assertEqual(-1, table.find([(9, 0)]))
+        for s in (-1, CODETABLE.NSCORES):
+            self.assertRaises(MMException, table.find, [(8, s)])
+            self.assertRaises(MMException, table.next_guess, [(8, s)])
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
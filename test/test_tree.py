@@ -3,10 +3,23 @@ import unittest as ut
 from mm import *
 import mm.builder as builder
 import mm.partition as partition
+import mm.progress as progress
+import mm.xforms as xforms
 
+import collections
 import json
 
 class TreeTestCase(ut.TestCase):
+    def setUp(self):
+        import mm.strategy.all
+        from mm.strategy import STRATEGIES
+        xforms.initialize()
+
+        self.strategies = STRATEGIES
+        self.problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[4]
+        """A subproblem under the first guess 8; 256 codes."""
+
+
     def testTreeBuild(self):
         b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
         t = b.build(10, root=8)
@@ -27,6 +40,34 @@ class TreeTestCase(ut.TestCase):
         s = str(t.stats)
         self.assertGreater(s.find(str(CODETABLE.NCODES)), 0)
 
+    def testStreamingJSON(self):
+        import StringIO
+        b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
+        t = b.build(10, root=8)
+        t.metrics['lists'] = [[], [1, 2.5, None, True], {}, {3: u'x\u00e9', 'y': False}]
+
+        # sorted keys, except for the children of nodes, which come last.
+        def ordered(v):
+            if isinstance(v, dict):
+                items = sorted((k, ordered(x)) for (k, x) in v.iteritems())
+                if 'root' in v:
+                    items.sort(key=lambda p: p[0] == 'children')
+                return collections.OrderedDict(items)
+            if isinstance(v, list):
+                return [ordered(x) for x in v]
+            return v
+        d = ordered(t.as_dict())
+
+        out = StringIO.StringIO()
+        t.write_json(out)
+        self.assertEqual(json.dumps(d, check_circular=True, indent=2), out.getvalue())
+        self.assertEqual(json.loads(t.as_json_string()), json.loads(out.getvalue()))
+
+        out = StringIO.StringIO()
+        t.write_json(out, compact=True)
+        self.assertEqual(json.dumps(d, separators=(',', ':')), out.getvalue())
+
+
     def testCantBuild(self):
         b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
         t = b.build(3, root=8)
@@ -39,6 +80,326 @@ class TreeTestCase(ut.TestCase):
         self.assertGreater(d.find(str(CODETABLE.NCODES)), 0)
 
 
+    def testCollapseIdentical(self):
+        # min_depth_distinct's candidates depend on the path to the subproblem.
+        for name in ('min_depth_distinct', 'min_moves_distinct_in'):
+            results = []
+            for collapse in (False, True):
+                b = builder.TreeBuilder(self.strategies[name], self.problem, progress=None)
+                b.collapse_identical = collapse
+                results.append(b.build(6))
+            self.assertEqual(results[0].tree.as_dict()['children'],
+                             results[1].tree.as_dict()['children'])
+
+        # the builds of min_moves_distinct_in.
+        self.assertEqual({}, results[0].metrics['collapsed_candidates'])
+        self.assertLess(0, sum(results[1].metrics['collapsed_candidates'].values()))
+        self.assertLess(results[1].metrics['entry_count'], results[0].metrics['entry_count'])
+        self.assertIn('collapsed_candidates', results[1].as_dict()['metrics'])
+
+        # the context of the subproblems is known before they are made.
+        for name in ('min_moves_distinct_in', 'min_depth_distinct'):
+            cls = self.strategies[name]
+            top = cls(self.problem, None)
+            for root in (0, 8, 1295):
+                pr = partition.PartitionResult(self.problem, root)
+                for (score, part) in enumerate(pr.parts):
+                    if part:
+                        child = cls(part, top.step(root, score))
+                        self.assertEqual(child.context_key, top.context_key_after(root))
+
+
+    def testBranchAndBound(self):
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[3]
+        s = self.strategies['min_moves_distinct_in']
+        best = builder.TreeBuilder(s, problem, progress=None).build(6).tree
+        self.assertEqual(375, best.stats.total_moves)
+
+        # one move short of the best tree: three candidates of the 
+        # subproblems run out of budget.
+        b = builder.TreeBuilder(s, problem, progress=None)
+        self.assertIsNone(b._solve(s(problem, None), 6, 374))
+        self.assertEqual({1: 3}, b.cutoffs)
+
+        # a tree within the budget is the best tree.
+        b = builder.TreeBuilder(s, problem, progress=None)
+        t = b._solve(s(problem, None), 6, 375)
+        self.assertEqual(best.as_dict()['children'], t.as_dict()['children'])
+
+        # below the fewest moves of any tree, the problem is not searched.
+        b = builder.TreeBuilder(s, problem, progress=None)
+        self.assertIsNone(b._solve(s(problem, None), 6, builder.min_total_moves(105) - 1))
+        self.assertEqual(1, b.entry_count)
+        self.assertEqual({0: 1}, b.prunes)
+
+        b = builder.TreeBuilder(s, problem, progress=None)
+        b.branch_and_bound = False
+        t = b.build(6)
+        self.assertEqual(best.as_dict()['children'], t.tree.as_dict()['children'])
+        self.assertEqual({}, t.metrics['budget_cutoffs'])
+        self.assertEqual({}, t.metrics['lower_bound_prunes'])
+        self.assertEqual(0.0, t.metrics['pruning_rate'])
+
+
+    def testTranspositionTable(self):
+        import mm.cache as cache
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[8]
+        s = self.strategies['min_moves_distinct_in']
+
+        # the repeated problem is answered from the table, with the same tree.
+        b = builder.TreeBuilder(s, problem, progress=None)
+        first = b.build(6)
+        self.assertLess(0, b.transposition_hits)
+        (hits, misses, entries) = (b.transposition_hits, b.transposition_misses, b.entry_count)
+        second = b.build(6)
+        self.assertEqual(hits + 1, b.transposition_hits)
+        self.assertEqual(misses, b.transposition_misses)
+        self.assertEqual(entries + 1, b.entry_count)
+        for (u, v) in zip(first.tree.children, second.tree.children):
+            self.assertIs(u, v)
+
+        b = builder.TreeBuilder(s, problem, progress=None)
+        b.transpositions = cache.LRUCache(0)
+        t = b.build(6)
+        self.assertEqual(0, t.metrics['transposition_hits'])
+        self.assertEqual(0, t.metrics['transposition_entries'])
+        self.assertEqual(first.tree.as_dict()['children'], t.tree.as_dict()['children'])
+
+        b = builder.TreeBuilder(s, problem, progress=None)
+        b.transpositions = cache.LRUCache(10)
+        t = b.build(6)
+        self.assertEqual(10, t.metrics['transposition_entries'])
+        self.assertLess(0, t.metrics['transposition_evictions'])
+
+
+    def testFailureCache(self):
+        import mm.cache as cache
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[3]
+        s = self.strategies['min_moves_distinct_in']
+        # failures are only recorded for problems that have no solution.
+        results = []
+        for size in (0, builder.FAILURE_CACHE_SIZE):
+            b = builder.TreeBuilder(s, problem, progress=None)
+            b.failures = cache.FailureCache(size)
+            results.append(b.build_deepening(6))
+        self.assertEqual(results[0].tree.as_dict()['children'],
+                         results[1].tree.as_dict()['children'])
+
+        m0, m1 = [t.metrics for t in results]
+        self.assertEqual(0, m0['failure_hits'])
+        self.assertEqual(0, m0['failure_entries'])
+        self.assertLess(0, m1['failure_hits'])
+        self.assertLess(0, m1['failure_entries'])
+
+
+    def testParallel(self):
+        problem = self.problem
+        s = self.strategies['min_moves_distinct_in']
+        b = builder.TreeBuilder(s, problem, progress=None)
+        serial = b.build(6)
+        self.assertEqual({}, serial.metrics['worker_usage'])
+
+        for depth in (1, 2):
+            b = builder.TreeBuilder(s, problem, progress=None)
+            b.workers = 3
+            b.parallel_depth = depth
+            parallel = b.build(6)
+            self.verifyTree(parallel.tree, 6, problem)
+            self.assertEqual([], b.search_state())
+            self.assertEqual(serial.tree.as_dict()['children'],
+                             parallel.tree.as_dict()['children'])
+
+            m = parallel.metrics
+            usage = m['worker_usage']
+            self.assertLess(0, len(usage))
+            self.assertLessEqual(len(usage), 3)
+            for u in usage.itervalues():
+                self.assertLess(0, u['units'])
+                self.assertLessEqual(0.0, u['utime'])
+            # the workers' tables and CPU time count in the build's.
+            self.assertLess(0, m['transposition_entries'])
+            self.assertEqual(m['transposition_entries'], len(b.transpositions) +
+                             sum(u['transposition_entries'] for u in usage.itervalues()))
+            self.assertLessEqual(sum(u['utime'] for u in usage.itervalues()),
+                                 parallel.tree.stats.rusage.utime)
+            json.loads(parallel.as_json_string())
+
+
+    def testSearchState(self):
+        problem = self.problem
+        states = []
+        class Builder(builder.TreeBuilder):
+            def _solve_small(self, strategy, problem, remaining):
+                if not states and strategy.depth == 1:
+                    states.append(self.search_state())
+                return super(Builder, self)._solve_small(strategy, problem, remaining)
+
+        b = Builder(self.strategies['min_largest'], problem, progress=None)
+        t = b.build(6)
+        self.verifyTree(t.tree, 6, problem)
+        self.assertEqual([], b.search_state())
+        state = states[0]
+        self.assertEqual(2, len(state))
+        self.assertEqual([], state[0]['path'])
+        self.assertEqual(6, state[0]['remaining'])
+        for (i, f) in enumerate(state):
+            self.assertEqual(i, len(f['path']))
+            self.assertLess(0, f['candidate_index'])
+            self.assertLessEqual(f['candidate_index'], f['candidate_count'])
+        self.assertEqual([state[0]['guess'], state[0]['score']], state[1]['path'][-1])
+        json.dumps(state)
+
+
+    def testAnytime(self):
+        STRATEGIES = self.strategies
+        problem = self.problem
+        s = STRATEGIES['min_moves_distinct_in']
+        exhaustive = s.build_tree(problem, 6)
+        greedy = STRATEGIES['min_largest'].build_tree(problem, 6)
+
+        streamed = []
+        b = builder.TreeBuilder(s, problem, progress=None)
+        b.greedy_strategy = STRATEGIES['min_largest']
+        b.on_improvement = streamed.append
+        t = b.build(6, time_limit=3600)
+        self.verifyTree(t.tree, 6, problem)
+        self.assertFalse(t.metrics['deadline_reached'])
+        self.assertLessEqual(t.tree.stats.total_moves, exhaustive.tree.stats.total_moves)
+
+        improvements = t.metrics['improvements']
+        self.assertEqual(len(improvements), len(streamed))
+        self.assertEqual(greedy.tree.stats.total_moves, improvements[0]['total_moves'])
+        self.assertEqual(t.tree.stats.total_moves, improvements[-1]['total_moves'])
+        # strict improvements only: fewer moves, or as many in a shallower tree.
+        for (a, b) in zip(improvements, improvements[1:]):
+            self.assertLess((b['total_moves'], b['max_depth']), 
+                            (a['total_moves'], a['max_depth']))
+        for r in streamed:
+            self.verifyTree(r.tree, 6, problem)
+
+        # out of time during the greedy build.
+        b = builder.TreeBuilder(s, problem, progress=None)
+        b.greedy_strategy = STRATEGIES['min_largest']
+        t = b.build(6, time_limit=0)
+        self.assertTrue(t.metrics['deadline_reached'])
+        self.assertIs(None, t.tree)
+        self.assertEqual([], t.metrics['improvements'])
+        self.assertEqual([], b.search_state())
+
+        b.workers = 2
+        self.assertRaises(MMException, b.build, 6, None, 1)
+
+        # the greedy build reports to the builder's progress destination.
+        sockets = []
+        class Greedy(STRATEGIES['min_largest']):
+            def __init__(self, *args, **kwargs):
+                super(Greedy, self).__init__(*args, **kwargs)
+                if not self.parent:
+                    sockets.append(self.status_socket)
+        b = builder.TreeBuilder(s, problem, progress=progress.DISABLED)
+        b.greedy_strategy = Greedy
+        b.build(6, time_limit=0)
+        self.assertEqual([progress.DISABLED], sockets)
+
+
+    def testDeepening(self):
+        pr = partition.PartitionResult(CODETABLE.ALL, 8)
+        s = self.strategies['min_moves_distinct_in']
+
+        # 105 codes: the passes start at the smallest depth the size 
+        # allows, 3; there is no tree of depth 4.
+        problem = pr.parts[3]
+        b = builder.TreeBuilder(s, problem, progress=None)
+        t = b.build_deepening(8)
+        self.assertEqual(5, t.metrics['minimal_depth'])
+        self.assertEqual(5, t.max_levels)
+        self.assertEqual([(3, False), (4, False), (5, True)],
+                         [(p['max_depth'], p['feasible']) for p in t.metrics['deepening']])
+        self.verifyTree(t.tree, 5, problem)
+        self.assertLess(0, t.metrics['incumbent_hits'])
+
+        # the same tree as a build at that depth.
+        expected = s.build_tree(problem, 5).tree.as_dict()
+        observed = t.tree.as_dict()
+        for d in (expected, observed):
+            del d['stats']['rusage']
+        self.assertEqual(expected, observed)
+
+        # stops below the depth of the tree found without a depth limit.
+        problem = pr.parts[8]
+        self.assertEqual(5, s.build_tree(problem, 6).tree.stats.max_depth)
+        t = builder.TreeBuilder(s, problem, progress=None).build_deepening(6)
+        self.assertEqual(4, t.metrics['minimal_depth'])
+        self.assertEqual(4, t.tree.stats.max_depth)
+
+        t = builder.TreeBuilder(s, pr.parts[3], progress=None).build_deepening(4)
+        self.assertIsNone(t.tree)
+        self.assertIsNone(t.metrics['minimal_depth'])
+        self.assertEqual([3, 4], [p['max_depth'] for p in t.metrics['deepening']])
+        for maxdepth in (0, -1):
+            self.assertRaises(MMException, b.build_deepening, maxdepth)
+
+
+    def testMinTotalMoves(self):
+        self.assertEqual(1, builder.min_total_moves(1))
+        self.assertEqual(3, builder.min_total_moves(2))
+        self.assertEqual(1 + 2*13 + 3*6, builder.min_total_moves(20))
+        self.assertIs(None, builder.min_total_moves(15, 2))
+        self.assertEqual(builder.min_total_moves(14), builder.min_total_moves(14, 2))
+
+        pr = partition.PartitionResult(CODETABLE.ALL, 8)
+        lb = builder.partition_moves_bound(pr.sizes, pr.stats.in_solution)
+        self.assertLessEqual(lb, 5600)
+        self.assertLess(builder.min_total_moves(CODETABLE.NCODES), lb)
+
+
+    def testInterning(self):
+        import mm.tree as tree
+        STRATEGIES = self.strategies
+
+        self.assertIs(tree.one_element_tree(5), tree.one_element_tree(5))
+        self.assertIs(tree.two_element_tree((3, 9)), tree.two_element_tree([9, 3]))
+        pr = partition.PartitionResult((3, 9, 30), 3)
+        self.assertTrue(pr.stats.optimal)
+        self.assertIs(tree.optimal_tree(pr), tree.optimal_tree(pr))
+
+        # the trees of overlapping problems share subtrees.
+        problem = partition.PartitionResult(CODETABLE.ALL, 8).parts[8]
+        trees = []
+        for name in ('min_largest', 'min_moves_distinct_in'):
+            b = builder.TreeBuilder(STRATEGIES[name], problem, progress=None)
+            trees.append(b.build(6).tree)
+
+        # built trees hold the interned leaves and small subtrees.
+        def check(t, problem):
+            if len(problem) == 1:
+                self.assertIs(tree.one_element_tree(problem[0]), t)
+            elif len(problem) == 2:
+                self.assertIs(tree.two_element_tree(problem), t)
+            else:
+                pr = partition.PartitionResult(problem, t.root)
+                if pr.stats.optimal:
+                    self.assertIs(tree.optimal_tree(pr), t)
+                for (score, part) in enumerate(pr.parts):
+                    if part and score != CODETABLE.PERFECT_SCORE:
+                        check(t.children[score], part)
+        for t in trees:
+            for (score, part) in enumerate(partition.PartitionResult(problem, t.root).parts):
+                if part and score != CODETABLE.PERFECT_SCORE:
+                    check(t.children[score], part)
+        trees.append(trees[0].children[3])
+
+        d = tree.as_dag_dict(trees)
+        self.assertEqual(3, len(d['roots']))
+        self.assertLess(len(d['nodes']), 2 * len(problem))
+        self.assertIn('rusage', d['nodes'][d['roots'][0]]['stats'])
+        d = json.loads(json.dumps(d))
+        for (t, u) in zip(trees, tree.from_dag_dict(d)):
+            (dt, du) = (t.as_dict(), u.as_dict())
+            dt['stats'].pop('rusage', None)
+            self.assertEqual(dt, du)
+
+
     def verifyTree(self, tree, remaining, problem):
         self.assertEqual(len(problem), tree.stats.problem_size)
         self.assertLess(0, remaining)
@@ -0,0 +1,87 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.score as score
+import mm.tree as tree
+import mm.treefile as treefile
+import mm.treewalk as treewalk
+
+import json
+import os
+import StringIO
+import tempfile
+
+class TreeFileTestCase(ut.TestCase):
+    def setUp(self):
+        score.initialize()
+        b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
+        self.result = b.build(10, root=8)
+        (fd, self.path) = tempfile.mkstemp(suffix='.mmt')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testConversion(self):
+        d = self.result.as_dict()
+        treefile.write(self.path, d)
+        with treefile.TreeFile(self.path) as tf:
+            self.assertEqual(json.dumps(d, sort_keys=True),
+                             json.dumps(tf.as_result_dict(), sort_keys=True))
+            self.assertEqual(d['strategy'], tf.metadata()['strategy'])
+
+        # a tree only.
+        treefile.write(self.path, d['tree'])
+        with treefile.TreeFile(self.path) as tf:
+            self.assertIs(None, tf.metadata())
+            self.assertEqual(json.dumps(d['tree'], sort_keys=True),
+                             json.dumps(tf.as_result_dict(), sort_keys=True))
+
+        # from the nodes of a JSON file, and back.
+        (fd, jpath) = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            self.result.to_json_file(jpath)
+            result = {}
+            treefile.write_nodes(self.path, treewalk.iternodes(jpath, result), result)
+            with treefile.TreeFile(self.path) as tf:
+                self.assertEqual(len(list(treewalk.iternodes(jpath))), len(tf))
+                self.assertEqual(json.dumps(d, sort_keys=True),
+                                 json.dumps(tf.as_result_dict(), sort_keys=True))
+                out = StringIO.StringIO()
+                tree.dump_json(dict(tf.metadata(), tree=tf.node()), out)
+                with open(jpath) as fp:
+                    self.assertEqual(fp.read(), out.getvalue())
+        finally:
+            os.remove(jpath)
+        self.assertRaises(MMException, treefile.write_nodes, self.path, iter(()))
+
+    def testLookup(self):
+        tree = self.result.tree.as_dict()
+        treefile.write(self.path, tree)
+        with treefile.TreeFile(self.path) as tf:
+            self.assertEqual(8, tf.root())
+            for secret in CODETABLE.ALL:
+                path = treewalk.play(secret, tree)
+                self.assertEqual(path, tf.play(secret))
+                self.assertEqual(path, treewalk.play(secret, tf))
+
+            # the subtree by its path.
+            (s, child) = sorted(tree['children'].iteritems())[-1]
+            i = tf.find([(8, s)])
+            self.assertEqual(child, tf.as_dict(i))
+            self.assertEqual(-1, tf.find([(9, s)]))
+            self.assertEqual(0, tf.find([]))
+            for s in (-1, CODETABLE.NSCORES):
+                self.assertRaises(MMException, tf.child, 0, s)
+                self.assertRaises(MMException, tf.find, [(8, s)])
+
+    def testBadFile(self):
+        with open(self.path, 'wb') as fp:
+            fp.write('{"tree": null}')
+        self.assertRaises(MMException, treefile.TreeFile, self.path)
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)
@@ -0,0 +1,136 @@
+import unittest as ut
+
+from mm import *
+import mm.builder as builder
+import mm.treefile as treefile
+import mm.treewalk as treewalk
+
+import json
+import os
+import StringIO
+import tempfile
+
+class TreeWalkTestCase(ut.TestCase):
+    def setUp(self):
+        b = builder.TreeBuilder(builder.BuilderStrategy, CODETABLE.ALL, progress=None)
+        self.result = b.build(10, root=8)
+        (fd, self.path) = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.result.to_json_file(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testEvents(self):
+        text = json.dumps({'a': [1, -2.5e3, True, False, None, u'x"y\u00e9'],
+                           'b': {}, 'c': [], 'd': {'e': 12345}})
+        expected = list(treewalk.iterevents(StringIO.StringIO(text)))
+        self.assertEqual(('start_map', None), expected[0])
+        self.assertIn(('value', u'x"y\u00e9'), expected)
+        self.assertIn(('value', -2500.0), expected)
+        # tokens split across chunks.
+        for n in (1, 2, 3, 7):
+            self.assertEqual(expected, list(treewalk.iterevents(StringIO.StringIO(text), n)))
+
+        self.assertRaises(MMException, list, treewalk.iterevents(StringIO.StringIO('{"a": tru')))
+        self.assertRaises(MMException, list, treewalk.iterevents(StringIO.StringIO('{"a": "x')))
+
+        # truncated, unbalanced, missing or doubled separators, and bad numbers.
+        for text in ('{"a": 1', '[[1]', '', '}', ']', '{"a": 1}}', '[1]]', '{"a": 1]',
+                     '{"a" 1}', '[1 2]', '{"a": 1 "b": 2}', '[1,,2]', '[1,]', '{,}',
+                     '{"a":: 1}', '{"a": 1,}', '{1: 2}', '1 2', '[1.e]', '[1.2.3]', '[01]'):
+            for n in (1, treewalk.CHUNK_SIZE):
+                self.assertRaises(MMException, list,
+                                  treewalk.iterevents(StringIO.StringIO(text), n))
+
+    def testLoad(self):
+        tree = treewalk.loadfile(self.path)
+        self.assertEqual(8, tree['root'])
+        for s in tree['children']:
+            self.assertIsInstance(s, int)
+        self.assertEqual(tree['root'], treewalk.play(8, tree)[0][0])
+        self.assertEqual(tree, treewalk.openfile(self.path))
+
+        # scores as read by json.load are converted.
+        with open(self.path) as fp:
+            raw = json.load(fp)['tree']
+        for secret in (0, 8, CODETABLE.NCODES - 1):
+            self.assertEqual(treewalk.play(secret, tree), treewalk.play(secret, raw))
+        walks = []
+        for t in (tree, raw):
+            paths = []
+            treewalk.TreeWalker(lambda ctx: paths.append(ctx.path) or True).walktree(t)
+            walks.append(sorted(paths))
+        self.assertEqual(walks[0], walks[1])
+        s = min(tree['children'])
+        ctx = treewalk.TreeWalkerContext(None, (), raw['root'], tree=raw)
+        self.assertEqual(raw['children'][str(s)], ctx.child(s, 0).tree)
+
+        ctx = treewalk.TreeWalkerContext(None, (), tree['root'], tree=tree)
+        self.assertRaises(MMException, ctx.child, CODETABLE.PERFECT_SCORE, 0)
+        self.assertRaises(MMException, treewalk.children, {'children': {'x': {}}})
+
+    def testWalkFile(self):
+        (fd, path) = tempfile.mkstemp(suffix='.mmt')
+        os.close(fd)
+        (fd, sorted_path) = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            treefile.write(path, self.result.as_dict())
+            # children before roots.
+            with open(sorted_path, 'w') as fp:
+                json.dump(self.result.as_dict(), fp, sort_keys=True)
+            view = treewalk.openfile(path)
+            self.assertIsInstance(view, treefile.NodeView)
+            self.assertEqual(8, view['root'])
+            self.assertEqual(sorted(treewalk.loadfile(self.path)['children']),
+                             sorted(view['children']))
+
+            walks = []
+            for fname in (self.path, path, sorted_path):
+                nodes = []
+                def action(ctx):
+                    self.assertEqual(ctx.tree['root'], ctx.root)
+                    nodes.append((ctx.path, ctx.tree['problem_size'], ctx.tree['stats'],
+                                  sorted(treewalk.children(ctx.tree) or ())))
+                    return ctx.tree['problem_size'] > 2
+                treewalk.TreeWalker(action).walkfile(fname)
+                walks.append(sorted(nodes))
+            self.assertEqual(walks[0], walks[2])
+            # the binary tree is walked from the root, and pruned.
+            self.assertEqual([n for n in walks[0] if len(n[0]) < 2], 
+                             [n for n in walks[1] if len(n[0]) < 2])
+            self.assertLess(len(walks[1]), len(walks[0]))
+            self.assertEqual(self.result.tree.stats.problem_size, walks[1][0][1])
+        finally:
+            os.remove(path)
+            os.remove(sorted_path)
+
+    def testNodes(self):
+        tree = treewalk.loadfile(self.path)
+        nodes = list(treewalk.iternodes(self.path))
+        self.assertEqual((), nodes[-1][0])
+
+        seen = set()
+        for (scores, node) in nodes:
+            # the node, as loaded, less its grandchildren.
+            t = tree
+            for s in scores:
+                t = t['children'][s]
+            self.assertEqual(t['root'], node['root'])
+            self.assertEqual(t['stats'], node['stats'])
+            children = node.get('children', {})
+            self.assertEqual(sorted(t.get('children', {}).keys()), sorted(children.keys()))
+            for (s, child) in children.iteritems():
+                self.assertNotIn('children', child)
+                self.assertEqual(t['children'][s]['problem_size'], child['problem_size'])
+                # children come first.
+                self.assertIn(scores + (s,), seen)
+            seen.add(scores)
+
+        for (path, node) in treewalk.iterpaths(self.path):
+            self.assertEqual(treewalk.play(node['root'], tree)[:-1], path)
+
+
+if __name__ == '__main__':
+    ut.main(verbosity=2)